@@ -0,0 +1,298 @@
+import bisect
+import io
+import itertools
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from form_model import load_form
+from record_store import snapshot
+
+# ---- 분석용 집계 ----
+# 대시보드가 쓰는 집계를 저장소 변경 통지(subscribe)로 증분 유지합니다.
+# 레코드 id별 기여분(유형, 날짜, 매매가, 연식, 평가 항목)을 보관해 두고, 추가/수정/삭제 시
+# 이전 기여분을 빼고 새 기여분을 더하므로 전체 스캔은 처음 한 번과
+# 다른 프로세스가 쓴 경우(버전 불일치)에만 수행합니다.
+#   - 유형별 매매가: 정렬 리스트 (사분위수/수염을 인덱스 조회로 계산)
+#   - (유형, 연식)별 건수·매매가 합
+#   - (유형, 날짜)별 방문 수
+#   - (유형, 항목, 평가)별 건수
+# 보기(views)마다 버전을 따로 두어, 변경이 그 보기의 그림에 쓰이는 기여분을 바꿀 때만 올립니다
+# (대시보드는 이 버전으로 그림을 캐시하므로 저장 후에도 바뀐 그림만 다시 그립니다).
+
+_UNKNOWN = "(미입력)"
+
+
+def _num(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else f
+
+
+def _text(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    return str(v).strip()
+
+
+class RecordAggregates:
+    def __init__(self, store, form=None):
+        form = form or load_form()
+        scale = form.option_sets.get("scale", [])
+        self.rating_keys = [q["key"] for q in form.questions if q.get("options") == scale]
+        self.rating_levels = list(scale)
+        self.store = store
+        self.version = None
+        self._lock = threading.RLock()
+        self._token = uuid.uuid4().hex[:8]  # 인스턴스가 바뀌면 이전 보기 버전과 겹치지 않도록
+        self._tick = itertools.count(1)
+        self._view_versions = dict.fromkeys(views, 0)
+        self._reset()
+        store.subscribe(self._on_change)
+
+    def _reset(self):
+        self._rows = {}  # id -> 기여분 tuple
+        self._fields = {}  # id -> 기여분 계산에 쓴 원본 필드 (부분 수정 병합용)
+        self.price = defaultdict(list)
+        self.age = defaultdict(lambda: [0, 0.0])
+        self.visits = Counter()
+        self.ratings = Counter()
+        self.type_counts = Counter()
+
+    # -- 기여분 --
+    def _contribution(self, fields: dict):
+        ptype = _text(fields.get("부동산 유형")) or _UNKNOWN
+        date = _text(fields.get("날짜"))[:10] or None
+        price = _num(fields.get("매매가"))
+        age = _num(fields.get("건물 연식"))
+        ratings = tuple(_text(fields.get(k)) for k in self.rating_keys)
+        return ptype, date, price, None if age is None else int(age), ratings
+
+    def _apply(self, contrib, sign: int):
+        ptype, date, price, age, ratings = contrib
+        self.type_counts[ptype] += sign
+        if price is not None:
+            lst = self.price[ptype]
+            if sign > 0:
+                bisect.insort(lst, price)
+            else:
+                del lst[bisect.bisect_left(lst, price)]
+            if age is not None:
+                cell = self.age[(ptype, age)]
+                cell[0] += sign
+                cell[1] += sign * price
+                if not cell[0]:
+                    del self.age[(ptype, age)]
+        if date:
+            self.visits[(ptype, date)] += sign
+        for key, val in zip(self.rating_keys, ratings):
+            if val:
+                self.ratings[(ptype, key, val)] += sign
+
+    @staticmethod
+    def _view_parts(contrib) -> dict:
+        # 보기별로 그림에 쓰이는 기여분 부분 (기여하지 않으면 None)
+        if contrib is None:
+            return dict.fromkeys(views)
+        ptype, date, price, age, ratings = contrib
+        return {"price_by_type": None if price is None else (ptype, price),
+                "price_by_age": None if price is None or age is None else (ptype, price, age),
+                "visits": (ptype, date) if date else None,
+                "ratings": (ptype, ratings) if any(ratings) else None}
+
+    def _touch(self, old, new):
+        before, after = self._view_parts(old), self._view_parts(new)
+        for view in views:
+            if before[view] != after[view]:
+                self._view_versions[view] = next(self._tick)
+
+    def _upsert(self, rid, fields: dict, touch: bool = True):
+        old = self._rows.pop(rid, None)
+        if old is not None:
+            self._apply(old, -1)
+            fields = {**self._fields[rid], **fields}
+        contrib = self._contribution(fields)
+        self._rows[rid] = contrib
+        self._fields[rid] = {k: fields.get(k) for k in ("부동산 유형", "날짜", "매매가", "건물 연식",
+                                                        *self.rating_keys)}
+        self._apply(contrib, +1)
+        if touch:
+            self._touch(old, contrib)
+
+    def _delete(self, rid):
+        old = self._rows.pop(rid, None)
+        if old is not None:
+            self._apply(old, -1)
+            del self._fields[rid]
+            self._touch(old, None)
+
+    # -- 동기화 --
+    def _on_change(self, before, after, events):
+        with self._lock:
+            if self.version is None or self.version != before:
+                self.version = None  # 놓친 변경이 있으므로 다음 조회 때 전체를 다시 읽음
+                return
+            for op, rid, fields in events:
+                if op == "delete":
+                    self._delete(rid)
+                else:
+                    self._upsert(rid, fields or {})
+            self.version = after
+
+    def refresh(self):
+        # 저장소 버전과 다르면(최초/다른 프로세스의 쓰기) 전체를 한 번 다시 집계
+        ver = self.store.version()
+        with self._lock:
+            if ver == self.version:
+                return ver
+        ver, df = snapshot(self.store)  # 저장소 잠금은 집계 잠금 밖에서
+        with self._lock:
+            if ver == self.version:  # 그사이 통지로 이미 따라잡음
+                return ver
+            self._reset()
+            cols = [c for c in ("부동산 유형", "날짜", "매매가", "건물 연식", *self.rating_keys) if c in df.columns]
+            for rid, rec in zip(df.index.tolist(), df[cols].to_dict("records")):
+                self._upsert(rid, rec, touch=False)
+            for view in views:
+                self._view_versions[view] = next(self._tick)
+            self.version = ver
+            return ver
+
+    def view_version(self, view: str):
+        """보기의 그림이 바뀔 때만 달라지는 버전 (그림 캐시 키)."""
+        with self._lock:
+            return self._token, self._view_versions[view]
+
+    # -- 조회 --
+    def types(self) -> list:
+        with self._lock:
+            return sorted(t for t, n in self.type_counts.items() if n > 0)
+
+    def price_stats(self, types=None) -> list:
+        # matplotlib Axes.bxp 입력 형식 (이상치는 그리지 않음)
+        out = []
+        with self._lock:
+            for t in types or self.types():
+                lst = self.price.get(t)
+                if not lst:
+                    continue
+                q1, med, q3 = (_quantile(lst, q) for q in (0.25, 0.5, 0.75))
+                iqr = q3 - q1
+                lo = lst[bisect.bisect_left(lst, q1 - 1.5 * iqr)]
+                hi = lst[bisect.bisect_right(lst, q3 + 1.5 * iqr) - 1]
+                out.append({"label": f"{t}\n(n={len(lst)})", "med": med, "q1": q1, "q3": q3,
+                            "whislo": lo, "whishi": hi, "fliers": []})
+        return out
+
+    def age_price(self, types=None) -> pd.DataFrame:
+        with self._lock:
+            rows = [(t, a, n, s) for (t, a), (n, s) in self.age.items() if n > 0 and (not types or t in types)]
+        df = pd.DataFrame(rows, columns=["부동산 유형", "건물 연식", "건수", "합계"])
+        df["평균 매매가"] = df["합계"] / df["건수"]
+        return df.drop(columns="합계").sort_values(["부동산 유형", "건물 연식"])
+
+    def visit_series(self, types=None, freq: str = "M") -> pd.Series:
+        with self._lock:
+            items = [(d, n) for (t, d), n in self.visits.items() if n > 0 and (not types or t in types)]
+        if not items:
+            return pd.Series(dtype="int64")
+        s = pd.Series([n for _, n in items], index=pd.to_datetime([d for d, _ in items], errors="coerce"))
+        s = s[s.index.notna()]
+        return s.groupby(s.index.to_period(freq)).sum().sort_index()
+
+    def rating_counts(self, types=None) -> pd.DataFrame:
+        with self._lock:
+            rows = [(k, v, n) for (t, k, v), n in self.ratings.items() if n > 0 and (not types or t in types)]
+        df = pd.DataFrame(rows, columns=["항목", "평가", "건수"])
+        return df.groupby(["항목", "평가"], as_index=False)["건수"].sum()
+
+
+def _quantile(lst: list, q: float) -> float:
+    # 정렬 리스트의 선형 보간 분위수 (numpy 기본 방식과 동일)
+    pos = (len(lst) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(lst) - 1)
+    return lst[lo] + (lst[hi] - lst[lo]) * (pos - lo)
+
+
+# ---- 그림 그리기 ----
+# 집계 결과만으로 그리므로 그리는 비용은 레코드 수가 아니라 범주 수에 비례합니다.
+# 결과는 PNG 바이트로 반환해 호출 측에서 (데이터 버전, 필터)별로 캐시할 수 있습니다.
+
+views = {
+    "price_by_type": "유형별 매매가 분포",
+    "price_by_age": "건물 연식별 평균 매매가",
+    "visits": "방문 추이",
+    "ratings": "평가 항목 분포",
+}
+
+_KOREAN_FONTS = ["NanumGothic", "Malgun Gothic", "AppleGothic", "Noto Sans CJK KR", "Noto Sans KR"]
+_style_ready = False
+
+
+def _setup_style():
+    global _style_ready
+    if _style_ready:
+        return
+    import matplotlib
+    matplotlib.use("Agg")
+    import seaborn as sns
+    from matplotlib import font_manager
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    font = next((f for f in _KOREAN_FONTS if f in installed), None)
+    sns.set_theme(style="whitegrid", font=font or "sans-serif", rc={"axes.unicode_minus": False})
+    _style_ready = True
+
+
+def render(agg: RecordAggregates, view: str, types=None, freq: str = "M") -> bytes:
+    _setup_style()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(8, 4.5))
+    try:
+        empty = False
+        if view == "price_by_type":
+            stats = agg.price_stats(types)
+            if stats:
+                ax.bxp(stats, showfliers=False, patch_artist=True,
+                       boxprops={"facecolor": sns.color_palette()[0], "alpha": 0.6})
+                ax.set_ylabel("매매가(만원)")
+            empty = not stats
+        elif view == "price_by_age":
+            df = agg.age_price(types)
+            if len(df):
+                sns.scatterplot(data=df, x="건물 연식", y="평균 매매가", hue="부동산 유형", size="건수",
+                                sizes=(20, 300), ax=ax)
+                ax.set_ylabel("평균 매매가(만원)")
+            empty = not len(df)
+        elif view == "visits":
+            s = agg.visit_series(types, freq)
+            if len(s):
+                ax.plot(s.index.to_timestamp(), s.to_numpy(), marker="o")
+                ax.set_ylabel("방문 수")
+                fig.autofmt_xdate()
+            empty = not len(s)
+        elif view == "ratings":
+            df = agg.rating_counts(types)
+            if len(df):
+                order = [k for k in agg.rating_keys if k in set(df["항목"])]
+                levels = [v for v in agg.rating_levels if v in set(df["평가"])]
+                sns.barplot(data=df, y="항목", x="건수", hue="평가", order=order, hue_order=levels, ax=ax)
+            empty = not len(df)
+        else:
+            raise ValueError(f"알 수 없는 보기: {view}")
+        if empty:
+            ax.text(0.5, 0.5, "표시할 데이터가 없습니다", ha="center", va="center", transform=ax.transAxes)
+            ax.set_axis_off()
+        ax.set_title(views[view])
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=110)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
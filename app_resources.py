@@ -0,0 +1,69 @@
+import os
+
+import streamlit as st
+
+from analytics import RecordAggregates
+from autocomplete import Autocomplete
+from profiling import Profiler
+from property_resolution import PropertyIndex
+from record_export import Exporter
+from record_history import RecordHistory
+from record_store import open_store
+from record_writer import WriteBehindQueue
+
+# ---- 앱 공용 리소스 ----
+# 여러 페이지(입력 화면, 분석 대시보드)가 같은 저장소 인스턴스를 써야 쓰기 통지와 캐시가 공유되므로
+# 프로세스당 한 번 만드는 리소스는 이 모듈에 모읍니다.
+# 기본은 SQLite(WAL) 저장소이며, RECORD_STORE_BACKEND=csv 로 CSV 단일 파일 저장소를 쓸 수 있습니다.
+# csv_file은 CSV 내보내기(다운로드) 파일 이름 및 최초 1회 가져오기 대상으로 사용합니다.
+csv_file = "real_estate_records.csv"
+
+
+@st.cache_resource
+def get_store():
+    return open_store(legacy_csv=csv_file)
+
+
+@st.cache_resource
+def get_writer():
+    # 모든 세션의 저장 요청을 하나의 백그라운드 쓰기 스레드로 모아 배치 처리
+    # (요청마다 세션 id를 붙여 변경 이력에 남기므로 되돌리기는 그 세션의 변경만 대상으로 함)
+    return WriteBehindQueue(get_store(), context=get_history().acting_as)
+
+
+@st.cache_resource
+def get_aggregates():
+    # 저장소 변경 통지로 증분 유지되는 분석 집계
+    return RecordAggregates(get_store())
+
+
+@st.cache_resource
+def get_autocomplete():
+    # 아파트 이름/주소 입력 추천 (저장소 변경 통지로 증분 유지)
+    return Autocomplete(get_store())
+
+
+@st.cache_resource
+def get_properties():
+    # 같은 건물 기록 묶음(매물)과 방문 이력 (저장소 변경 통지로 증분 유지)
+    return PropertyIndex(get_store())
+
+
+@st.cache_resource
+def get_history():
+    # 변경 이력(항목별 변경분) — 특정 시점 조회와 되돌리기에 사용
+    return RecordHistory(get_store())
+
+
+@st.cache_resource
+def get_exporter():
+    # 필터 결과 내보내기 파일 (데이터 버전·필터별 캐시)
+    return Exporter(get_store())
+
+
+@st.cache_resource
+def get_profiler():
+    # 재실행 구간별 시간/처리량 지표 (RECORD_APP_PROFILE_LOG: 런마다 JSON 한 줄,
+    # RECORD_APP_METRICS_FILE: Prometheus 텍스트 파일을 주기적으로 갱신)
+    return Profiler(log_path=os.environ.get("RECORD_APP_PROFILE_LOG"),
+                    metrics_path=os.environ.get("RECORD_APP_METRICS_FILE"))
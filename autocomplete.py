@@ -0,0 +1,307 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from record_store import snapshot
+
+# ---- 입력 자동완성 ----
+# 저장된 기록의 아파트 이름/주소로 접두어 색인(정렬 리스트 + bisect)을 만들어 입력 중 추천을 제공합니다.
+#   - 공백을 무시하고 대소문자를 구분하지 않으며, 단어 시작 위치에서도 맞춥니다 ("퍼스" -> "래미안 퍼스티지")
+#   - 초성 검색: "ㄹㅁㅇ", "래ㅁㅇ" 처럼 초성이 섞인 입력은 초성 색인으로 찾은 뒤 완성 글자 위치만 다시 확인
+#   - 순위: 방문 횟수 -> 최근 방문일
+# 저장소 변경 통지(subscribe)로 추가/수정/삭제를 증분 반영하므로 전체 재구성은 처음 한 번과
+# 다른 프로세스가 쓴 경우(버전 불일치)에만 수행합니다.
+# 자주 쓰는 짧은 접두어는 상위 결과를 캐시해 두고 저장 시 제자리에서 갱신하므로, 범위가 넓은 질의도 빠릅니다.
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHO_SET = frozenset(CHOSEONG)
+
+suggest_columns = ["아파트 이름", "주소"]
+# 추천을 고르면 가장 최근 방문 기록에서 함께 채울 (잘 바뀌지 않는) 항목
+prefill_columns = ["주소", "부동산 유형", "건물 연식"]
+_tracked = ["날짜", *dict.fromkeys(suggest_columns + prefill_columns)]
+
+CACHE_K = 20  # 캐시에 보관할 질의별 상위 항목 수 (suggest의 limit 상한)
+CACHE_SIZE = 512
+_BATCH_CLEAR = 64  # 한 번에 이보다 많이 바뀌면(대량 가져오기 등) 캐시를 제자리 갱신 대신 비움
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_key(text) -> str:
+    return _SPACE_RE.sub("", str(text)).casefold()
+
+
+_CHO_TABLE = {0xAC00 + i: CHOSEONG[i // 588] for i in range(11172)}
+SCAN_LIMIT = 3000  # 접두어 범위가 이보다 넓으면 범위를 모으는 대신 순위 순으로 훑어 상위 항목을 찾음
+
+
+def choseong(text: str) -> str:
+    # 완성형 한글 음절만 초성으로 바꿈 (길이 보존)
+    return text.translate(_CHO_TABLE)
+
+
+def _clean(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if hasattr(v, "item"):  # numpy 스칼라 -> 파이썬 값
+        v = v.item()
+        if isinstance(v, float) and v != v:
+            return None
+    if isinstance(v, str):
+        v = v.strip()
+        return v or None
+    return v
+
+
+def _clean_column(s: pd.Series) -> list:
+    # _clean의 열 단위 버전 (전체 재색인용)
+    if pd.api.types.is_numeric_dtype(s):
+        return [None if v != v else v for v in s.astype(object).where(s.notna(), None).tolist()]
+    text = s.astype(object).where(s.notna(), "").astype(str).str.strip()
+    return text.where(text != "", None).tolist()
+
+
+class _FieldIndex:
+    # 한 항목(아파트 이름 또는 주소)의 접두어 색인
+    def __init__(self):
+        self.visits = {}  # term -> {id: 날짜}
+        self.latest = {}  # term -> (날짜, id)
+        self.keys = {}  # term -> 색인 키 목록 (전체 + 단어 시작 위치)
+        self.plain = []  # 정렬 리스트 [(키, term)]
+        self.cho = []  # 정렬 리스트 [(초성 키, 키, term)]
+        self.order = []  # 순위 오름차순 정렬 리스트 [(방문 수, 최근 날짜, 최근 id, term)]
+        self.cache = OrderedDict()  # 질의 -> 상위 term 목록 (순위 내림차순)
+
+    def rank(self, term):
+        return len(self.visits[term]), self.latest[term]
+
+    def _entry(self, term):
+        date, rid = self.latest[term]
+        return len(self.visits[term]), date, rid, term
+
+    def _unorder(self, term):
+        del self.order[bisect.bisect_left(self.order, self._entry(term))]
+
+    @staticmethod
+    def index_keys(text: str) -> list:
+        words = text.casefold().split()
+        return list(dict.fromkeys("".join(words[i:]) for i in range(len(words))))
+
+    def add(self, term, text: str, rid, date: str):
+        visits = self.visits.get(term)
+        if visits is None:
+            visits = self.visits[term] = {}
+            keys = self.keys[term] = self.index_keys(text)
+            for k in keys:
+                bisect.insort(self.plain, (k, term))
+                bisect.insort(self.cho, (choseong(k), k, term))
+        else:
+            self._unorder(term)
+        visits[rid] = date
+        mark = (date, rid)
+        if term not in self.latest or mark > self.latest[term]:
+            self.latest[term] = mark
+        bisect.insort(self.order, self._entry(term))
+
+    def remove(self, term, rid):
+        visits = self.visits.get(term)
+        if visits is None or rid not in visits:
+            return
+        self._unorder(term)
+        date = visits.pop(rid)
+        if not visits:
+            del self.visits[term], self.latest[term]
+            for k in self.keys.pop(term):
+                del self.plain[bisect.bisect_left(self.plain, (k, term))]
+                del self.cho[bisect.bisect_left(self.cho, (choseong(k), k, term))]
+            return
+        if self.latest[term] == (date, rid):
+            self.latest[term] = max((d, r) for r, d in visits.items())
+        bisect.insort(self.order, self._entry(term))
+
+    def rebuild(self, terms: list, texts: list, rids: list, dates: list):
+        # 전체 재색인: 값이 있는 (term, 원문, id, 날짜) 목록으로 한 번에 구성
+        self.__init__()
+        visits, latest, keys = self.visits, self.latest, self.keys
+        for term, text, rid, date in zip(terms, texts, rids, dates):
+            v = visits.get(term)
+            if v is None:
+                v = visits[term] = {}
+                keys[term] = self.index_keys(text)
+            v[rid] = date
+            mark = (date, rid)
+            if term not in latest or mark > latest[term]:
+                latest[term] = mark
+        self.plain = sorted((k, t) for t, ks in keys.items() for k in ks)
+        self.cho = sorted((choseong(k), k, t) for k, t in self.plain)
+        self.order = sorted(self._entry(t) for t in visits)
+
+    # -- 질의 --
+    def matches(self, term, q: str) -> bool:
+        if any(ch in _CHO_SET for ch in q):
+            probe = choseong(q)
+            return any(choseong(k).startswith(probe) and all(k[i] == ch for i, ch in enumerate(q) if ch not in _CHO_SET)
+                       for k in self.keys[term])
+        return any(k.startswith(q) for k in self.keys[term])
+
+    def _search(self, q: str) -> list:
+        # 좁은 범위: 접두어 범위의 term을 모아 상위 k개 선택
+        # 넓은 범위: 순위가 높은 term부터 훑으며 맞는 것 k개 (맞는 비율이 높아 금방 끝남)
+        cho_mode = any(ch in _CHO_SET for ch in q)
+        lst, probe = (self.cho, choseong(q)) if cho_mode else (self.plain, q)
+        lo = bisect.bisect_left(lst, (probe,))
+        hi = bisect.bisect_left(lst, (probe + "\uffff",))
+        if hi - lo > SCAN_LIMIT:
+            out = []
+            for entry in reversed(self.order):
+                if self.matches(entry[3], q):
+                    out.append(entry[3])
+                    if len(out) >= CACHE_K:
+                        break
+            return out
+        if cho_mode:
+            fixed = [(i, ch) for i, ch in enumerate(q) if ch not in _CHO_SET]
+            cand = {t for _, k, t in lst[lo:hi] if all(k[i] == ch for i, ch in fixed)}
+        else:
+            cand = {t for _, t in lst[lo:hi]}
+        return heapq.nlargest(CACHE_K, cand, key=self.rank)
+
+    def top(self, q: str) -> list:
+        hit = self.cache.get(q)
+        if hit is not None:
+            self.cache.move_to_end(q)
+            return hit
+        top = self.cache[q] = self._search(q)
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return top
+
+    # -- 캐시 제자리 갱신 --
+    def raised(self, term):
+        # term의 순위가 올라감(방문 추가): 해당 term과 맞는 캐시 목록에 끼워 넣음
+        r = self.rank(term)
+        for q, top in self.cache.items():
+            if term in top:
+                top.remove(term)
+            elif len(top) >= CACHE_K and r <= self.rank(top[-1]):
+                continue
+            elif not self.matches(term, q):
+                continue
+            pos = next((i for i, t in enumerate(top) if self.rank(t) < r), len(top))
+            top.insert(pos, term)
+            del top[CACHE_K:]
+
+    def lowered(self, term):
+        # 순위가 내려가거나 사라진 term이 들어 있는 캐시 목록은 다음 조회 때 다시 계산
+        for q in [q for q, top in self.cache.items() if term in top]:
+            del self.cache[q]
+
+
+class Autocomplete:
+    def __init__(self, store, columns=None):
+        self.store = store
+        self.columns = list(columns or suggest_columns)
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset()
+        store.subscribe(self._on_change)
+
+    def _reset(self):
+        self._rows = {}  # id -> 추적 항목 값
+        self._fields = {c: _FieldIndex() for c in self.columns}
+
+    def _upsert(self, rid, fields: dict):
+        old = self._rows.get(rid)
+        row = {**old} if old else {}
+        row.update({k: _clean(fields[k]) for k in _tracked if k in fields})
+        self._rows[rid] = row
+        date = str(row.get("날짜") or "")[:10]
+        for col, idx in self._fields.items():
+            old_term = normalize_key(old[col]) if old and old.get(col) else None
+            new_term = normalize_key(row[col]) if row.get(col) else None
+            old_date = str(old.get("날짜") or "")[:10] if old else None
+            if old_term == new_term and old_date == date:
+                continue
+            if old_term:
+                idx.remove(old_term, rid)
+                idx.lowered(old_term)
+            if new_term:
+                idx.add(new_term, str(row[col]), rid, date)
+                idx.raised(new_term)
+
+    def _delete(self, rid):
+        old = self._rows.pop(rid, None)
+        if old is None:
+            return
+        for col, idx in self._fields.items():
+            if old.get(col):
+                term = normalize_key(old[col])
+                idx.remove(term, rid)
+                idx.lowered(term)
+
+    # -- 동기화 --
+    def _on_change(self, before, after, events):
+        with self._lock:
+            if self.version is None or self.version != before:
+                self.version = None  # 놓친 변경이 있으므로 다음 조회 때 전체를 다시 읽음
+                return
+            if len(events) > _BATCH_CLEAR:
+                for idx in self._fields.values():
+                    idx.cache.clear()
+            for op, rid, fields in events:
+                if op == "delete":
+                    self._delete(rid)
+                else:
+                    self._upsert(rid, fields or {})
+            self.version = after
+
+    def refresh(self):
+        # 저장소 버전과 다르면(최초/다른 프로세스의 쓰기) 전체를 한 번 다시 색인
+        ver = self.store.version()
+        with self._lock:
+            if ver == self.version:
+                return ver
+        ver, df = snapshot(self.store)  # 저장소 잠금은 색인 잠금 밖에서
+        with self._lock:
+            if ver == self.version:  # 그사이 통지로 이미 따라잡음
+                return ver
+            self._reset()
+            cols = [c for c in _tracked if c in df.columns]
+            rids = df.index.tolist()
+            values = {c: _clean_column(df[c]) for c in cols}
+            self._rows = {rid: dict(zip(cols, vals)) for rid, vals in zip(rids, zip(*values.values()))}
+            dates = [str(d or "")[:10] for d in values.get("날짜", [None] * len(rids))]
+            for col, idx in self._fields.items():
+                if col not in values:
+                    continue
+                have = [i for i, v in enumerate(values[col]) if v is not None]
+                texts = [str(values[col][i]) for i in have]
+                # 같은 원문은 정규화 결과도 같으므로 고유값만 변환
+                term_of = {t: normalize_key(t) for t in set(texts)}
+                idx.rebuild([term_of[t] for t in texts], texts, [rids[i] for i in have], [dates[i] for i in have])
+            self.version = ver
+            return ver
+
+    # -- 조회 --
+    def suggest(self, column: str, text: str, limit: int = 5) -> list:
+        """입력 중인 text에 맞는 추천 목록 (방문 횟수 -> 최근 방문 순).
+
+        각 항목은 {"value", "count", "last_visit", "prefill"}이며, prefill은 가장 최근 방문 기록의
+        주소/부동산 유형/건물 연식 중 값이 있는 항목입니다 (추천 대상 항목 자신은 제외).
+        """
+        idx = self._fields[column]
+        q = normalize_key(text or "")
+        with self._lock:
+            out = []
+            for term in idx.top(q)[:min(limit, CACHE_K)]:
+                date, rid = idx.latest[term]
+                row = self._rows[rid]
+                prefill = {k: row[k] for k in prefill_columns if k != column and row.get(k) is not None}
+                out.append({"value": row[column], "count": len(idx.visits[term]),
+                            "last_visit": date or None, "prefill": prefill})
+            return out
@@ -0,0 +1,187 @@
+import argparse
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from form_model import load_form  # noqa: E402
+from normalize import normalize_frame  # noqa: E402
+from record_store import csv_columns, open_store, store_columns  # noqa: E402
+
+# ---- 벤치마크용 합성 임장 기록 ----
+# 같은 시드면 항상 같은 데이터를 만듭니다. 건물(매물) 풀을 먼저 만들고 방문 기록을 그 풀에서 뽑으므로
+# 자주 가는 단지가 여러 번 기록되고(자동완성/매물 묶음에 현실적인 부하), 선택 항목은 form_schema.json의
+# 선택지에서, 토지는 건물 관련 항목을 비워 둡니다(가시성 규칙과 같음).
+#
+#   python -m bench.datagen 100000 --backend sqlite --path /tmp/bench.db
+#   python -m bench.datagen 10000 --csv sample.csv
+
+CHUNK = 50_000  # 저장소에 한 번에 넣는 행 수
+
+_BRANDS = ["래미안", "자이", "힐스테이트", "푸르지오", "e편한세상", "롯데캐슬", "아이파크", "더샵", "SK뷰",
+           "센트레빌", "한신", "현대", "삼성", "우성", "쌍용", "벽산", "두산위브", "호반베르디움"]
+_REGIONS = [
+    ("서울특별시", "강남구", ["역삼동", "대치동", "개포동", "삼성동", "도곡동"], ["테헤란로", "삼성로", "도곡로"]),
+    ("서울특별시", "송파구", ["잠실동", "가락동", "문정동", "방이동"], ["올림픽로", "송파대로", "백제고분로"]),
+    ("서울특별시", "마포구", ["아현동", "공덕동", "상암동", "망원동"], ["마포대로", "월드컵북로", "독막로"]),
+    ("서울특별시", "노원구", ["상계동", "중계동", "하계동", "월계동"], ["동일로", "노원로", "한글비석로"]),
+    ("서울특별시", "양천구", ["목동", "신정동", "신월동"], ["목동동로", "목동서로", "오목로"]),
+    ("경기도", "성남시 분당구", ["정자동", "서현동", "수내동", "야탑동"], ["불정로", "황새울로", "판교로"]),
+    ("경기도", "수원시 영통구", ["영통동", "매탄동", "원천동"], ["봉영로", "매탄로", "광교호수로"]),
+    ("경기도", "고양시 일산동구", ["장항동", "마두동", "백석동"], ["중앙로", "일산로", "강송로"]),
+    ("인천광역시", "연수구", ["송도동", "연수동", "옥련동"], ["컨벤시아대로", "송도과학로", "원인재로"]),
+    ("부산광역시", "해운대구", ["우동", "중동", "좌동", "재송동"], ["해운대로", "센텀중앙로", "달맞이길"]),
+    ("대구광역시", "수성구", ["범어동", "만촌동", "황금동"], ["달구벌대로", "동대구로", "청수로"]),
+    ("대전광역시", "유성구", ["봉명동", "도룡동", "노은동"], ["대학로", "유성대로", "엑스포로"]),
+]
+_TYPE_WEIGHTS = {"아파트": 0.55, "오피스텔": 0.15, "빌라": 0.12, "주택": 0.06, "상가": 0.06, "토지": 0.03, "기타": 0.03}
+_BASE_PRICE = {"아파트": 90000, "오피스텔": 25000, "빌라": 30000, "주택": 60000, "상가": 50000, "토지": 40000,
+               "기타": 20000}  # 만원
+_AREAS = ["33m²", "49m²", "59m²", "74m²", "84m²", "84A", "101m²", "114m²", "25평", "34평"]
+_HOPES = ["GTX 예정", "재건축 추진", "신규 역세권", "재개발 구역 지정", "학군 우수", "대형 쇼핑몰 개장"]
+_COMMENTS = ["채광 좋음", "주차 불편", "역까지 도보 7분", "관리 상태 양호", "소음 있음", "전세가율 높음",
+             "리모델링 필요", "단지 내 상가 편리", "경사로 있음", "학교 가까움"]
+_SCALE_P = [0.15, 0.35, 0.3, 0.12, 0.08]  # 매우 좋음 … 모름
+_BLANK_P = 0.1  # 선택 항목을 비워 두는 비율
+
+
+def _pick(rng, options, n, p=None, blank=_BLANK_P):
+    out = np.asarray(options, dtype=object)[rng.choice(len(options), size=n, p=p)]
+    out[rng.random(n) < blank] = ""
+    return out
+
+
+def _properties(rng, n: int) -> pd.DataFrame:
+    types = np.asarray(list(_TYPE_WEIGHTS), dtype=object)[
+        rng.choice(len(_TYPE_WEIGHTS), size=n, p=list(_TYPE_WEIGHTS.values()))]
+    region = rng.integers(len(_REGIONS), size=n)
+    names, addrs = [], []
+    dong_i, road_i = rng.integers(1 << 16, size=n), rng.integers(1 << 16, size=n)
+    brand_i, block = rng.integers(len(_BRANDS), size=n), rng.integers(1, 9, size=n)
+    main_no, sub_no = rng.integers(1, 1500, size=n), rng.integers(0, 60, size=n)
+    road_form = rng.random(n) < 0.5
+    for i in range(n):
+        sido, gu, dongs, roads = _REGIONS[region[i]]
+        dong, road = dongs[dong_i[i] % len(dongs)], roads[road_i[i] % len(roads)]
+        place = dong.removesuffix("동")
+        t = types[i]
+        if t in ("아파트", "오피스텔"):
+            names.append(f"{place} {_BRANDS[brand_i[i]]}" + (f" {block[i]}단지" if block[i] > 4 else ""))
+        elif t == "빌라":
+            names.append(f"{place}{['하우스', '빌', '파크빌', '캐슬'][block[i] % 4]} {block[i]}차")
+        elif t == "상가":
+            names.append(f"{place} {['프라자', '타워', '빌딩'][block[i] % 3]}")
+        else:
+            names.append(f"{dong} {main_no[i]}번지 {t}")
+        if road_form[i]:
+            addrs.append(f"{sido} {gu} {road} {main_no[i] % 400 + 1}")
+        else:
+            addrs.append(f"{sido} {gu} {dong} {main_no[i]}" + (f"-{sub_no[i]}" if sub_no[i] else ""))
+    base = np.array([_BASE_PRICE[t] for t in types], dtype=float) * rng.lognormal(0, 0.35, size=n)
+    built = rng.integers(0, 45, size=n).astype(float)
+    floors = np.where(np.isin(types, ["아파트", "오피스텔"]), rng.integers(5, 50, size=n), rng.integers(1, 6, size=n))
+    return pd.DataFrame({"아파트 이름": names, "주소": addrs, "부동산 유형": types, "base": base,
+                         "건물 연식": built, "층수": floors.astype(float)})
+
+
+def generate(n: int, seed: int = 0, owners: int = 5) -> pd.DataFrame:
+    """n건의 합성 기록 (csv_columns 순서, 분할 저장소용 '작성자' 열 포함)."""
+    rng = np.random.default_rng(seed)
+    props = _properties(rng, max(20, n // 4))
+    # 방문 분포: 일부 단지에 방문이 몰리도록 Zipf 비슷한 가중치
+    w = 1 / np.arange(1, len(props) + 1) ** 0.8
+    pick = rng.choice(len(props), size=n, p=w / w.sum())
+    df = props.iloc[pick].reset_index(drop=True)
+    types = df["부동산 유형"].to_numpy()
+    land = types == "토지"
+
+    days = rng.integers(0, 7 * 365, size=n)
+    dates = pd.Timestamp("2019-01-01") + pd.to_timedelta(days, unit="D")
+    years = days / 365
+    # 연 3% 상승 + 방문별 잡음, 100만원 단위
+    price = np.round(df["base"].to_numpy() * (1.03 ** years) * rng.normal(1, 0.05, size=n) / 100) * 100
+    yield_lo = rng.integers(2, 7, size=n)
+    has_rent = (rng.random(n) < 0.4) & ~land
+    rent = np.where(has_rent, np.round(price * (yield_lo + 0.5) / 100 / 12), np.nan)
+    fee = np.where(~land & (rng.random(n) < 0.7), rng.integers(5, 45, size=n), np.nan)
+
+    form = load_form()
+    opts = form.option_sets
+    out = pd.DataFrame({
+        "날짜": dates.strftime("%Y-%m-%d"),
+        "아파트 이름": df["아파트 이름"],
+        "주소": df["주소"],
+        "관심 평형": np.where(np.isin(types, ["아파트", "오피스텔", "빌라"]), _pick(rng, _AREAS, n), ""),
+        "부동산 유형": types,
+        "건물 연식": np.where(land, np.nan, df["건물 연식"] + np.floor(years)),
+        "층수": np.where(land, np.nan, rng.integers(1, 50, size=n) % df["층수"].to_numpy() + 1),
+        "매매가": price,
+        "월세": rent,
+        "관리비": fee,
+        "예상 수익률": np.where(rng.random(n) < 0.6, [f"{a}~{a + 1}%" for a in yield_lo], ""),
+        "개발 호재": _pick(rng, _HOPES, n, blank=0.6),
+        "개인 코멘트": _pick(rng, _COMMENTS, n, blank=0.3),
+    })
+    # 선택 항목은 스키마의 선택지에서 (토지는 건물 상태 항목이 숨겨지므로 비움)
+    for q in form.questions:
+        key = q["key"]
+        if q["type"] != "select" or key == "부동산 유형":
+            continue
+        options = q["options"]
+        p = _SCALE_P if options == opts.get("scale") else None
+        col = _pick(rng, options, n, p=p)
+        if q.get("visible_if", {}).get("exclude") == ["토지"]:
+            col[land] = ""
+        out[key] = col
+    out = out.reindex(columns=csv_columns)
+    out["작성자"] = np.asarray([f"user{i + 1}" for i in range(owners)], dtype=object)[rng.integers(owners, size=n)]
+    return out
+
+
+def build_store(backend: str, path: str, n: int, seed: int = 0):
+    """path에 n건짜리 저장소를 만들어 반환합니다 (기존 파일은 지움)."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    df = generate(n, seed)
+    if backend == "csv":
+        # CSV 저장소 파일은 id 열 + 저장 열(파생 열 포함) 그대로이므로 정규화 후 한 번에 씀
+        df = normalize_frame(df).reindex(columns=store_columns)
+        df.index = pd.RangeIndex(1, n + 1, name="id")
+        df.to_csv(path, encoding="utf-8-sig")
+        return open_store("csv", path, legacy_csv=None)
+    store = open_store(backend, path, legacy_csv=None)
+    if not getattr(store, "owner_column", None):
+        df = df.drop(columns=["작성자"])
+    records = df.to_dict("records")
+    for i in range(0, n, CHUNK):
+        store.insert_many(records[i:i + CHUNK])
+    return store
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="벤치마크용 합성 임장 기록 생성")
+    p.add_argument("rows", type=int)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--backend", default="sqlite", help="sqlite / csv / partitioned")
+    p.add_argument("--path", help="저장소 경로 (기본: bench_<rows>.<db|csv|디렉터리>)")
+    p.add_argument("--csv", help="저장소 대신 일반 CSV 파일로 내보내기")
+    args = p.parse_args(argv)
+    if args.csv:
+        generate(args.rows, args.seed).to_csv(args.csv, index=False, encoding="utf-8-sig")
+        return 0
+    path = args.path or f"bench_{args.rows}" + {"sqlite": ".db", "csv": ".csv"}.get(args.backend, "")
+    store = build_store(args.backend, path, args.rows, args.seed)
+    print(f"{path}: {store.count()}건")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
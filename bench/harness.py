@@ -0,0 +1,327 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# ---- 헤드리스 앱 벤치마크 ----
+# 데이터 크기별로 합성 저장소(bench.datagen)를 만들고, Streamlit 앱 테스트 API(AppTest)로 streamlit_app.py를
+# 브라우저 없이 실행하며 사용자 동작별 재실행 시간을 잽니다. 크기마다 별도 프로세스에서 돌려
+# 프로세스 최대 메모리(RSS)가 크기별로 분리되고, 동작별 최대 메모리는 마지막 1회를 tracemalloc으로 측정합니다.
+# 결과는 JSON으로 남기고, 기준 결과(baseline)가 있으면 p95 지연/메모리가 허용치를 넘은 항목을 회귀로 표시합니다.
+#
+#   python -m bench.harness --sizes 1k,10k,100k                # 측정 + bench/baseline.json과 비교
+#   python -m bench.harness --sizes 1k,10k --save-baseline     # 결과를 기준으로 저장
+#   python -m bench.harness --sizes 1m --backend partitioned --repeat 3
+#
+# 생성한 저장소는 bench/.data/에 (백엔드, 크기, 시드)별로 보관해 다음 실행에서 재사용합니다.
+
+DATA_DIR = os.path.join(ROOT, "bench", ".data")
+APP = os.path.join(ROOT, "streamlit_app.py")
+BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+TIMEOUT = 600  # AppTest 한 번 실행 제한 (1M 건 첫 실행 포함)
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * mult)
+
+
+def percentile(samples, q: float) -> float:
+    return float(np.percentile(samples, q)) if len(samples) else float("nan")
+
+
+# ---- 동작 정의 ----
+# 각 동작은 (준비, 실행) 함수 쌍이며 실행 쪽만 잽니다. 준비는 필요한 화면 상태를 만들기 위한 재실행입니다.
+def _run(target):
+    # target: AppTest 또는 값을 바꾼 위젯 (위젯의 run()도 AppTest를 돌려줌)
+    at = target.run(timeout=TIMEOUT)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+
+def _button(at, label: str):
+    for b in at.button:
+        if b.label == label:
+            return b
+    raise LookupError(f"버튼을 찾지 못했습니다: {label}")
+
+
+def _prep_step(at, i):
+    _run(at.button(key="nav_0").click())  # 첫 단계(방문 날짜, 기본값 있음)로
+
+
+def _act_step(at, i):
+    _run(_button(at, "➡️ 다음").click())
+
+
+def _act_nav(at, i):
+    # 뒤쪽 단계로 건너뛰기 (반복마다 다른 단계)
+    _run(at.button(key=f"nav_{(7, 11, 19)[i % 3]}").click())
+
+
+def _act_filter(at, i):
+    box = next(t for t in at.text_input if t.label == "이름/주소 검색")
+    _run(box.input(("래미안", "강남구", "자이", "")[i % 4]))
+
+
+def _prep_save(at, i):
+    from bench.datagen import generate
+    from form_model import load_form
+    rec = {k: ("" if v != v else v) for k, v in generate(1, seed=1000 + i).iloc[0].items() if k != "작성자"}
+    at.session_state["answers"] = rec
+    at.session_state["vis_mask"] = None
+    at.session_state["step"] = len(load_form().questions)  # 완료 화면
+    _run(at)
+
+
+def _act_save(at, i):
+    _run(_button(at, "💾 CSV 저장").click())
+
+
+def _act_edit(at, i):
+    _run(_button(at, "✏️ 선택 항목 수정 로드").click())
+
+
+def _act_delete(at, i):
+    _run(_button(at, "🗑 선택 항목 삭제").click())
+
+
+class _MediaFiles:
+    # AppTest는 실행마다 미디어 파일 관리자를 새로 만들고 실행이 끝나면 놓아 버리므로,
+    # 다운로드 내용을 꺼낼 수 있도록 마지막 관리자를 붙잡아 둡니다.
+    last = None
+
+    @classmethod
+    def install(cls):
+        from streamlit.testing.v1 import app_test
+
+        class Recording(app_test.MediaFileManager):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                cls.last = self
+
+        app_test.MediaFileManager = Recording
+
+
+def _act_download(at, i):
+    # 저장 기록 영역의 내보내기 버튼 클릭 + 브라우저가 받아 갈 내용 생성/조회까지
+    btn = next(b for b in at.get("download_button") if b.key == "export_records")
+    _run(btn.click())
+    btn = next(b for b in at.get("download_button") if b.key == "export_records")
+    mgr = _MediaFiles.last
+    url = btn.proto.url or mgr.execute_deferred(btn.proto.deferred_file_id)
+    file_id = url.rsplit("/", 1)[-1].split(".")[0]
+    return len(mgr._storage.get_file(file_id).content)
+
+
+def _noop(at, i):
+    pass
+
+
+ACTIONS = [
+    ("step_next", _prep_step, _act_step),
+    ("nav_jump", _noop, _act_nav),
+    ("filter_change", _noop, _act_filter),
+    ("save", _prep_save, _act_save),
+    ("edit_load", _noop, _act_edit),
+    ("delete", _noop, _act_delete),
+    ("csv_download", _noop, _act_download),
+]
+
+
+# ---- 크기 하나 측정 (별도 프로세스) ----
+def measure(rows: int, repeat: int, warmup: int) -> list:
+    from streamlit.testing.v1 import AppTest
+    _MediaFiles.install()
+
+    def new_session():
+        return AppTest.from_file(APP, default_timeout=TIMEOUT)
+
+    # 첫 세션: 저장소 열기와 공용 리소스(집계/자동완성/이력 등) 생성이 포함된 콜드 스타트
+    t = time.perf_counter()
+    at = _run(new_session())
+    results = [_summary(rows, "startup", [(time.perf_counter() - t) * 1000], None)]
+
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        _run(new_session())
+        samples.append((time.perf_counter() - t) * 1000)
+    results.append(_summary(rows, "first_render", samples, _traced(lambda: _run(new_session()))))
+
+    for name, prep, act in ACTIONS:
+        samples = []
+        for i in range(warmup + repeat):
+            prep(at, i)
+            t = time.perf_counter()
+            act(at, i)
+            if i >= warmup:
+                samples.append((time.perf_counter() - t) * 1000)
+        i = warmup + repeat
+        prep(at, i)
+        results.append(_summary(rows, name, samples, _traced(lambda: act(at, i))))
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # 리눅스: KB
+    for r in results:
+        r["rss_peak_mb"] = round(rss, 1)
+    return results
+
+
+def _traced(fn) -> float:
+    # 한 번 실행하는 동안 파이썬 할당 최대치 (MB)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _summary(rows: int, action: str, samples: list, peak_mb: float) -> dict:
+    return {"rows": rows, "action": action, "n": len(samples),
+            "p50_ms": round(percentile(samples, 50), 2), "p95_ms": round(percentile(samples, 95), 2),
+            "mean_ms": round(float(np.mean(samples)), 2), "max_ms": round(float(np.max(samples)), 2),
+            "peak_mem_mb": None if peak_mb is None else round(peak_mb, 2)}
+
+
+# ---- 데이터 준비 / 크기별 실행 ----
+def dataset(backend: str, rows: int, seed: int) -> str:
+    ext = {"sqlite": ".db", "csv": ".csv"}.get(backend, "")
+    path = os.path.join(DATA_DIR, f"{backend}-{rows}-s{seed}{ext}")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"  데이터 생성: {rows}건 ({backend})", file=sys.stderr)
+        subprocess.run([sys.executable, "-m", "bench.datagen", str(rows), "--seed", str(seed),
+                        "--backend", backend, "--path", path], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    return path
+
+
+def _copy_store(src: str, workdir: str) -> str:
+    dst = os.path.join(workdir, os.path.basename(src))
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        for name in os.listdir(os.path.dirname(src)):  # SQLite -wal/-shm 포함
+            if name.startswith(os.path.basename(src)) and not name.endswith(".history.db"):
+                shutil.copy(os.path.join(os.path.dirname(src), name), os.path.join(workdir, name))
+    return dst
+
+
+def run_size(backend: str, rows: int, seed: int, repeat: int, warmup: int) -> list:
+    src = dataset(backend, rows, seed)
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        # 측정은 복사본에서 (저장/삭제 동작이 데이터를 바꾸므로), 앱의 상대 경로 파일도 작업 디렉터리 안에
+        env = dict(os.environ, RECORD_STORE_BACKEND=backend, RECORD_STORE_PATH=_copy_store(src, workdir),
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+        out = os.path.join(workdir, "result.json")
+        proc = subprocess.run([sys.executable, "-m", "bench.harness", "--worker", str(rows), "--repeat", str(repeat),
+                               "--warmup", str(warmup), "--out", out], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if proc.returncode:
+            raise RuntimeError(f"{rows}건 측정 실패:\n" + "\n".join(proc.stderr.splitlines()[-20:]))
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)
+
+
+# ---- 기준 비교 ----
+def compare(results: list, baseline: dict, tolerance: float, min_ms: float, min_mb: float) -> list:
+    """기준보다 p95 지연 또는 최대 메모리가 허용치 이상 늘어난 항목 목록."""
+    base = {(r["rows"], r["action"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["rows"], r["action"]))
+        if b is None:
+            continue
+        for metric, floor in (("p95_ms", min_ms), ("peak_mem_mb", min_mb), ("rss_peak_mb", min_mb)):
+            new, old = r.get(metric), b.get(metric)
+            if new is None or old is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append({"rows": r["rows"], "action": r["action"], "metric": metric,
+                                    "baseline": old, "current": new, "change_pct": round((new / old - 1) * 100, 1)})
+    return regressions
+
+
+def _print_table(results: list, regressions: list):
+    flagged = {(g["rows"], g["action"]) for g in regressions}
+    print(f"{'rows':>9} {'action':<14} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>9} {'rss MB':>8}")
+    for r in results:
+        mark = "  ⚠ 회귀" if (r["rows"], r["action"]) in flagged else ""
+        print(f"{r['rows']:>9} {r['action']:<14} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} "
+              f"{r['peak_mem_mb'] if r['peak_mem_mb'] is not None else float('nan'):>9.1f} {r['rss_peak_mb']:>8.0f}{mark}")
+    for g in regressions:
+        print(f"회귀: {g['rows']}건 {g['action']} {g['metric']} {g['baseline']} → {g['current']} "
+              f"(+{g['change_pct']}%)")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="임장 기록 앱 헤드리스 벤치마크")
+    p.add_argument("--sizes", default="1k,10k,100k", help="쉼표로 구분한 데이터 크기 (예: 1k,10k,100k,1m)")
+    p.add_argument("--backend", default="sqlite", help="sqlite / csv / partitioned")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=7, help="동작별 측정 횟수")
+    p.add_argument("--warmup", type=int, default=1, help="동작별로 버리는 첫 실행 횟수")
+    p.add_argument("--out", default="bench_results.json", help="결과 JSON 경로")
+    p.add_argument("--baseline", default=BASELINE, help="비교할 기준 결과 JSON")
+    p.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준으로 저장")
+    p.add_argument("--tolerance", type=float, default=0.25, help="허용 증가율 (0.25 = 25%%)")
+    p.add_argument("--min-ms", type=float, default=5.0, help="이보다 작은 지연 증가는 무시")
+    p.add_argument("--min-mb", type=float, default=2.0, help="이보다 작은 메모리 증가는 무시")
+    p.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.worker is not None:
+        results = measure(args.worker, args.repeat, args.warmup)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+        return 0
+
+    results = []
+    for rows in map(parse_size, args.sizes.split(",")):
+        print(f"{rows}건 측정 중...", file=sys.stderr)
+        results.extend(run_size(args.backend, rows, args.seed, args.repeat, args.warmup))
+    import pandas as pd
+    import streamlit
+    report = {
+        "meta": {"created": datetime.datetime.now().isoformat(timespec="seconds"), "backend": args.backend,
+                 "seed": args.seed, "repeat": args.repeat, "warmup": args.warmup,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "streamlit": streamlit.__version__, "pandas": pd.__version__},
+        "results": results,
+    }
+    regressions = []
+    if not args.save_baseline and os.path.isfile(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("backend") != args.backend:
+            print(f"기준 결과의 백엔드({baseline.get('meta', {}).get('backend')})가 달라 비교하지 않습니다.",
+                  file=sys.stderr)
+        else:
+            regressions = compare(results, baseline, args.tolerance, args.min_ms, args.min_mb)
+    report["regressions"] = regressions
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    _print_table(results, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
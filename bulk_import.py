@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from form_model import load_form
+from record_store import csv_columns
+
+# ---- 대량 가져오기 ----
+# 과거 임장 기록(CSV/Excel)을 청크 단위로 읽어, 입력 폼과 같은 규칙(필수 항목, 숫자/날짜 형식,
+# 선택지 포함 여부)으로 열 단위(벡터화) 검증·정규화한 뒤 기존 기록과 중복을 제거하고
+# 청크마다 한 번의 배치 쓰기(insert_many)로 저장합니다. 원본 파일 전체를 메모리에 올리지 않습니다.
+
+DEFAULT_CHUNKSIZE = 5000
+MAX_ERROR_ROWS = 10000  # 오류 보고서에 보관할 최대 행 수 (초과분은 건수만 집계)
+
+# 같은 방문으로 볼 기준 열 (정규화 후 해시)
+dedupe_columns = ["날짜", "아파트 이름", "주소", "관심 평형", "매매가"]
+
+
+def iter_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE, filename: str = None):
+    # CSV는 pandas 청크 리더, Excel은 openpyxl read-only 모드로 행을 흘려 읽습니다.
+    name = (filename or getattr(source, "name", None) or (source if isinstance(source, str) else "")).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        yield from _iter_excel(source, chunksize)
+        return
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False,
+                         encoding="utf-8-sig", skipinitialspace=True)
+    for chunk in reader:
+        yield chunk
+
+
+def _iter_excel(source, chunksize: int):
+    try:
+        import openpyxl
+    except ImportError as e:
+        raise ImportError("Excel 가져오기에는 openpyxl 패키지가 필요합니다 (pip install openpyxl).") from e
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        width = len(header)
+        buf = []
+        for row in rows:
+            # 행 길이를 헤더에 맞춤 (빈 셀은 "")
+            cells = ["" if v is None else v for v in row[:width]]
+            buf.append(cells + [""] * (width - len(cells)))
+            if len(buf) >= chunksize:
+                yield pd.DataFrame(buf, columns=header)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header)
+    finally:
+        wb.close()
+
+
+def _text(series: pd.Series) -> pd.Series:
+    s = series.astype(object).where(series.notna(), "")
+    return s.map(lambda v: v.isoformat() if hasattr(v, "isoformat") else str(v)).str.strip()
+
+
+def validate_chunk(df: pd.DataFrame, form=None, first_row: int = 1):
+    """(정규화된 레코드 DataFrame, 오류 DataFrame)을 반환합니다. 오류가 있는 행은 레코드에서 제외."""
+    form = form or load_form()
+    raw = df.reindex(columns=csv_columns)
+    out = pd.DataFrame(index=raw.index)
+    bad = pd.Series(False, index=raw.index)
+    errors = []
+    row_no = pd.Series(np.arange(first_row, first_row + len(raw)), index=raw.index)
+
+    def fail(mask: pd.Series, col: str, msg: str, values: pd.Series):
+        nonlocal bad
+        if mask.any():
+            bad |= mask
+            errors.append(pd.DataFrame({"행": row_no[mask], "항목": col, "오류": msg, "값": values[mask]}))
+
+    for col in csv_columns:
+        text = _text(raw[col])
+        empty = text == ""
+        qi = form.index_of.get(col)
+        q = form.questions[qi] if qi is not None else {"key": col, "type": "text"}
+        if q["type"] == "number":
+            num = pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce")
+            fail(~empty & num.isna(), col, "숫자가 아닙니다", text)
+            if col in form.required_keys:
+                fail(empty | (num.notna() & ~(num > 0)), col, "필수 항목(0보다 큰 값)입니다", text)
+            out[col] = num.astype(object).where(num.notna(), None)
+        elif q["type"] == "date":
+            dt = pd.to_datetime(text.where(~empty), errors="coerce", format="mixed")
+            fail(~empty & dt.isna(), col, "날짜 형식이 아닙니다", text)
+            if col in form.required_keys:
+                fail(empty, col, "필수 항목입니다", text)
+            out[col] = dt.dt.strftime("%Y-%m-%d").astype(object).where(dt.notna(), None)
+        else:
+            if q["type"] == "select":
+                fail(~empty & ~text.isin(q.get("options", [])), col, "선택지에 없는 값입니다", text)
+            if col in form.required_keys:
+                fail(empty, col, "필수 항목입니다", text)
+            out[col] = text.astype(object).where(~empty, None)
+
+    error_df = pd.concat(errors, ignore_index=True) if errors else \
+        pd.DataFrame(columns=["행", "항목", "오류", "값"])
+    return out[~bad], error_df.sort_values("행", kind="stable").reset_index(drop=True)
+
+
+def record_keys(df: pd.DataFrame) -> np.ndarray:
+    # 중복 판별용 64비트 해시 (공백/대소문자, 숫자 표기 차이를 정규화한 뒤 계산)
+    parts = []
+    for col in dedupe_columns:
+        s = df[col] if col in df.columns else pd.Series("", index=df.index)
+        if col == "매매가":
+            num = pd.to_numeric(s, errors="coerce")
+            parts.append(num.map(lambda v: "" if v != v else repr(float(v))))
+        else:
+            parts.append(s.astype(object).where(s.notna(), "").astype(str)
+                         .str.strip().str.casefold().str.replace(r"\s+", " ", regex=True))
+    key_frame = pd.concat(parts, axis=1, keys=dedupe_columns)
+    return pd.util.hash_pandas_object(key_frame, index=False).to_numpy(dtype=np.uint64)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.error_count = 0
+        self._errors = []
+        self._kept = 0
+
+    def add_errors(self, err: pd.DataFrame):
+        self.error_count += len(err)
+        room = MAX_ERROR_ROWS - self._kept
+        if room > 0 and len(err):
+            self._errors.append(err.head(room))
+            self._kept += min(room, len(err))
+
+    @property
+    def errors(self) -> pd.DataFrame:
+        if not self._errors:
+            return pd.DataFrame(columns=["행", "항목", "오류", "값"])
+        return pd.concat(self._errors, ignore_index=True)
+
+    def summary(self) -> dict:
+        return {"rows": self.rows, "inserted": self.inserted, "duplicates": self.duplicates,
+                "invalid": self.invalid, "errors": self.error_count}
+
+
+def import_records(store, source, filename: str = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                   form=None, progress=None, total_bytes: int = None, defaults: dict = None) -> ImportReport:
+    """source(경로 또는 파일 객체)를 청크 단위로 가져와 store에 저장합니다.
+
+    progress(report, fraction)는 청크마다 호출되며, fraction은 파일 크기를 알 때만 0~1 값입니다.
+    defaults는 모든 레코드에 덧붙일 값입니다 (예: 분할 저장소의 작성자).
+    """
+    form = form or load_form()
+    report = ImportReport()
+    existing = store.load()
+    seen = set(record_keys(existing).tolist()) if len(existing) else set()
+    if total_bytes is None and isinstance(source, str):
+        total_bytes = os.path.getsize(source)
+
+    for chunk in iter_chunks(source, chunksize, filename):
+        first_row = report.rows + 2  # 헤더가 1행
+        report.rows += len(chunk)
+        clean, err = validate_chunk(chunk, form, first_row=first_row)
+        report.invalid += len(chunk) - len(clean)
+        report.add_errors(err)
+
+        if len(clean):
+            keys = record_keys(clean)
+            # 파일 안 중복과 기존 기록 중복을 함께 제거
+            first = ~pd.Series(keys).duplicated().to_numpy()
+            new = np.fromiter((k not in seen for k in keys.tolist()), dtype=bool, count=len(keys)) & first
+            report.duplicates += int(len(clean) - new.sum())
+            batch = clean[new]
+            if len(batch):
+                store.insert_many(batch.assign(**(defaults or {})).to_dict("records"))
+                seen.update(keys[new].tolist())
+                report.inserted += len(batch)
+
+        if progress is not None:
+            fraction = None
+            pos = getattr(source, "tell", None)
+            if total_bytes and callable(pos):
+                try:
+                    fraction = min(1.0, pos() / total_bytes)
+                except Exception:
+                    fraction = None
+            progress(report, fraction)
+    return report
@@ -0,0 +1,212 @@
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# ---- 검색/필터 인덱스 ----
+# 데이터 버전마다 한 번만 만들고, 이후 필터 변경은 인덱스 조회만 수행합니다.
+# - 날짜/매매가: 행별 타입 배열(int64) + 정렬된 값 배열과 정렬 순서 → 범위 필터는 이진 탐색
+# - 부동산 유형: 범주 코드 배열 + 범주별 행 위치 목록(posting list, 희소 비트맵에 해당)
+# - 이름/주소: 문자 bigram 역색인 → 부분 문자열 검색 (한글은 NFC 음절 단위로 처리)
+# 여러 조건이 있으면 가장 적은 후보를 내는 조건으로 후보를 뽑고 나머지는 후보 행에 대해서만
+# 타입 배열로 검사하므로, 조회 비용은 전체 행 수가 아니라 결과 규모에 비례합니다.
+
+_NGRAM = 2
+_FIELD_SEP = "\x00"  # 이름/주소 경계를 넘는 n-gram이 생기지 않도록 하는 구분자
+
+
+def _norm_text(s) -> str:
+    if s is None or (isinstance(s, float) and s != s):
+        return ""
+    return unicodedata.normalize("NFC", str(s)).casefold()
+
+
+def _to_days(values) -> np.ndarray:
+    # 'YYYY-MM-DD' 등 날짜 값을 epoch 기준 일수(int64)로, 해석 불가 값은 최소값으로 표시
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+    days = parsed.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return days
+
+
+_MISSING = np.iinfo(np.int64).min  # NaT/NaN 표시값
+
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.frame = df  # 인덱스를 만든 원본 (행 위치는 이 프레임 기준)
+        self.size = len(df)
+
+        # 날짜
+        self.date = _to_days(df["날짜"].tolist())
+        self._date_order = np.argsort(self.date, kind="stable")
+        self._date_sorted = self.date[self._date_order]
+
+        # 매매가 (만원, int64)
+        # 저장 시 정수로 정규화되므로 보통은 숫자 열을 그대로 사용 (문자열이 섞인 예전 데이터만 파싱)
+        col = df["매매가"]
+        if not pd.api.types.is_numeric_dtype(col):
+            col = pd.to_numeric(pd.Series(col.tolist(), dtype=object), errors="coerce")
+        price = col.to_numpy(dtype=float, na_value=np.nan)
+        self.price = np.where(np.isnan(price), _MISSING, np.round(np.nan_to_num(price))).astype(np.int64)
+        self._price_order = np.argsort(self.price, kind="stable")
+        self._price_sorted = self.price[self._price_order]
+
+        # 부동산 유형
+        codes, cats = pd.factorize(pd.Series(df["부동산 유형"].tolist(), dtype=object))
+        self.type_code = codes.astype(np.int32)
+        self.type_categories = {c: i for i, c in enumerate(cats)}
+        order = np.argsort(self.type_code, kind="stable")
+        bounds = np.searchsorted(self.type_code[order], np.arange(len(cats) + 1))
+        self._type_postings = {i: order[bounds[i]:bounds[i + 1]] for i in range(len(cats))}
+
+        # 이름/주소 n-gram 역색인
+        names = df["아파트 이름"].tolist()
+        addrs = df["주소"].tolist()
+        self.text = [_norm_text(n) + _FIELD_SEP + _norm_text(a) for n, a in zip(names, addrs)]
+        grams = {}
+        for pos, t in enumerate(self.text):
+            row_grams = set(t)
+            row_grams.update(t[i:i + _NGRAM] for i in range(len(t) - _NGRAM + 1))
+            for g in row_grams:
+                if _FIELD_SEP not in g:
+                    grams.setdefault(g, []).append(pos)
+        self._grams = {g: np.asarray(p, dtype=np.int64) for g, p in grams.items()}
+
+    # -- 조건별 후보 (정렬된 행 위치 배열) --
+    def _range(self, sorted_vals, order, lo, hi) -> np.ndarray:
+        left = np.searchsorted(sorted_vals, lo, side="left") if lo is not None else \
+            np.searchsorted(sorted_vals, _MISSING, side="right")
+        right = np.searchsorted(sorted_vals, hi, side="right") if hi is not None else len(sorted_vals)
+        return np.sort(order[left:right])
+
+    def _text_candidates(self, needle: str) -> np.ndarray:
+        # 1~2글자는 색인에서 바로, 그 이상은 구성 bigram posting의 교집합
+        if len(needle) <= _NGRAM:
+            return self._grams.get(needle, np.empty(0, dtype=np.int64))
+        postings = []
+        for i in range(len(needle) - _NGRAM + 1):
+            p = self._grams.get(needle[i:i + _NGRAM])
+            if p is None:
+                return np.empty(0, dtype=np.int64)
+            postings.append(p)
+        postings.sort(key=len)
+        cand = postings[0]
+        for p in postings[1:]:
+            cand = cand[np.isin(cand, p, assume_unique=True)]
+            if not len(cand):
+                break
+        return cand
+
+    def search(self, date_from=None, date_to=None, types=None,
+               price_min=None, price_max=None, text=None) -> np.ndarray:
+        """조건을 모두 만족하는 행 위치(0부터, 오름차순)를 반환합니다."""
+        d_lo = _to_days([date_from])[0] if date_from is not None else None
+        d_hi = _to_days([date_to])[0] if date_to is not None else None
+        p_lo = int(price_min) if price_min else None
+        p_hi = int(price_max) if price_max else None
+        needle = _norm_text(text) if text else ""
+        type_codes = None
+        if types:
+            type_codes = np.asarray([self.type_categories[t] for t in types if t in self.type_categories],
+                                    dtype=np.int32)
+
+        # 각 조건의 예상 후보 수를 O(log N)으로 계산해 가장 작은 조건으로 후보 생성
+        plans = []
+        if d_lo is not None or d_hi is not None:
+            lo = np.searchsorted(self._date_sorted, d_lo if d_lo is not None else _MISSING,
+                                 side="left" if d_lo is not None else "right")
+            hi = np.searchsorted(self._date_sorted, d_hi, side="right") if d_hi is not None else self.size
+            plans.append((hi - lo, "date"))
+        if p_lo is not None or p_hi is not None:
+            lo = np.searchsorted(self._price_sorted, p_lo if p_lo is not None else _MISSING,
+                                 side="left" if p_lo is not None else "right")
+            hi = np.searchsorted(self._price_sorted, p_hi, side="right") if p_hi is not None else self.size
+            plans.append((hi - lo, "price"))
+        if type_codes is not None:
+            plans.append((sum(len(self._type_postings[c]) for c in type_codes), "type"))
+        if needle:
+            plans.append((0, "text"))  # 텍스트는 보통 가장 선택적이며 후보 수가 곧 결과 상한
+        if not plans:
+            return np.arange(self.size)
+
+        first = min(plans)[1]
+        if first == "date":
+            cand = self._range(self._date_sorted, self._date_order, d_lo, d_hi)
+        elif first == "price":
+            cand = self._range(self._price_sorted, self._price_order, p_lo, p_hi)
+        elif first == "type":
+            cand = np.sort(np.concatenate([self._type_postings[c] for c in type_codes])) \
+                if len(type_codes) else np.empty(0, dtype=np.int64)
+        else:
+            cand = self._text_candidates(needle)
+
+        # 나머지 조건은 후보 행에 대해서만 검사
+        if first != "date" and (d_lo is not None or d_hi is not None):
+            v = self.date[cand]
+            m = v != _MISSING
+            if d_lo is not None:
+                m &= v >= d_lo
+            if d_hi is not None:
+                m &= v <= d_hi
+            cand = cand[m]
+        if first != "price" and (p_lo is not None or p_hi is not None):
+            v = self.price[cand]
+            m = v != _MISSING
+            if p_lo is not None:
+                m &= v >= p_lo
+            if p_hi is not None:
+                m &= v <= p_hi
+            cand = cand[m]
+        if first != "type" and type_codes is not None:
+            cand = cand[np.isin(self.type_code[cand], type_codes)]
+        if needle and first != "text":
+            cand = cand[np.isin(cand, self._text_candidates(needle), assume_unique=True)]
+        if needle and len(needle) > _NGRAM:
+            # bigram 교집합은 후보일 뿐이므로 실제 부분 문자열 포함 여부를 확인
+            cand = np.asarray([p for p in cand if needle in self.text[p]], dtype=np.int64)
+        return cand
+
+    def order(self, pos: np.ndarray, column: str = None, descending: bool = False) -> np.ndarray:
+        # 후보 행 위치만 정렬 (O(m log m)). 값이 없는 행은 방향과 관계없이 뒤로 보냅니다.
+        if column is None or column == "id":
+            return pos[::-1] if descending else pos
+        if column in ("날짜", "매매가"):
+            keys = (self.date if column == "날짜" else self.price)[pos]
+            missing = keys == _MISSING
+            if descending:
+                keys = np.where(missing, _MISSING, -keys)
+            keys = np.where(missing, np.iinfo(np.int64).max, keys)
+            return pos[np.argsort(keys, kind="stable")]
+        col = self.frame[column]
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            # 층수/연식/파생 평형·수익률 등 숫자 열은 값 크기 순 (문자열 순이면 10 < 2)
+            keys = col.to_numpy(dtype=float, na_value=np.nan)[pos]
+            missing = np.isnan(keys)
+            keys = np.where(missing, np.inf, -keys if descending else keys)
+            return pos[np.argsort(keys, kind="stable")]
+        values = pd.Series(col.to_numpy()[pos])
+        ranked = values.sort_values(ascending=not descending, na_position="last", kind="stable",
+                                    key=lambda v: v.astype(str).where(v.notna()))
+        return pos[ranked.index.to_numpy()]
+
+    def filter(self, **filters) -> pd.DataFrame:
+        return self.frame.iloc[self.search(**filters)]
+
+
+# ---- 저장소 버전별 인덱스 캐시 ----
+_index_cache = {}  # id(store) -> (version, FilterIndex)
+_index_lock = threading.Lock()
+
+
+def index_for(store, df: pd.DataFrame = None) -> FilterIndex:
+    # store.load()와 같은 데이터 버전에 대해 만든 인덱스를 재사용합니다.
+    ver = store.version()
+    with _index_lock:
+        hit = _index_cache.get(id(store))
+        if hit is not None and hit[0] == ver and (df is None or hit[1].frame is df):
+            return hit[1]
+    idx = FilterIndex(df if df is not None else store.load())
+    with _index_lock:
+        _index_cache[id(store)] = (ver, idx)
+    return idx
@@ -0,0 +1,178 @@
+import datetime
+import json
+import os
+import threading
+
+# ---- 선언형 입력 폼 모델 ----
+# form_schema.json(질문/옵션/가시성 규칙/그룹/필수 항목)을 한 번 컴파일해
+# 재실행마다 반복하던 계산을 미리 만들어 둡니다.
+# - 가시성 의존 그래프: 답이 바뀐 항목에 의존하는 질문만 가시성을 다시 계산
+# - 이동 테이블: 가시성 상태별 다음/이전 가시 단계 (상태마다 한 번 계산 후 캐시)
+# - 유형별 검증기: 필수 검증과 사이드바 '입력됨' 표시가 같은 규칙을 사용
+
+_TYPES = ("text", "textarea", "number", "select", "date")
+
+
+def _filled_text(v):
+    return v is not None and str(v).strip() != ""
+
+
+def _filled_number(v):
+    # 매매가 등은 0보다 큰 값 권장
+    try:
+        return float(v) > 0
+    except Exception:
+        return False
+
+
+def _filled_date(v):
+    return bool(v)
+
+
+validators = {
+    "text": _filled_text,
+    "textarea": _filled_text,
+    "select": _filled_text,
+    "number": _filled_number,
+    "date": _filled_date,
+}
+
+
+def _rule_matches(cond: dict, answers: dict) -> bool:
+    ref_val = answers.get(cond.get("key"))
+    if "include" in cond:
+        return ref_val in cond["include"]
+    if "exclude" in cond:
+        return ref_val not in cond["exclude"]
+    return True
+
+
+class NavTable:
+    # 하나의 가시성 상태에 대한 이동 테이블
+    def __init__(self, mask: tuple):
+        n = len(mask)
+        self.visible = [i for i in range(n) if mask[i]]
+        self.visible_set = frozenset(self.visible)
+        self.first = self.visible[0] if self.visible else None
+        self.last = self.visible[-1] if self.visible else None
+        # next_of[i]: i보다 뒤의 첫 가시 단계, prev_of[i]: i보다 앞의 마지막 가시 단계 (없으면 None)
+        self.next_of = [None] * (n + 1)
+        self.prev_of = [None] * (n + 1)
+        nxt = None
+        for i in range(n - 1, -1, -1):
+            self.next_of[i] = nxt
+            if mask[i]:
+                nxt = i
+        prv = None
+        for i in range(n + 1):
+            self.prev_of[i] = prv
+            if i < n and mask[i]:
+                prv = i
+
+
+class FormModel:
+    def __init__(self, schema: dict):
+        option_sets = schema.get("option_sets", {})
+        self.option_sets = option_sets
+        self.questions = []
+        for f in schema["fields"]:
+            q = dict(f)
+            if q.get("type") not in _TYPES:
+                raise ValueError(f"지원하지 않는 질문 유형: {q.get('key')} ({q.get('type')})")
+            if isinstance(q.get("options"), str):
+                q["options"] = list(option_sets[q["options"]])
+            self.questions.append(q)
+        self.index_of = {q["key"]: i for i, q in enumerate(self.questions)}
+        if len(self.index_of) != len(self.questions):
+            raise ValueError("질문 key가 중복되었습니다.")
+        self.required_keys = {q["key"] for q in self.questions if q.get("required")}
+
+        # 그룹: key 목록 → 인덱스 목록. 어느 그룹에도 없는 질문은 '기타' 그룹으로 모음
+        self.groups = []
+        grouped = set()
+        for g in schema.get("groups", []):
+            idx = [self.index_of[k] for k in g["keys"]]
+            grouped.update(idx)
+            self.groups.append((g["title"], idx))
+        rest = [i for i in range(len(self.questions)) if i not in grouped]
+        if rest:
+            self.groups.append(("기타", rest))
+
+        # 의존 그래프: 참조 key -> 그 답에 가시성이 달린 질문 인덱스
+        self.dependents = {}
+        for i, q in enumerate(self.questions):
+            cond = q.get("visible_if")
+            if cond:
+                if cond.get("key") not in self.index_of:
+                    raise ValueError(f"visible_if가 알 수 없는 항목을 참조합니다: {q['key']} -> {cond.get('key')}")
+                self.dependents.setdefault(cond["key"], []).append(i)
+
+        self._nav_cache = {}
+        self._nav_lock = threading.Lock()
+
+    # -- 가시성 --
+    def is_visible(self, idx: int, answers: dict) -> bool:
+        cond = self.questions[idx].get("visible_if")
+        return True if not cond else _rule_matches(cond, answers)
+
+    def visibility(self, answers: dict) -> tuple:
+        # 전체 평가 (답 전체가 바뀌었을 때만 사용)
+        return tuple(self.is_visible(i, answers) for i in range(len(self.questions)))
+
+    def update_visibility(self, mask: tuple, answers: dict, changed_key: str) -> tuple:
+        # changed_key에 의존하는 질문만 다시 평가
+        deps = self.dependents.get(changed_key)
+        if not deps:
+            return mask
+        out = list(mask)
+        for i in deps:
+            out[i] = self.is_visible(i, answers)
+        return tuple(out)
+
+    def nav(self, mask: tuple) -> NavTable:
+        table = self._nav_cache.get(mask)
+        if table is None:
+            table = NavTable(mask)
+            with self._nav_lock:
+                self._nav_cache[mask] = table
+        return table
+
+    # -- 검증 --
+    def is_filled(self, q: dict, value) -> bool:
+        if value is None:
+            return False
+        return validators[q["type"]](value)
+
+    def validate(self, q: dict, value) -> bool:
+        # 필수 항목이면 유형별 검증기를 통과해야 함
+        if q["key"] not in self.required_keys:
+            return True
+        return self.is_filled(q, value)
+
+    def default(self, q: dict):
+        d = q.get("default")
+        if q["type"] == "date" and (d is None or d == "today"):
+            return datetime.date.today()
+        if q["type"] == "date" and isinstance(d, str):
+            return datetime.date.fromisoformat(d)
+        return d
+
+
+_form_cache = {}  # 절대경로 -> ((mtime_ns, size), FormModel)
+_form_lock = threading.Lock()
+
+
+def load_form(path: str = None) -> FormModel:
+    """스키마 파일을 컴파일한 FormModel을 반환합니다. 파일이 바뀌지 않으면 캐시를 재사용."""
+    key = os.path.abspath(path or os.path.join(os.path.dirname(__file__), "form_schema.json"))
+    st_ = os.stat(key)
+    ver = (st_.st_mtime_ns, st_.st_size)
+    with _form_lock:
+        hit = _form_cache.get(key)
+        if hit is not None and hit[0] == ver:
+            return hit[1]
+    with open(key, "r", encoding="utf-8") as f:
+        model = FormModel(json.load(f))
+    with _form_lock:
+        _form_cache[key] = (ver, model)
+    return model
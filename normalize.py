@@ -0,0 +1,113 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ---- 저장 시점 정규화 ----
+# 자유 입력 숫자 항목을 저장할 때 한 번만 해석해 타입이 있는 파생 열로 함께 기록합니다.
+# 조회/필터/정렬/분석은 원문 문자열 대신 파생 열과 숫자 열을 그대로 사용합니다.
+#   관심 평형 "84m²" / "84㎡" / "34평" / "84A"  -> 평형(m²), 평형(평)  (단위가 없으면 m²로 간주)
+#   예상 수익률 "4~5%" / "4.5%" / "약 5%"       -> 수익률 최소/최대/중간(%)
+#   숫자 항목 "35,000" / 35000.0                 -> 정수 (만원, 년, 층)
+# 단건 저장(normalize_record)과 대량 가져오기·기존 파일 보정(normalize_frame)이 같은 정규식을 씁니다.
+
+PYEONG_M2 = 400 / 121  # 1평 = 3.3058m²
+
+area_columns = ["평형(m²)", "평형(평)"]
+yield_columns = ["수익률 최소(%)", "수익률 최대(%)", "수익률 중간(%)"]
+derived_columns = area_columns + yield_columns
+integer_columns = ["건물 연식", "층수", "매매가", "월세", "관리비"]
+
+NORMALIZE_VERSION = 1  # 규칙이 바뀌면 올려서 기존 저장소를 다시 보정
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_AREA_RE = re.compile(_NUM + r"\s*(평)?")
+_YIELD_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*%?(?:\s*[~\-–〜]\s*(-?\d+(?:\.\d+)?))?")
+
+
+def _blank(v) -> bool:
+    return v is None or (isinstance(v, float) and v != v) or (isinstance(v, str) and not v.strip())
+
+
+def parse_area(v):
+    # (m², 평) 또는 (None, None)
+    if _blank(v):
+        return None, None
+    m = _AREA_RE.search(str(v).replace(",", ""))
+    if not m:
+        return None, None
+    x = float(m.group(1))
+    m2 = x * PYEONG_M2 if m.group(2) else x
+    return round(m2, 2), round(m2 / PYEONG_M2, 2)
+
+
+def parse_yield(v):
+    # (최소, 최대, 중간) 또는 (None, None, None). 범위의 양끝이 뒤바뀌어 있으면 정렬
+    if _blank(v):
+        return None, None, None
+    m = _YIELD_RE.search(str(v))
+    if not m:
+        return None, None, None
+    a = float(m.group(1))
+    b = float(m.group(2)) if m.group(2) is not None else a
+    lo, hi = min(a, b), max(a, b)
+    return lo, hi, (lo + hi) / 2
+
+
+def parse_int(v):
+    if _blank(v) or isinstance(v, bool):
+        return None
+    if isinstance(v, str):
+        v = v.replace(",", "").strip()
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else int(round(f))
+
+
+def normalize_record(record: dict) -> dict:
+    """레코드(전체 또는 부분 수정)에 숫자 정규화와 파생 열을 적용한 새 dict를 반환합니다.
+
+    부분 수정이면 원문 항목이 포함된 파생 열만 다시 계산합니다.
+    """
+    out = dict(record)
+    for c in integer_columns:
+        if c in out:
+            n = parse_int(out[c])
+            # 해석할 수 없는 값은 원문 그대로 둠 (입력 검증은 폼/가져오기 단계의 몫)
+            if n is not None or _blank(out[c]):
+                out[c] = n
+    if "관심 평형" in out:
+        out.update(zip(area_columns, parse_area(out["관심 평형"])))
+    if "예상 수익률" in out:
+        out.update(zip(yield_columns, parse_yield(out["예상 수익률"])))
+    return out
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """DataFrame 전체를 열 단위로 정규화한 사본을 반환합니다 (대량 가져오기/기존 파일 보정용)."""
+    out = df.copy()
+    for c in integer_columns:
+        if c in out.columns:
+            col = out[c]
+            num = col if pd.api.types.is_numeric_dtype(col) else \
+                pd.to_numeric(col.astype(str).str.replace(",", "", regex=False).str.strip(), errors="coerce")
+            keep = num.isna() & col.notna() & (col.astype(str).str.strip() != "")
+            rounded = num.round().astype("Int64").astype(object).where(num.notna(), None)
+            out[c] = rounded.where(~keep, col)
+    if "관심 평형" in out.columns:
+        text = out["관심 평형"].astype(object).where(out["관심 평형"].notna(), "").astype(str).str.replace(",", "", regex=False)
+        m = text.str.extract(_AREA_RE)
+        x = pd.to_numeric(m[0], errors="coerce")
+        m2 = np.where(m[1].notna(), x * PYEONG_M2, x)
+        out["평형(m²)"] = np.round(m2, 2)
+        out["평형(평)"] = np.round(m2 / PYEONG_M2, 2)
+    if "예상 수익률" in out.columns:
+        text = out["예상 수익률"].astype(object).where(out["예상 수익률"].notna(), "").astype(str)
+        m = text.str.extract(_YIELD_RE)
+        a = pd.to_numeric(m[0], errors="coerce")
+        b = pd.to_numeric(m[1], errors="coerce").fillna(a)
+        lo, hi = np.fmin(a, b), np.fmax(a, b)
+        out["수익률 최소(%)"], out["수익률 최대(%)"], out["수익률 중간(%)"] = lo, hi, (lo + hi) / 2
+    return out
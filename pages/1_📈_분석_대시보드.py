@@ -0,0 +1,41 @@
+import streamlit as st
+
+from analytics import render, views
+from app_resources import get_aggregates, get_writer
+
+# ---- 페이지 설정 ----
+st.set_page_config(page_title="임장 기록 분석 📈", layout="centered")
+st.title("📈 임장 기록 분석")
+
+# ---- 집계 ----
+# 집계는 저장 시점에 증분 갱신되므로 여기서는 버전 확인(필요할 때만 전체 재집계)만 합니다.
+agg = get_aggregates()
+get_writer().flush(timeout=0.5)  # 방금 저장한 기록까지 반영
+agg.refresh()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def figure_png(view: str, version, types: tuple, freq: str, _agg=None) -> bytes:
+    # (보기, 보기 버전, 필터)별로 그린 PNG를 캐시. 보기 버전은 그 그림에 쓰이는 값이 바뀔 때만 오르므로
+    # 저장 후에는 영향을 받은 그림만 다시 그립니다.
+    return render(_agg, view, list(types) or None, freq)
+
+
+all_types = agg.types()
+if not all_types:
+    st.info("아직 저장된 기록이 없습니다.")
+    st.stop()
+
+col1, col2 = st.columns([0.7, 0.3])
+with col1:
+    sel_types = st.multiselect("부동산 유형", options=all_types, default=[], placeholder="전체")
+with col2:
+    freq_label = st.selectbox("방문 집계 단위", options=["월", "주", "일"], index=0)
+freq = {"월": "M", "주": "W", "일": "D"}[freq_label]
+types_key = tuple(sorted(sel_types))
+
+tabs = st.tabs(list(views.values()))
+for tab, view in zip(tabs, views):
+    with tab:
+        st.image(figure_png(view, agg.view_version(view), types_key, freq if view == "visits" else "", _agg=agg),
+                 use_container_width=True)
@@ -0,0 +1,55 @@
+import streamlit as st
+
+from app_resources import get_store, get_writer
+from form_model import load_form
+from scoring import default_weights, matrix_for
+
+# ---- 페이지 설정 ----
+st.set_page_config(page_title="투자 점수 순위 🏆", layout="centered")
+st.title("🏆 투자 점수 순위")
+st.caption("평가 항목과 가격·수익률·연식을 가중치로 합산한 점수(0~100)입니다. 값이 없는 항목은 점수에서 제외됩니다.")
+
+store = get_store()
+get_writer().flush(timeout=0.5)  # 방금 저장한 기록까지 반영
+if store.count() == 0:
+    st.info("아직 저장된 기록이 없습니다.")
+    st.stop()
+
+# 점수 행렬은 데이터 버전마다 한 번 만들고, 가중치 변경은 재순위만 수행
+matrix, idx = matrix_for(store)
+form = load_form()
+
+# ---- 가중치 ----
+with st.sidebar:
+    st.markdown("### ⚖️ 가중치")
+    if st.button("기본값으로"):
+        for k in default_weights:
+            st.session_state.pop(f"w_{k}", None)
+    weights = {k: st.slider(k, 0.0, 3.0, float(v), 0.25, key=f"w_{k}") for k, v in default_weights.items()}
+
+# ---- 후보 필터 ----
+with st.expander("🔍 대상 필터 (비우면 전체)"):
+    col1, col2 = st.columns(2)
+    with col1:
+        date_from = st.date_input("시작일", value=None, key="sc_from")
+    with col2:
+        date_to = st.date_input("종료일", value=None, key="sc_to")
+    col3, col4 = st.columns(2)
+    with col3:
+        types = st.multiselect("유형", options=form.option_sets["type"], key="sc_types")
+    with col4:
+        price_max = st.number_input("최대 매매가(만원)", value=0, step=1000, key="sc_price_max")
+filters = dict(date_from=date_from, date_to=date_to, types=types, price_max=price_max or None)
+positions = idx.search(**filters) if any(filters.values()) else None
+
+k = st.slider("상위 몇 건", 5, 100, 10, 5)
+ranking = matrix.ranking(k, weights, positions)
+st.dataframe(ranking, use_container_width=True)
+
+# ---- 나란히 비교 ----
+st.markdown("### 🔎 비교")
+labels = {int(i): f"{i}: {row['아파트 이름']} ({row['점수']})" for i, row in ranking.iterrows()}
+picked = st.multiselect("비교할 기록 (순위표에서 선택)", options=list(labels), format_func=labels.get,
+                        default=list(labels)[:min(3, len(labels))])
+if picked:
+    st.dataframe(matrix.compare(picked, weights), use_container_width=True)
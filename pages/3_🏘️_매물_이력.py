@@ -0,0 +1,46 @@
+import streamlit as st
+
+from app_resources import get_properties, get_writer
+
+# ---- 페이지 설정 ----
+st.set_page_config(page_title="매물별 방문 이력 🏘️", layout="centered")
+st.title("🏘️ 매물별 방문 이력")
+st.caption("이름·주소 표기가 조금씩 다른 기록도 같은 건물로 묶어, 방문할 때마다의 매매가 변화를 보여 줍니다.")
+
+# 매물 묶음은 저장 시점에 증분 갱신되므로 여기서는 버전 확인(필요할 때만 전체 재구성)만 합니다.
+props = get_properties()
+get_writer().flush(timeout=0.5)  # 방금 저장한 기록까지 반영
+with st.spinner("매물을 정리하는 중..."):
+    props.refresh()
+
+col1, col2 = st.columns([0.7, 0.3])
+with col1:
+    text = st.text_input("이름/주소 검색", key="pr_text")
+with col2:
+    min_visits = st.number_input("최소 방문 수", min_value=1, value=2, step=1, key="pr_min")
+
+summary = props.properties(int(min_visits))
+if text:
+    q = text.strip()
+    hit = summary["아파트 이름"].astype(str).str.contains(q, regex=False) | \
+        summary["주소"].astype(str).str.contains(q, regex=False)
+    summary = summary[hit]
+
+if summary.empty:
+    st.info("조건에 맞는 매물이 없습니다.")
+    st.stop()
+
+st.markdown(f"**매물 {len(summary)}곳**")
+st.dataframe(summary.head(200), use_container_width=True)
+if len(summary) > 200:
+    st.caption("방문 수 상위 200곳만 표시합니다. 검색어로 범위를 좁혀 보세요.")
+
+# ---- 방문 이력 ----
+labels = {pid: f"{row['아파트 이름']} · {row['주소']} (방문 {row['방문 수']}회)"
+          for pid, row in summary.head(200).iterrows()}
+pid = st.selectbox("이력을 볼 매물", options=list(labels), format_func=labels.get, key="pr_pick")
+timeline = props.timeline(pid)
+st.dataframe(timeline, use_container_width=True)
+prices = timeline.dropna(subset=["매매가"])
+if len(prices) > 1:
+    st.line_chart(prices.set_index("날짜")["매매가"])
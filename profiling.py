@@ -0,0 +1,207 @@
+import bisect
+import collections
+import contextlib
+import datetime
+import json
+import threading
+import time
+
+from record_store import _atomic_write
+
+# ---- 재실행 프로파일링 ----
+# 재실행(스크립트 전체 실행 또는 프래그먼트 단독 실행) 하나를 '런'으로, 그 안의 이름 붙은 구간을 '스팬'으로 잽니다.
+#   prof.begin_run(session)             스크립트 맨 위 (같은 세션의 끝나지 않은 런은 중단(interrupted)으로 마감)
+#   with prof.span("records.page") as sp:
+#       ...; sp.count(rows=len(df))     처리한 행/바이트 수
+#   prof.end_run(session)               스크립트 맨 아래
+#   with prof.fragment(session, "input_flow"):  프래그먼트 본문 — 전체 실행 중이면 스팬, 단독 실행이면 런
+# 최근 런은 메모리에 몇 개만 보관하고(사이드바 디버그 패널), 스팬/런 시간은 누적 히스토그램과
+# 행/바이트 카운터로 모아 Prometheus 텍스트 형식으로 내보냅니다. 로그 파일을 지정하면 런마다 JSON 한 줄을 덧붙이고,
+# 지표 파일을 지정하면 일정 간격으로 Prometheus 텍스트를 원자적으로 다시 씁니다(node_exporter textfile 수집용).
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # 초
+PREFIX = "record_app"
+
+
+class _Span:
+    __slots__ = ("name", "depth", "start", "ms", "rows", "bytes")
+
+    def __init__(self, name: str, depth: int):
+        self.name, self.depth = name, depth
+        self.start, self.ms, self.rows, self.bytes = time.perf_counter(), None, 0, 0
+
+    def count(self, rows: int = 0, bytes: int = 0):
+        self.rows += int(rows)
+        self.bytes += int(bytes)
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "depth": self.depth, "ms": self.ms, "rows": self.rows, "bytes": self.bytes}
+
+
+class _Run:
+    __slots__ = ("session", "kind", "ts", "start", "spans", "stack")
+
+    def __init__(self, session: str, kind: str):
+        self.session, self.kind = session, kind
+        self.ts = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.start = time.perf_counter()
+        self.spans, self.stack = [], []
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self):
+        self.counts, self.total, self.n = [0] * (len(BUCKETS) + 1), 0.0, 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+
+
+def _labels(**kv) -> str:
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"')
+    return ",".join(f'{k}="{esc(v)}"' for k, v in kv.items())
+
+
+def leaf_spans(spans: list) -> list:
+    """하위 구간이 없는 스팬만 (런 기록의 spans 목록에서)."""
+    return [sp for sp, nxt in zip(spans, spans[1:] + [None]) if nxt is None or nxt["depth"] <= sp["depth"]]
+
+
+class Profiler:
+    def __init__(self, keep: int = 50, log_path: str = None, metrics_path: str = None,
+                 metrics_interval: float = 15.0):
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 이 스레드에서 진행 중인 런
+        self._open = {}  # 세션 -> 진행 중인 런 (st.rerun 등으로 끝나지 못한 런 마감용)
+        self._recent = collections.deque(maxlen=keep)
+        self._run_hist = collections.defaultdict(_Histogram)  # (kind, status)
+        self._span_hist = collections.defaultdict(_Histogram)  # 스팬 이름
+        self._rows = collections.Counter()
+        self._bytes = collections.Counter()
+        self._metrics_written = 0.0
+
+    # -- 런 --
+    def begin_run(self, session: str, kind: str = "full"):
+        with self._lock:
+            stale = self._open.pop(session, None)
+        if stale is not None:
+            self._finish(stale, "interrupted")
+        run = _Run(session, kind)
+        self._local.run = run
+        with self._lock:
+            self._open[session] = run
+
+    def end_run(self, session: str, status: str = "ok"):
+        run = getattr(self._local, "run", None)
+        self._local.run = None
+        with self._lock:
+            if self._open.get(session) is run:
+                del self._open[session]
+        if run is not None:
+            self._finish(run, status)
+
+    def _finish(self, run: _Run, status: str):
+        total = time.perf_counter() - run.start
+        for sp in run.stack:  # 중단된 런에서 닫히지 못한 스팬
+            sp.ms = round((time.perf_counter() - sp.start) * 1000, 2)
+        entry = {"ts": run.ts, "session": run.session, "kind": run.kind, "status": status,
+                 "total_ms": round(total * 1000, 2), "spans": [sp.as_dict() for sp in run.spans]}
+        with self._lock:
+            self._recent.append(entry)
+            self._run_hist[(run.kind.split(":")[0], status)].observe(total)
+        if self.log_path:
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        if self.metrics_path and time.monotonic() - self._metrics_written >= self.metrics_interval:
+            self._metrics_written = time.monotonic()
+            _atomic_write(self.metrics_path, lambda f: f.write(self.prometheus_text()), encoding="utf-8")
+
+    # -- 스팬 --
+    @contextlib.contextmanager
+    def span(self, name: str):
+        run = getattr(self._local, "run", None)
+        sp = _Span(name, len(run.stack) if run is not None else 0)
+        if run is not None:
+            run.spans.append(sp)
+            run.stack.append(sp)
+        try:
+            yield sp
+        finally:
+            elapsed = time.perf_counter() - sp.start
+            sp.ms = round(elapsed * 1000, 2)
+            if run is not None and run.stack and run.stack[-1] is sp:
+                run.stack.pop()
+            with self._lock:
+                self._span_hist[name].observe(elapsed)
+                if sp.rows:
+                    self._rows[name] += sp.rows
+                if sp.bytes:
+                    self._bytes[name] += sp.bytes
+
+    @contextlib.contextmanager
+    def fragment(self, session: str, name: str):
+        # 전체 실행 중이면 그 런의 스팬, 프래그먼트 단독 재실행이면 별도 런
+        if getattr(self._local, "run", None) is not None:
+            with self.span(name) as sp:
+                yield sp
+            return
+        self.begin_run(session, f"fragment:{name}")
+        status = "ok"
+        try:
+            with self.span(name) as sp:
+                yield sp
+        except BaseException:  # st.rerun()/st.stop() 포함
+            status = "interrupted"
+            raise
+        finally:
+            self.end_run(session, status)
+
+    # -- 조회/내보내기 --
+    def recent(self, n: int = None) -> list:
+        """최근 런 목록 (최신이 앞)."""
+        with self._lock:
+            runs = list(self._recent)
+        runs.reverse()
+        return runs[:n] if n else runs
+
+    def jsonl(self, n: int = None) -> str:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in reversed(self.recent(n)))
+
+    def prometheus_text(self) -> str:
+        """누적 지표를 Prometheus 텍스트 노출 형식으로."""
+        with self._lock:
+            runs = {k: (list(h.counts), h.total, h.n) for k, h in self._run_hist.items()}
+            spans = {k: (list(h.counts), h.total, h.n) for k, h in self._span_hist.items()}
+            rows, nbytes = dict(self._rows), dict(self._bytes)
+        out = []
+
+        def histogram(metric: str, help_text: str, series: dict, label_of):
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} histogram")
+            for key in sorted(series):
+                counts, total, n = series[key]
+                labels, acc = label_of(key), 0
+                for le, c in zip([*map(str, BUCKETS), "+Inf"], counts):
+                    acc += c
+                    out.append(f'{metric}_bucket{{{labels},le="{le}"}} {acc}')
+                out.append(f"{metric}_sum{{{labels}}} {total:.6f}")
+                out.append(f"{metric}_count{{{labels}}} {n}")
+
+        histogram(f"{PREFIX}_rerun_duration_seconds", "Script rerun duration.", runs,
+                  lambda k: _labels(kind=k[0], status=k[1]))
+        histogram(f"{PREFIX}_span_duration_seconds", "Named span duration within reruns.", spans,
+                  lambda k: _labels(span=k))
+        for metric, help_text, counter in ((f"{PREFIX}_span_rows_total", "Rows processed by span.", rows),
+                                           (f"{PREFIX}_span_bytes_total", "Bytes processed by span.", nbytes)):
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} counter")
+            out.extend(f"{metric}{{{_labels(span=k)}}} {v}" for k, v in sorted(counter.items()))
+        return "\n".join(out) + "\n"
@@ -0,0 +1,383 @@
+import re
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from record_store import snapshot
+
+# ---- 매물 식별(같은 건물 묶기) ----
+# 같은 건물이 "래미안퍼스티지아파트 / 서울특별시 서초구 반포동 1" 과 "래미안 퍼스티지 / 서울 서초구 반포1동 1"
+# 처럼 조금씩 다르게 저장되므로, 주소와 이름을 정규화한 뒤 비슷한 기록을 하나의 매물로 묶습니다.
+#   1) 정규화: 주소는 시도/시/구·군/동·읍·면·리/도로명/번지 토큰으로, 이름은 공백·'아파트' 접미어 등을 제거
+#   2) 블로킹: 같은 (시도, 시, 구) 안에서만 비교 (주소를 해석할 수 없으면 이름 앞 두 글자)
+#   3) 후보: 이름 2-gram의 MinHash 서명을 밴드로 나눈 LSH 버킷 + 정규화 주소가 같은 버킷
+#   4) 확인: 같은 버킷에 든 후보만 주소 충돌 여부와 이름 유사도(Jaccard)로 확인해 연결
+# 모든 쌍을 비교하지 않으므로 구성 비용은 기록 수에 거의 비례합니다.
+# 정규화 결과가 같은 기록은 하나의 '변형(variant)'으로 합쳐 비교하며, 저장소 변경 통지로 증분 갱신합니다.
+# 매물별 요약도 변경으로 생기거나 합쳐지거나 나뉘거나 기록이 바뀐 매물만 다시 계산합니다.
+
+# -- 주소 정규화 --
+_SIDO = {
+    "서울특별시": "서울", "서울시": "서울", "부산광역시": "부산", "부산시": "부산", "대구광역시": "대구",
+    "대구시": "대구", "인천광역시": "인천", "인천시": "인천", "광주광역시": "광주", "대전광역시": "대전",
+    "대전시": "대전", "울산광역시": "울산", "울산시": "울산", "세종특별자치시": "세종", "세종시": "세종",
+    "경기도": "경기", "강원도": "강원", "강원특별자치도": "강원", "충청북도": "충북", "충청남도": "충남",
+    "전라북도": "전북", "전북특별자치도": "전북", "전라남도": "전남", "경상북도": "경북", "경상남도": "경남",
+    "제주특별자치도": "제주", "제주도": "제주",
+}
+_SIDO_SHORT = frozenset(_SIDO.values())
+
+_DONG_RE = re.compile(r"^([가-힣]+?)\d*(동)$")  # 역삼1동 -> 역삼동 (행정동 번호 제거, 101동 같은 건물 동은 제외)
+_ROAD_RE = re.compile(r"^[가-힣A-Za-z0-9]+(로|길)$")
+_NUMBER_RE = re.compile(r"^(산)?(\d+)(?:-(\d+))?(?:번지)?$")
+_SPLIT_RE = re.compile(r"[\s,()\[\]]+")
+
+
+@lru_cache(maxsize=1 << 18)
+def normalize_address(text) -> dict:
+    """주소 문자열 -> {"sido", "si", "gu", "dong", "road", "number"} (해석하지 못한 항목은 "").
+
+    같은 주소가 반복 저장되므로 결과를 캐시합니다 (반환 dict는 수정하지 말 것).
+    """
+    out = dict.fromkeys(("sido", "si", "gu", "dong", "road", "number"), "")
+    if text is None or (isinstance(text, float) and text != text):
+        return out
+    for tok in (t for t in _SPLIT_RE.split(str(text)) if t):
+        if not out["sido"] and (tok in _SIDO or tok in _SIDO_SHORT):
+            out["sido"] = _SIDO.get(tok, tok)
+        elif not out["si"] and tok.endswith("시") and len(tok) > 1:
+            out["si"] = tok
+        elif not out["gu"] and tok.endswith(("구", "군")) and len(tok) > 1:
+            out["gu"] = tok
+        elif not out["dong"] and (m := _DONG_RE.match(tok)):
+            out["dong"] = m.group(1) + m.group(2)
+        elif not out["dong"] and tok.endswith(("읍", "면", "리", "가")) and len(tok) > 1 and not tok[0].isdigit():
+            out["dong"] = tok
+        elif not out["road"] and _ROAD_RE.match(tok) and not tok[0].isdigit():
+            out["road"] = tok
+        elif not out["number"] and (m := _NUMBER_RE.match(tok)):
+            out["number"] = (m.group(1) or "") + m.group(2) + (f"-{m.group(3)}" if m.group(3) else "")
+    return out
+
+
+# -- 이름 정규화 --
+_NAME_ALIASES = [("이편한세상", "e편한세상"), ("e-편한세상", "e편한세상"), ("에스케이", "sk"), ("엘지", "lg"),
+                 ("에이치", "h"), ("아이파크", "ipark")]
+_NAME_DROP_RE = re.compile(r"\(주\)|[\s\-_.,·()\[\]]+")
+_NAME_SUFFIX_RE = re.compile(r"(아파트|apt)$")
+_DIGITS_RE = re.compile(r"\d+")
+# 흔한 브랜드명: 짧은 이름에서 브랜드 2-gram이 MinHash를 지배해 같은 브랜드의 다른 단지가 한 버킷에 몰리므로
+# LSH 서명은 브랜드를 뺀 나머지로 계산 (확인 단계의 유사도는 전체 이름 기준)
+_BRANDS = ["e편한세상", "힐스테이트", "래미안", "푸르지오", "ipark", "롯데캐슬", "자이", "더샵", "센트레빌",
+           "두산위브", "sk뷰", "꿈에그린", "하늘채", "데시앙", "스위첸", "베르디움", "비발디", "해링턴플레이스"]
+_BRAND_RE = re.compile("|".join(map(re.escape, _BRANDS)))
+
+
+@lru_cache(maxsize=1 << 18)
+def normalize_name(text) -> str:
+    if text is None or (isinstance(text, float) and text != text):
+        return ""
+    s = str(text).casefold()
+    for a, b in _NAME_ALIASES:
+        s = s.replace(a, b)
+    s = _NAME_DROP_RE.sub("", s)
+    return _NAME_SUFFIX_RE.sub("", s)
+
+
+def _shingles(name: str) -> frozenset:
+    if len(name) < 2:
+        return frozenset([name]) if name else frozenset()
+    return frozenset(name[i:i + 2] for i in range(len(name) - 1))
+
+
+# -- MinHash --
+NUM_PERM = 40
+BANDS = 8  # 밴드당 5행 -> Jaccard 약 0.65 부근부터 후보가 됨 (같은 브랜드의 다른 단지는 대부분 걸러짐)
+NAME_THRESHOLD = 0.6
+_PRIME = np.uint64(4294967311)  # 2^32보다 큰 소수 (32비트 해시 * 계수가 uint64를 넘지 않음)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 2 ** 32 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32 - 1, NUM_PERM, dtype=np.uint64)
+
+
+def minhash(shingles) -> np.ndarray:
+    h = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(_A, h) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+class _Variant:
+    # 정규화 결과가 같은 기록 묶음
+    __slots__ = ("name", "addr", "block", "place", "main", "is_road", "shingles", "digits", "bucket_keys", "rids")
+
+    def __init__(self, name: str, addr: dict, sig):
+        self.name = name
+        self.addr = addr
+        self.shingles = _shingles(name)
+        self.digits = tuple(_DIGITS_RE.findall(name))
+        if addr["gu"] or addr["si"]:
+            self.block = (addr["sido"], addr["si"], addr["gu"])
+        else:
+            self.block = ("?", name[:2])
+        self.place = addr["road"] or addr["dong"]
+        self.main = addr["number"].split("-")[0]
+        self.is_road = bool(addr["road"])
+        keys = []
+        if sig is not None:
+            keys = [(self.block, b, band.tobytes()) for b, band in enumerate(sig.reshape(BANDS, -1))]
+        if self.place and addr["number"]:
+            keys.append((self.block, "addr", self.place, addr["number"]))
+        self.bucket_keys = keys
+        self.rids = set()
+
+
+def same_property(a: _Variant, b: _Variant) -> bool:
+    if a.block != b.block:
+        return False
+    x, y = a.addr, b.addr
+    # 주소가 서로 다르다고 확인되면 다른 매물
+    if x["dong"] and y["dong"] and x["dong"] != y["dong"]:
+        return False
+    if x["road"] and y["road"] and x["road"] != y["road"]:
+        return False
+    same_kind = a.is_road == b.is_road
+    if same_kind and a.main and b.main and a.main != b.main:
+        return False
+    exact_addr = same_kind and x["number"] and x["number"] == y["number"] and a.place == b.place
+    if not a.name or not b.name:
+        return bool(exact_addr)
+    if a.digits and b.digits and a.digits != b.digits:  # 1단지 / 2단지
+        return False
+    if a.name == b.name or (min(len(a.name), len(b.name)) >= 3 and (a.name in b.name or b.name in a.name)):
+        return True
+    inter = len(a.shingles & b.shingles)
+    jac = inter / (len(a.shingles) + len(b.shingles) - inter or 1)
+    return jac >= (0.3 if exact_addr else NAME_THRESHOLD)
+
+
+class PropertyIndex:
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self._lock = threading.RLock()
+        self._reset()
+        store.subscribe(self._on_change)
+
+    def _reset(self):
+        self._rows = {}  # id -> {날짜, 아파트 이름, 주소, 매매가}
+        self._variant_of = {}  # id -> 변형 키
+        self._variants = {}  # 변형 키 -> _Variant
+        self._buckets = {}  # 버킷 키 -> {변형 키}
+        self._cluster_of = {}  # 변형 키 -> 매물 id
+        self._clusters = {}  # 매물 id -> {변형 키}
+        self._next_cluster = 0
+        self._sig_cache = {}  # 정규화 이름 -> MinHash 서명
+        self._summary_rows = {}  # 매물 id -> 요약 행
+        self._touched = set()  # 요약 행을 다시 계산할 매물 id
+        self._summary = None
+
+    # -- 변형/군집 --
+    def _variant_key(self, row: dict):
+        name = normalize_name(row.get("아파트 이름"))
+        addr = normalize_address(row.get("주소"))
+        return name, tuple(addr.values()), addr
+
+    def _signature(self, name: str):
+        if not name:
+            return None
+        sig = self._sig_cache.get(name)
+        if sig is None:
+            core = _BRAND_RE.sub("", name) or name
+            sig = self._sig_cache[name] = minhash(_shingles(core))
+        return sig
+
+    def _new_cluster(self, vkey) -> int:
+        cid = self._next_cluster
+        self._next_cluster += 1
+        self._clusters[cid] = {vkey}
+        self._cluster_of[vkey] = cid
+        self._touched.add(cid)
+        return cid
+
+    def _link(self, vkey, allowed=None):
+        # vkey와 같은 버킷의 후보(여러 버킷에 겹쳐도 한 번씩)를 확인해 같은 매물이면 군집을 합침
+        v = self._variants[vkey]
+        cands = set()
+        for key in v.bucket_keys:
+            cands.update(self._buckets.get(key, ()))
+        cands.discard(vkey)
+        if allowed is not None:
+            cands &= allowed
+        for other in cands:
+            a, b = self._cluster_of[vkey], self._cluster_of[other]
+            if a != b and same_property(v, self._variants[other]):
+                self._merge_into(a, b)
+
+    def _merge_into(self, a: int, b: int):
+        if len(self._clusters[a]) < len(self._clusters[b]):
+            a, b = b, a
+        moved = self._clusters.pop(b)
+        for v in moved:
+            self._cluster_of[v] = a
+        self._clusters[a] |= moved
+        self._touched.update((a, b))
+
+    def _add_variant(self, vkey, name: str, addr: dict):
+        v = self._variants[vkey] = _Variant(name, addr, self._signature(name))
+        for key in v.bucket_keys:
+            self._buckets.setdefault(key, set()).add(vkey)
+        self._new_cluster(vkey)
+        return v
+
+    def _drop_variant(self, vkey):
+        # 변형을 빼고, 그 변형이 연결하던 매물을 남은 변형끼리 다시 나눔
+        v = self._variants.pop(vkey)
+        for key in v.bucket_keys:
+            bucket = self._buckets[key]
+            bucket.discard(vkey)
+            if not bucket:
+                del self._buckets[key]
+        cid = self._cluster_of.pop(vkey)
+        rest = self._clusters.pop(cid) - {vkey}
+        self._touched.add(cid)
+        for other in rest:
+            self._new_cluster(other)
+        for other in rest:
+            self._link(other, allowed=rest)
+
+    # -- 기록 단위 --
+    def _add_row(self, rid, row: dict):
+        name, akey, addr = self._variant_key(row)
+        if not name and not any(akey):
+            return  # 이름/주소가 모두 없으면 묶을 수 없음
+        vkey = (name, akey)
+        v = self._variants.get(vkey)
+        if v is None:
+            v = self._add_variant(vkey, name, addr)
+            v.rids.add(rid)
+            self._link(vkey)
+        else:
+            v.rids.add(rid)
+        self._variant_of[rid] = vkey
+
+    def _remove_row(self, rid):
+        vkey = self._variant_of.pop(rid, None)
+        if vkey is None:
+            return
+        v = self._variants[vkey]
+        v.rids.discard(rid)
+        if not v.rids:
+            self._drop_variant(vkey)
+
+    def _touch_row(self, rid):
+        vkey = self._variant_of.get(rid)
+        if vkey is not None:
+            self._touched.add(self._cluster_of[vkey])
+
+    def _upsert(self, rid, fields: dict):
+        self._touch_row(rid)
+        old = self._rows.get(rid)
+        row = {**old} if old else {}
+        row.update({k: fields[k] for k in ("날짜", "아파트 이름", "주소", "매매가") if k in fields})
+        self._rows[rid] = row
+        if old is None or old.get("아파트 이름") != row.get("아파트 이름") or old.get("주소") != row.get("주소"):
+            self._remove_row(rid)
+            self._add_row(rid, row)
+        self._touch_row(rid)
+
+    def _delete(self, rid):
+        self._touch_row(rid)
+        if self._rows.pop(rid, None) is not None:
+            self._remove_row(rid)
+
+    # -- 동기화 --
+    def _on_change(self, before, after, events):
+        with self._lock:
+            if self.version is None or self.version != before:
+                self.version = None  # 놓친 변경이 있으므로 다음 조회 때 전체를 다시 읽음
+                return
+            for op, rid, fields in events:
+                if op == "delete":
+                    self._delete(rid)
+                else:
+                    self._upsert(rid, fields or {})
+            self.version = after
+
+    def refresh(self):
+        # 저장소 버전과 다르면(최초/다른 프로세스의 쓰기) 전체를 한 번 다시 묶음
+        ver = self.store.version()
+        with self._lock:
+            if ver == self.version:
+                return ver
+        ver, df = snapshot(self.store)  # 저장소 잠금은 색인 잠금 밖에서
+        with self._lock:
+            if ver == self.version:  # 그사이 통지로 이미 따라잡음
+                return ver
+            self._reset()
+            cols = [c for c in ("날짜", "아파트 이름", "주소", "매매가") if c in df.columns]
+            for rid, rec in zip(df.index.tolist(), df[cols].to_dict("records")):
+                self._rows[rid] = rec
+                self._add_row(rid, rec)
+            self.version = ver
+            return ver
+
+    # -- 조회 --
+    def property_of(self, rid):
+        with self._lock:
+            vkey = self._variant_of.get(rid)
+            return None if vkey is None else self._cluster_of[vkey]
+
+    def _record_ids(self, cid) -> list:
+        return [rid for v in self._clusters.get(cid, ()) for rid in self._variants[v].rids]
+
+    def timeline(self, cid) -> pd.DataFrame:
+        """매물의 방문 기록을 날짜순으로, 직전 방문 대비 매매가 변동과 함께 반환합니다."""
+        with self._lock:
+            rows = [{"id": rid, **self._rows[rid]} for rid in self._record_ids(cid)]
+        df = pd.DataFrame(rows, columns=["id", "날짜", "아파트 이름", "주소", "매매가"])
+        df["매매가"] = pd.to_numeric(df["매매가"], errors="coerce")
+        df = df.sort_values(["날짜", "id"], na_position="first", kind="stable").set_index("id")
+        prev = df["매매가"].ffill().shift()
+        df["변동"] = df["매매가"] - prev
+        df["변동률(%)"] = (df["변동"] / prev * 100).round(2)
+        return df
+
+    def _summary_row(self, cid):
+        rids = self._record_ids(cid)
+        if not rids:
+            return None
+        visits = sorted((str(self._rows[r].get("날짜") or ""), r) for r in rids)
+        last = self._rows[visits[-1][1]]
+        prices = [p for p in (_price(self._rows[r].get("매매가")) for _, r in visits) if p is not None]
+        return {"매물": cid, "아파트 이름": last.get("아파트 이름"), "주소": last.get("주소"),
+                "방문 수": len(rids), "첫 방문": visits[0][0] or None, "최근 방문": visits[-1][0] or None,
+                "첫 매매가": prices[0] if prices else None, "최근 매매가": prices[-1] if prices else None}
+
+    def properties(self, min_visits: int = 1) -> pd.DataFrame:
+        """매물별 요약 (방문 수, 첫/최근 방문, 첫/최근 매매가, 변동). 방문 수 내림차순."""
+        with self._lock:
+            if self._touched or self._summary is None:
+                for cid in self._touched:
+                    row = self._summary_row(cid)
+                    if row is None:
+                        self._summary_rows.pop(cid, None)
+                    else:
+                        self._summary_rows[cid] = row
+                self._touched.clear()
+                df = pd.DataFrame(list(self._summary_rows.values()),
+                                  columns=["매물", "아파트 이름", "주소", "방문 수", "첫 방문", "최근 방문",
+                                           "첫 매매가", "최근 매매가"])
+                df["변동"] = df["최근 매매가"] - df["첫 매매가"]
+                self._summary = df.sort_values(["방문 수", "최근 방문"], ascending=False).set_index("매물")
+            df = self._summary
+        return df[df["방문 수"] >= min_visits]
+
+
+def _price(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if f != f else f
@@ -0,0 +1,357 @@
+import argparse
+import datetime
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from bulk_import import validate_chunk
+from form_model import load_form
+from record_store import _clean_value, csv_columns, id_column, open_store
+
+# ---- 헤드리스 기록 API ----
+# Streamlit 재실행 없이 기록을 일괄 생성/수정/삭제/조회합니다 (모바일 폼 도구 동기화 등).
+# 입력 화면과 같은 스키마(csv_columns)와 검증 규칙(form_schema.json의 필수 항목/유형/선택지)을 쓰며,
+# 한 번의 호출로 받은 묶음은 저장소 트랜잭션 한 번(insert_many/update_many/delete_many)으로 씁니다.
+#
+# CLI (입력은 JSON 배열 또는 JSON lines, 파일 인자가 없으면 표준 입력):
+#   python record_api.py create records.jsonl
+#   python record_api.py update changes.jsonl        # 각 항목에 "id" 포함, 나머지는 바꿀 필드
+#   python record_api.py delete 3 5 8
+#   python record_api.py query --from 2024-01-01 --type 아파트 --text 래미안 > out.jsonl
+#   python record_api.py serve --port 8765
+#
+# HTTP (serve):
+#   POST   /records          본문: 레코드 배열/JSON lines → {"created": [...], "errors": [...]}
+#   PATCH  /records          본문: {"id": .., 필드..} 배열/JSON lines → {"updated": [...], "errors": [...]}
+#   DELETE /records?id=3&id=5 (또는 본문 {"ids": [...]}) → {"deleted": [...], "missing": [...]}
+#   GET    /records?date_from=&date_to=&type=&text=&price_min=&price_max=&sort=&desc=1&limit=&owner=
+#          → JSON lines 스트리밍 (chunked)
+#   GET    /health
+
+STREAM_BATCH = 1000
+
+
+def _errors_from(err: pd.DataFrame, offset: int = 0) -> list:
+    return [{"index": int(r["행"]) + offset, "field": r["항목"], "error": r["오류"]}
+            for r in err.to_dict("records")]
+
+
+class RecordService:
+    def __init__(self, store=None, form=None):
+        # 프로세스당 저장소 연결 하나를 계속 사용
+        self.store = store or open_store()
+        self.form = form or load_form()
+        self._known = set(csv_columns)
+        # 분할 저장소는 작성자(파티션 키)를 함께 받음
+        self.owner_column = getattr(self.store, "owner_column", None)
+        if self.owner_column:
+            self._known.add(self.owner_column)
+
+    def _unknown(self, records: list, allow=()) -> list:
+        errors = []
+        for i, rec in enumerate(records):
+            if not isinstance(rec, dict):
+                errors.append({"index": i, "field": None, "error": "객체(JSON object)가 아닙니다"})
+                continue
+            for k in rec:
+                if k not in self._known and k not in allow:
+                    errors.append({"index": i, "field": k, "error": "알 수 없는 항목입니다"})
+        return errors
+
+    def _bad_owners(self, records: list, skip: set) -> list:
+        # 작성자를 준 경우 비었거나 점(.)으로만 된 이름은 거부 (파티션 디렉터리 이름이 되므로)
+        errors = []
+        for i, rec in enumerate(records):
+            if i in skip or self.owner_column not in rec:
+                continue
+            try:
+                self.store.check_owner(rec[self.owner_column])
+            except ValueError as e:
+                errors.append({"index": i, "field": self.owner_column, "error": str(e)})
+        return errors
+
+    def create(self, records) -> dict:
+        records = list(records)
+        errors = self._unknown(records)
+        if self.owner_column:
+            errors += self._bad_owners(records, {e["index"] for e in errors})
+        bad = {e["index"] for e in errors}
+        rows = [rec if i not in bad else {} for i, rec in enumerate(records)]
+        clean, err = validate_chunk(pd.DataFrame.from_records(rows, columns=csv_columns), self.form, first_row=0)
+        errors += _errors_from(err[~err["행"].isin(list(bad))])
+        clean = clean[~clean.index.isin(list(bad))]
+        if self.owner_column:
+            clean = clean.assign(**{self.owner_column: [rows[i].get(self.owner_column) for i in clean.index]})
+        ids = self.store.insert_many(clean.to_dict("records")) if len(clean) else []
+        created = [{"index": int(i), "id": rid} for i, rid in zip(clean.index.tolist(), ids)]
+        return {"created": created, "errors": sorted(errors, key=lambda e: e["index"])}
+
+    def update(self, items) -> dict:
+        # 각 항목: {"id": .., 바꿀 필드..}. 기존 기록과 합친 결과가 검증을 통과해야 반영
+        items = list(items)
+        errors = self._unknown(items, allow=(id_column,))
+        if self.owner_column:
+            errors += self._bad_owners(items, {e["index"] for e in errors})
+        bad = {e["index"] for e in errors}
+        merged, changes = [], []
+        for i, item in enumerate(items):
+            if i in bad:
+                continue
+            rid = item.get(id_column)
+            current = self.store.get(rid) if isinstance(rid, int) else None
+            if current is None:
+                errors.append({"index": i, "field": id_column, "error": "존재하지 않는 id입니다"})
+                continue
+            fields = {k: v for k, v in item.items() if k != id_column}
+            merged.append({**{c: current.get(c) for c in csv_columns},
+                           **{k: v for k, v in fields.items() if k != self.owner_column}})
+            changes.append((i, rid, fields))
+        updated = []
+        if changes:
+            clean, err = validate_chunk(pd.DataFrame.from_records(merged, columns=csv_columns), self.form, first_row=0)
+            errors += _errors_from(err.assign(행=[changes[r][0] for r in err["행"]]) if len(err) else err)
+            pairs = [(changes[pos][1], {k: clean.at[pos, k] if k in clean.columns else v
+                                        for k, v in changes[pos][2].items()})
+                     for pos in clean.index.tolist()]
+            ok = self.store.update_many(pairs) if pairs else []
+            for pos, done in zip(clean.index.tolist(), ok):
+                i, rid, _ = changes[pos]
+                if done:
+                    updated.append({"index": i, "id": rid})
+                else:
+                    errors.append({"index": i, "field": id_column, "error": "존재하지 않는 id입니다"})
+        return {"updated": updated, "errors": sorted(errors, key=lambda e: e["index"])}
+
+    def delete(self, ids) -> dict:
+        ids = [int(i) for i in ids]
+        ok = self.store.delete_many(ids) if ids else []
+        return {"deleted": [i for i, d in zip(ids, ok) if d], "missing": [i for i, d in zip(ids, ok) if not d]}
+
+    def sortable(self) -> list:
+        # 정렬 기준으로 받을 수 있는 열: id, 저장 열(파생 평형/수익률 포함), 작성자(분할 저장소)
+        cols = [id_column, *getattr(self.store, "columns", csv_columns)]
+        return cols + [self.owner_column] if self.owner_column else cols
+
+    def query(self, sort_by=None, descending=False, limit=None, **filters):
+        """필터 결과를 레코드 dict(id 포함)로 하나씩 내보내는 제너레이터."""
+        if sort_by is not None and sort_by not in self.sortable():
+            raise ValueError(f"정렬할 수 없는 항목입니다: {sort_by}")
+        for df in self.store.iter_pages(STREAM_BATCH, sort_by=sort_by, descending=descending, limit=limit, **filters):
+            cols = list(df.columns)
+            for rid, values in zip(df.index.tolist(), df.itertuples(index=False, name=None)):
+                rec = {id_column: int(rid)}
+                rec.update((c, _clean_value(c, v)) for c, v in zip(cols, values))
+                yield rec
+
+
+# ---- 입출력 ----
+
+def parse_records(text: str) -> list:
+    # JSON 배열/단일 객체 또는 JSON lines
+    text = text.strip()
+    if not text:
+        return []
+    if text[0] == "[":
+        return json.loads(text)
+    try:
+        obj = json.loads(text)
+        return [obj]
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _dump(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _iso_date(v: str) -> str:
+    return datetime.date.fromisoformat(v).isoformat()
+
+
+def filters_from_query(qs: dict) -> dict:
+    # HTTP 쿼리 문자열/CLI 인자 → query() 인자. 해석할 수 없는 값은 항목 이름과 함께 ValueError (HTTP 400)
+    one = lambda k: (qs.get(k) or [None])[0]
+
+    def parsed(k, parse):
+        v = one(k)
+        if v in (None, ""):
+            return None
+        try:
+            return parse(v)
+        except ValueError:
+            raise ValueError(f"{k} 값이 올바르지 않습니다: {v}") from None
+
+    out = {
+        "date_from": parsed("date_from", _iso_date),
+        "date_to": parsed("date_to", _iso_date),
+        "types": qs.get("type") or None,
+        "text": one("text") or None,
+        "price_min": parsed("price_min", float),
+        "price_max": parsed("price_max", float),
+        "sort_by": one("sort") or None,
+        "descending": one("desc") in ("1", "true", "yes"),
+        "limit": parsed("limit", int),
+    }
+    if one("owner"):
+        out["owner"] = one("owner")  # 분할 저장소 전용 (작성자 파티션만 조회)
+    return out
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None  # serve()에서 설정
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, status: int, obj):
+        body = _dump(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> str:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n).decode("utf-8") if n else ""
+
+    def _route(self):
+        url = urlparse(self.path)
+        return url.path.rstrip("/"), parse_qs(url.query)
+
+    def do_GET(self):
+        path, qs = self._route()
+        if path == "/health":
+            return self._send_json(200, {"ok": True, "version": str(self.service.store.version())})
+        if path != "/records":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            # 첫 행까지 미리 계산해 잘못된 필터/정렬은 스트리밍 시작 전에 400으로 응답
+            rows = self.service.query(**filters_from_query(qs))
+            first = next(rows, None)
+        except (ValueError, KeyError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buf = []
+        for rec in rows if first is None else _prepend(first, rows):
+            buf.append(_dump(rec) + "\n")
+            if len(buf) >= STREAM_BATCH:
+                self._chunk("".join(buf))
+                buf = []
+        if buf:
+            self._chunk("".join(buf))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _write(self, op):
+        path, qs = self._route()
+        if path != "/records":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            result = op(qs)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(200, result)
+
+    def do_POST(self):
+        self._write(lambda qs: self.service.create(parse_records(self._body())))
+
+    def do_PATCH(self):
+        self._write(lambda qs: self.service.update(parse_records(self._body())))
+
+    def do_DELETE(self):
+        def op(qs):
+            if qs.get("id"):
+                return self.service.delete(qs["id"])
+            body = self._body()
+            obj = json.loads(body) if body.strip() else {"ids": []}
+            ids = obj.get("ids") if isinstance(obj, dict) else None
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                raise ValueError('본문은 {"ids": [정수, ...]} 형식이어야 합니다')
+            return self.service.delete(ids)
+        self._write(op)
+
+
+def serve(service: RecordService, host: str = "127.0.0.1", port: int = 8765):
+    handler = type("RecordHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="임장 기록 일괄 API")
+    p.add_argument("--backend", help="sqlite 또는 csv (기본: RECORD_STORE_BACKEND)")
+    p.add_argument("--path", help="저장소 파일 경로 (기본: RECORD_STORE_PATH)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    for name in ("create", "update"):
+        sp = sub.add_parser(name)
+        sp.add_argument("file", nargs="?", help="JSON 배열 또는 JSON lines 파일 (없으면 표준 입력)")
+    sp = sub.add_parser("delete")
+    sp.add_argument("ids", nargs="+", type=int)
+    sp = sub.add_parser("query")
+    sp.add_argument("--from", dest="date_from")
+    sp.add_argument("--to", dest="date_to")
+    sp.add_argument("--type", action="append")
+    sp.add_argument("--text")
+    sp.add_argument("--price-min")
+    sp.add_argument("--price-max")
+    sp.add_argument("--sort")
+    sp.add_argument("--desc", action="store_true")
+    sp.add_argument("--limit")
+    sp.add_argument("--owner", help="작성자 (partitioned 저장소)")
+    sp = sub.add_parser("serve")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8765)
+    args = p.parse_args(argv)
+
+    service = RecordService(open_store(args.backend, args.path))
+    if args.cmd in ("create", "update"):
+        if args.file:
+            with open(args.file, encoding="utf-8-sig") as f:
+                text = f.read()
+        else:
+            text = sys.stdin.read()
+        result = getattr(service, args.cmd)(parse_records(text))
+        print(_dump(result))
+        return 1 if result["errors"] else 0
+    if args.cmd == "delete":
+        result = service.delete(args.ids)
+        print(_dump(result))
+        return 1 if result["missing"] else 0
+    if args.cmd == "query":
+        qs = {"date_from": [args.date_from], "date_to": [args.date_to], "type": args.type, "text": [args.text],
+              "price_min": [args.price_min], "price_max": [args.price_max], "sort": [args.sort],
+              "desc": ["1" if args.desc else None], "limit": [args.limit], "owner": [args.owner]}
+        out = sys.stdout
+        for rec in service.query(**filters_from_query(qs)):
+            out.write(_dump(rec) + "\n")
+        return 0
+    server = serve(service, args.host, args.port)
+    print(f"listening on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
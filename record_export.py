@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+
+import pandas as pd
+
+# ---- 필터 결과 내보내기 ----
+# 다운로드 버튼을 누를 때만(지연 생성) 현재 필터·정렬 결과를 파일로 만듭니다. 저장소의 iter_pages로
+# EXPORT_CHUNK 행씩 읽어 바로 파일에 쓰므로 결과 전체를 한 번에 메모리에 올리지 않습니다.
+#   csv.gz   gzip 압축 CSV (utf-8-sig, 엑셀 한글 호환)
+#   parquet  열 단위 압축 (pyarrow 필요, 묶음마다 row group 하나)
+#   xlsx     엑셀 (openpyxl 필요, write-only 모드, 시트당 최대 EXCEL_SHEET_ROWS행)
+# 만든 파일은 (저장소 버전, 형식, 필터, 정렬)별로 저장소 옆 exports 디렉터리에 보관해 같은 요청이면 다시 쓰고,
+# 최근 keep개만 남깁니다. 데이터가 바뀌면 버전이 달라져 새로 만듭니다.
+
+EXPORT_CHUNK = 20_000
+EXCEL_SHEET_ROWS = 1_000_000  # 엑셀 시트 한도(1,048,576행) 안에서 나눔
+
+formats = {
+    "csv.gz": ("CSV (gzip)", "application/gzip", None),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", "pyarrow"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "openpyxl"),
+}
+
+
+def available_formats() -> dict:
+    """설치된 패키지로 만들 수 있는 형식 {형식: 표시 이름}."""
+    return {fmt: label for fmt, (label, _, module) in formats.items()
+            if module is None or importlib.util.find_spec(module) is not None}
+
+
+def export_dir(store) -> str:
+    root = getattr(store, "root", None)  # 분할 저장소는 디렉터리
+    return os.path.join(root, "exports") if root else store.path + ".exports"
+
+
+def _write_csv_gz(path: str, chunks):
+    with gzip.open(path, "wt", encoding="utf-8-sig", newline="", compresslevel=6) as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=i == 0)
+
+
+def _write_parquet(path: str, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, schema = None, None
+    try:
+        for chunk in chunks:
+            if schema is None:
+                # 묶음마다 추론이 달라지지 않도록 첫 묶음의 dtype(전체 프레임과 같음)으로 스키마 고정
+                schema = pa.schema([(c, pa.from_numpy_dtype(t) if pd.api.types.is_numeric_dtype(t)
+                                     and not pd.api.types.is_bool_dtype(t) else pa.string())
+                                    for c, t in chunk.dtypes.items()])
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            chunk = chunk.copy()
+            for field in schema:
+                if pa.types.is_string(field.type):
+                    chunk[field.name] = chunk[field.name].astype("string")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:  # 묶음이 하나도 없으면 빈 파일 대신 열 없는 테이블
+        pq.write_table(pa.table({}), path)
+
+
+def _write_xlsx(path: str, chunks):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws, in_sheet, header = None, 0, None
+    for chunk in chunks:
+        if header is None:
+            header = list(chunk.columns)
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if ws is None or in_sheet >= EXCEL_SHEET_ROWS:
+                ws = wb.create_sheet(f"기록{len(wb.worksheets) + 1}")
+                ws.append(header)
+                in_sheet = 0
+            ws.append(row)
+            in_sheet += 1
+    if ws is None:
+        wb.create_sheet("기록1").append(header or [])
+    wb.save(path)
+
+
+_writers = {"csv.gz": _write_csv_gz, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+class Exporter:
+    def __init__(self, store, path: str = None, keep: int = 8):
+        self.store = store
+        self.path = path or export_dir(store)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._building = {}  # 캐시 키 -> 잠금 (같은 파일을 두 번 만들지 않도록)
+
+    def key(self, fmt: str, sort_by=None, descending=False, **filters) -> str:
+        spec = {"version": self.store.version(), "fmt": fmt, "sort": [sort_by, bool(descending)],
+                "filters": {k: v for k, v in sorted(filters.items()) if v not in (None, "", [], ())}}
+        return hashlib.sha1(json.dumps(spec, default=str, ensure_ascii=False).encode()).hexdigest()[:16]
+
+    def build(self, fmt: str, sort_by=None, descending=False, **filters) -> str:
+        """필터·정렬 결과 파일 경로 (캐시에 있으면 그대로)."""
+        if fmt not in _writers:
+            raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+        key = self.key(fmt, sort_by, descending, **filters)
+        target = os.path.join(self.path, f"{key}.{fmt}")
+        with self._lock:
+            lock = self._building.setdefault(key, threading.Lock())
+        with lock:
+            if not os.path.exists(target):
+                os.makedirs(self.path, exist_ok=True)
+                tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    chunks = self.store.iter_pages(EXPORT_CHUNK, sort_by=sort_by, descending=descending, **filters)
+                    _writers[fmt](tmp, chunks)
+                    os.replace(tmp, target)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                self._prune()
+            else:
+                os.utime(target)  # 최근 사용 표시 (정리 순서)
+        with self._lock:
+            self._building.pop(key, None)
+        return target
+
+    def read(self, fmt: str, sort_by=None, descending=False, **filters) -> bytes:
+        with open(self.build(fmt, sort_by, descending, **filters), "rb") as f:
+            return f.read()
+
+    def _prune(self):
+        files = [os.path.join(self.path, n) for n in os.listdir(self.path) if not n.endswith(".tmp")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for p in files[self.keep:]:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def file_name(base: str, fmt: str) -> str:
+    return f"{os.path.splitext(base)[0]}.{fmt}"
+
+
+def mime_type(fmt: str) -> str:
+    return formats[fmt][1]
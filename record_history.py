@@ -0,0 +1,370 @@
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import pandas as pd
+
+# ---- 기록 변경 이력 ----
+# 저장소 변경 통지(subscribe)를 받아 기록별 변경분(delta)만 별도 SQLite 파일(<저장소>.history.db)에 쌓습니다.
+#   insert: 값이 있는 항목 전체 / update: 실제로 바뀐 항목만 / delete: 표시만
+# 따라서 이력 크기는 '데이터 크기 × 백업 횟수'가 아니라 변경량에 비례합니다.
+# 특정 시점의 기록은 그 기록의 변경분을 순서대로 적용해(id 인덱스) 복원하고, 전체 데이터는
+# 그 시점 이전의 가장 가까운 체크포인트(주기적으로 저장하는 전체 상태)에서 시작해 이후 변경분만 적용합니다.
+# 체크포인트는 직전 체크포인트 이후 변경 수가 max(CHECKPOINT_MIN, 직전 체크포인트의 기록 수) 이상일 때
+# 만들므로, 복원 비용은 전체 이력 길이가 아니라 데이터 크기 정도이고 체크포인트 총량도 이력 크기 정도입니다. 되돌리기(undo)는 직전 상태를 복원해 저장소에 다시 쓰며,
+# 되돌린 것도 이력에 남습니다. 앱은 쓰기를 acting_as(세션)으로 감싸 변경마다 세션을 남기고,
+# 되돌리기는 그 세션이 한 변경만 대상으로 합니다 (다른 사용자의 변경을 되돌리지 않도록).
+# 다른 프로세스(CLI/API)가 쓴 변경은 통지를 받지 못하므로, 이력의 저장소 버전이 어긋나면
+# 현재 저장소와 이력을 비교한 차이를 'sync' 변경으로 기록합니다.
+
+ORIGINS = {"app": "앱", "sync": "동기화", "undo": "되돌리기"}
+CHECKPOINT_MIN = 1000  # 체크포인트 사이의 최소 변경 수
+
+
+def history_path(store) -> str:
+    root = getattr(store, "root", None)  # 분할 저장소는 디렉터리
+    return os.path.join(root, "history.db") if root else store.path + ".history.db"
+
+
+def _jsonable(v):
+    if hasattr(v, "item"):  # numpy 스칼라
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="microseconds")
+
+
+def _cutoff(when) -> str:
+    # 날짜(그날 끝까지 포함) 또는 일시 -> 비교용 ISO 문자열 (ts < cutoff)
+    if isinstance(when, str):
+        when = datetime.date.fromisoformat(when) if len(when) == 10 else datetime.datetime.fromisoformat(when)
+    if isinstance(when, datetime.datetime):
+        return (when + datetime.timedelta(microseconds=1)).isoformat(timespec="microseconds")
+    return datetime.datetime.combine(when + datetime.timedelta(days=1), datetime.time()).isoformat(timespec="microseconds")
+
+
+def _fold(state, op: str, delta):
+    if op == "delete":
+        return None
+    if op == "insert" or state is None:
+        return dict(delta)
+    state = dict(state)
+    state.update(delta)
+    return state
+
+
+class RecordHistory:
+    def __init__(self, store, path: str = None):
+        self.store = store
+        self.path = path or history_path(store)
+        self._lock = threading.RLock()
+        self._local = threading.local()  # 되돌리기 중인 스레드의 대상 seq
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                               "ts TEXT NOT NULL, version TEXT, rid INTEGER NOT NULL, op TEXT NOT NULL, "
+                               "delta TEXT, origin TEXT NOT NULL, undoes INTEGER, session TEXT, "
+                               "undone INTEGER NOT NULL DEFAULT 0)")
+            if "session" not in {r[1] for r in self._conn.execute("PRAGMA table_info(changes)")}:
+                # 세션/되돌림 표시 열이 없던 이력 파일
+                self._conn.execute("ALTER TABLE changes ADD COLUMN session TEXT")
+                self._conn.execute("ALTER TABLE changes ADD COLUMN undone INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE changes SET undone = 1 "
+                                   "WHERE seq IN (SELECT undoes FROM changes WHERE undoes IS NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_rid ON changes(rid, seq)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_ts ON changes(ts)")
+            # 되돌릴 수 있는 변경(앱 변경 중 아직 되돌리지 않은 것)만 세션별로 — 재실행마다 조회
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_undo ON changes(session, seq) "
+                               "WHERE origin = 'app' AND undone = 0")
+            # 마지막으로 반영한 저장소 버전 (백엔드마다 형식이 달라 JSON으로 보관하고 같은지만 비교)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS history_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute("INSERT OR IGNORE INTO history_meta VALUES ('version', 'null')")
+            # seq까지의 변경을 모두 적용한 전체 상태 (ts: 그 변경들 중 가장 늦은 시각, states: zlib 압축 JSON)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS checkpoints (seq INTEGER PRIMARY KEY, ts TEXT NOT NULL, "
+                               "rows INTEGER NOT NULL, states BLOB NOT NULL)")
+        self._as_of_cache = None  # ((cutoff, 마지막 seq), DataFrame)
+        store.subscribe(self._on_change)
+        self.sync()
+
+    # -- 기록 --
+    def _meta_version(self) -> str:
+        return self._conn.execute("SELECT value FROM history_meta WHERE key = 'version'").fetchone()[0]
+
+    def _set_meta_version(self, version):
+        self._conn.execute("UPDATE history_meta SET value = ? WHERE key = 'version'", (json.dumps(version),))
+
+    def _state(self, rid, before_seq: int = None, cutoff: str = None):
+        sql, params = "SELECT op, delta FROM changes WHERE rid = ?", [int(rid)]
+        if before_seq is not None:
+            sql += " AND seq < ?"
+            params.append(before_seq)
+        if cutoff is not None:
+            sql += " AND ts < ?"
+            params.append(cutoff)
+        state = None
+        for op, delta in self._conn.execute(sql + " ORDER BY seq", params):
+            state = _fold(state, op, json.loads(delta) if delta else None)
+        return state
+
+    def _checkpoint(self, cutoff: str = None):
+        # cutoff 이전 변경만으로 이루어진 가장 최근 체크포인트 (seq, states). 없으면 (0, {})
+        sql, params = "SELECT seq, states FROM checkpoints", []
+        if cutoff is not None:
+            sql += " WHERE ts < ?"
+            params.append(cutoff)
+        row = self._conn.execute(sql + " ORDER BY seq DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return 0, {}
+        return row[0], {int(rid): s for rid, s in json.loads(zlib.decompress(row[1])).items()}
+
+    def _states(self, cutoff: str = None) -> dict:
+        seq, states = self._checkpoint(cutoff)
+        sql, params = "SELECT rid, op, delta FROM changes WHERE seq > ?", [seq]
+        if cutoff is not None:
+            sql += " AND ts < ?"
+            params.append(cutoff)
+        for rid, op, delta in self._conn.execute(sql + " ORDER BY seq", params):
+            states[rid] = _fold(states.get(rid), op, json.loads(delta) if delta else None)
+        return {rid: s for rid, s in states.items() if s is not None}
+
+    @staticmethod
+    def _diff(prev, cur):
+        # 두 상태의 차이 (op, delta) 또는 바뀐 것이 없으면 None
+        if cur is None:
+            return None if prev is None else ("delete", None)
+        if prev is None:
+            return "insert", {k: v for k, v in cur.items() if v is not None}
+        delta = {k: v for k, v in cur.items() if prev.get(k) != v}
+        return ("update", delta) if delta else None
+
+    def _append(self, rows: list, version, origin: str, undoes: int = None, session: str = None):
+        ts, version = _now(), json.dumps(version)
+        self._conn.executemany(
+            "INSERT INTO changes (ts, version, rid, op, delta, origin, undoes, session) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(ts, version, int(rid), op, None if delta is None else json.dumps(delta, ensure_ascii=False),
+              origin, undoes, session) for rid, op, delta in rows])
+        self._maybe_checkpoint()
+
+    def _maybe_checkpoint(self):
+        # 쓰기 트랜잭션 안에서 호출 (다른 쓰기가 끼어들지 않으므로 현재 상태 = 마지막 seq까지의 상태)
+        last_seq, last_ts, last_rows = self._conn.execute(
+            "SELECT seq, ts, rows FROM checkpoints ORDER BY seq DESC LIMIT 1").fetchone() or (0, "", 0)
+        top = self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+        if top - last_seq < max(CHECKPOINT_MIN, last_rows):
+            return
+        ts = self._conn.execute("SELECT MAX(ts) FROM changes WHERE seq > ?", (last_seq,)).fetchone()[0]
+        states = self._states()
+        blob = zlib.compress(json.dumps(states, ensure_ascii=False).encode("utf-8"))
+        self._conn.execute("INSERT INTO checkpoints VALUES (?, ?, ?, ?)", (top, max(ts, last_ts), len(states), blob))
+
+    @contextlib.contextmanager
+    def acting_as(self, session):
+        """이 스레드에서 일어나는 저장소 쓰기를 session의 변경으로 기록합니다."""
+        prev = getattr(self._local, "session", None)
+        self._local.session = session
+        try:
+            yield
+        finally:
+            self._local.session = prev
+
+    def _on_change(self, before, after, events):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._meta_version()
+                rids = list(dict.fromkeys(int(rid) for _, rid, _ in events))
+                known = self._known(set(rids))
+                prev = {rid: self._state(rid) if rid in known else None for rid in rids}
+                if meta == json.dumps(after):
+                    rows = []  # 동기화로 이미 반영됨
+                elif meta != json.dumps(before):
+                    # 놓친 변경(다른 프로세스의 쓰기)이 있음: 이번 통지의 기록을 뺀 나머지는 현재 저장소와 비교해
+                    # 'sync'로 맞추고, 이번 기록은 현재 저장소의 값으로 앱 변경으로 기록
+                    df = self.store.load()
+                    self._sync_locked(df, after, skip=set(rids))
+                    present = df.index.intersection(rids)
+                    cur = dict.fromkeys(rids)
+                    cur.update({int(rid): {c: _jsonable(v) for c, v in rec.items()}
+                                for rid, rec in df.loc[present].to_dict("index").items()})
+                    rows = [(rid, *change) for rid in rids if (change := self._diff(prev[rid], cur[rid])) is not None]
+                else:
+                    # 같은 통지 안의 여러 변경(예: 파티션 이동 = 삭제 + 추가)은 기록별 최종 상태로 합쳐 한 번만 기록
+                    cur = dict(prev)
+                    for op, rid, fields in events:
+                        rid = int(rid)
+                        if op == "delete":
+                            cur[rid] = None
+                        else:
+                            cur[rid] = _fold(cur[rid], "update", {k: _jsonable(v) for k, v in (fields or {}).items()})
+                    rows = [(rid, *change) for rid in rids if (change := self._diff(prev[rid], cur[rid])) is not None]
+                undoes = getattr(self._local, "undoing", None)
+                if rows:
+                    self._append(rows, after, "undo" if undoes else "app", undoes,
+                                 getattr(self._local, "session", None))
+                if undoes:
+                    self._conn.execute("UPDATE changes SET undone = 1 WHERE seq = ?", (undoes,))
+                self._set_meta_version(after)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _known(self, rids: set) -> set:
+        # 이력이 있는 id만 (새 기록은 상태 복원 조회를 생략)
+        out = set()
+        ids = list(rids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ", ".join("?" for _ in chunk)
+            out.update(r for (r,) in self._conn.execute(f"SELECT DISTINCT rid FROM changes WHERE rid IN ({marks})", chunk))
+        return out
+
+    def _sync_locked(self, df: pd.DataFrame, version, skip: set = frozenset()):
+        states = self._states()
+        rows = []
+        cols = list(df.columns)
+        for rid, vals in zip(df.index.tolist(), df.itertuples(index=False, name=None)):
+            rid = int(rid)
+            prev = states.pop(rid, None)
+            if rid in skip:
+                continue
+            change = self._diff(prev, {c: _jsonable(v) for c, v in zip(cols, vals)})
+            if change is not None:
+                rows.append((rid, *change))
+        rows.extend((rid, "delete", None) for rid in states if rid not in skip)
+        if rows:
+            self._append(rows, version, "sync")
+        self._set_meta_version(version)
+
+    def sync(self) -> int:
+        """이력이 저장소 버전보다 뒤처져 있으면 차이를 기록합니다. 반환: 기록한 변경 수."""
+        ver = self.store.version()
+        with self._lock:
+            if self._meta_version() == json.dumps(ver):
+                return 0
+        # 저장소 잠금을 잡는 load()는 이력 잠금 밖에서 (쓰기 통지와 잠금 순서가 엇갈리지 않도록)
+        df = self.store.load()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._meta_version() == json.dumps(ver):
+                    self._conn.execute("COMMIT")
+                    return 0
+                n = self._conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+                self._sync_locked(df, ver)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0] - n
+
+    # -- 조회 --
+    def record_as_of(self, rid, when):
+        """when(날짜 또는 일시) 시점의 기록 (없었거나 삭제된 상태면 None)."""
+        with self._lock:
+            return self._state(rid, cutoff=_cutoff(when))
+
+    def as_of(self, when) -> pd.DataFrame:
+        """when 시점의 전체 데이터를 복원합니다 (id 인덱스, 저장소 열 순서).
+
+        같은 시점을 다시 조회하면 그 사이 이력이 늘지 않은 한 직전 결과를 그대로 돌려줍니다 (재실행마다 호출).
+        """
+        cutoff = _cutoff(when)
+        with self._lock:
+            key = (cutoff, self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0])
+            if self._as_of_cache is not None and self._as_of_cache[0] == key:
+                return self._as_of_cache[1]
+            states = self._states(cutoff)
+        df = pd.DataFrame.from_dict(states, orient="index").reindex(columns=self.store.columns)
+        df.index.name = "id"
+        df = df.sort_index()
+        with self._lock:
+            self._as_of_cache = (key, df)
+        return df
+
+    def changes(self, rid) -> pd.DataFrame:
+        """기록 하나의 변경 이력 (항목별 '이전 → 이후')."""
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, ts, op, delta, origin, undoes FROM changes WHERE rid = ? ORDER BY seq",
+                                      (int(rid),)).fetchall()
+        out, state = [], None
+        labels = {"insert": "추가", "update": "수정", "delete": "삭제"}
+        for seq, ts, op, delta, origin, undoes in rows:
+            delta = json.loads(delta) if delta else None
+            if op == "update":
+                text = ", ".join(f"{k}: {state.get(k) if state else None} → {v}" for k, v in delta.items())
+            elif op == "insert":
+                text = f"{len(delta)}개 항목"
+            else:
+                text = ""
+            out.append({"seq": seq, "일시": ts[:19].replace("T", " "), "변경": labels[op],
+                        "출처": ORIGINS.get(origin, origin), "내용": text})
+            state = _fold(state, op, delta)
+        return pd.DataFrame(out, columns=["seq", "일시", "변경", "출처", "내용"]).set_index("seq")
+
+    def _undo_target(self, rid=None, session=None):
+        # 앱에서 한 변경 중 아직 되돌리지 않은 가장 최근 것 (session을 주면 그 세션의 변경만)
+        sql = "SELECT seq, rid, op, delta FROM changes WHERE origin = 'app' AND undone = 0"
+        params = []
+        if session is not None:
+            sql += " AND session = ?"
+            params.append(session)
+        if rid is not None:
+            sql += " AND rid = ?"
+            params.append(int(rid))
+        return self._conn.execute(sql + " ORDER BY seq DESC LIMIT 1", params).fetchone()
+
+    def last_change(self, rid=None, session=None):
+        """되돌릴 수 있는 가장 최근 변경 {"seq", "rid", "op"} (없으면 None)."""
+        with self._lock:
+            row = self._undo_target(rid, session)
+        return None if row is None else {"seq": row[0], "rid": row[1], "op": row[2]}
+
+    def undo(self, rid=None, session=None):
+        """가장 최근 변경(rid를 주면 그 기록의, session을 주면 그 세션의 최근 변경)을 되돌립니다.
+        반환: 되돌린 변경 정보 또는 None."""
+        self.sync()
+        with self._lock:
+            row = self._undo_target(rid, session)
+            if row is None:
+                return None
+            seq, rid, op, delta = row
+            # 이미 되돌린 변경은 그 되돌리기와 함께 상쇄되므로 제외 (연속 되돌리기)
+            later = self._conn.execute("SELECT COUNT(*) FROM changes WHERE rid = ? AND seq > ? "
+                                       "AND origin != 'undo' AND undone = 0", (rid, seq)).fetchone()[0]
+            if later:
+                raise ValueError("이후에 다른 변경이 있어 되돌릴 수 없습니다.")
+            prior = self._state(rid, before_seq=seq)
+        # 저장소 쓰기는 이력 잠금 밖에서 (통지가 같은 스레드에서 _on_change로 들어옴)
+        self._local.undoing = seq
+        try:
+            with self.acting_as(session):
+                if op == "insert":
+                    self.store.delete(rid)
+                elif op == "update":
+                    delta = json.loads(delta)
+                    self.store.update(rid, {k: (prior or {}).get(k) for k in delta})
+                else:
+                    self.store.insert_many([prior], ids=[rid])
+        finally:
+            self._local.undoing = None
+        return {"seq": seq, "rid": rid, "op": op}
+
+    def size(self) -> dict:
+        with self._lock:
+            n, nbytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(delta)), 0) FROM changes").fetchone()
+        return {"changes": n, "delta_bytes": nbytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,1048 @@
+import contextlib
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+import pandas as pd
+
+from filter_index import FilterIndex, index_for
+from normalize import NORMALIZE_VERSION, derived_columns, normalize_frame, normalize_record
+from record_writer import FileLock, LockStats, writer_active
+
+log = logging.getLogger(__name__)
+
+# ---- 저장 기록 로더 (파일 버전 키 캐시) ----
+# Streamlit은 위젯 클릭마다 스크립트 전체를 다시 실행하므로, 매번 CSV를 파싱하지 않도록
+# 파싱된 DataFrame을 (mtime, size) 키로 프로세스 단위 캐시에 보관합니다.
+# - 파일이 바뀌지 않았다면 os.stat 한 번으로 캐시를 그대로 돌려줍니다 (파일 읽기 없음).
+# - 끝에 행이 추가(append)된 경우에는 새로 붙은 꼬리 부분만 읽어 이어 붙입니다.
+# - 그 외(수정/삭제로 인한 재작성 등)는 전체를 다시 읽습니다.
+# - 개행으로 끝나지 않는 마지막 줄은 다른 쓰기가 <파일>.lock을 잡고 있을 때(쓰는 중)만 다음으로 미루고,
+#   그렇지 않으면(다른 도구로 저장해 끝 개행이 없는 파일) 그대로 읽습니다. 미룬 바이트가 있는 캐시 항목은
+#   파일이 그대로여도 다음 호출에서 다시 확인합니다.
+# 반환되는 DataFrame은 여러 세션이 공유하므로 호출 측에서 제자리 수정하지 말고 copy() 후 사용하세요.
+
+_FINGERPRINT_BYTES = 256  # append 판별용으로 비교할 머리/꼬리 바이트 수
+
+_cache = {}  # 절대경로 -> _CacheEntry
+_cache_lock = threading.Lock()
+
+
+class _CacheEntry:
+    def __init__(self, df: pd.DataFrame, stat_key: tuple, size: int, head: bytes, tail: bytes):
+        self.df = df
+        self.stat_key = stat_key  # (mtime_ns, 파일 크기)
+        self.size = size  # 파싱이 끝난 바이트 위치 (다음 꼬리 읽기의 시작점)
+        self.head = head
+        self.tail = tail
+
+
+def _complete_end(path: str, data: bytes, at_eof: bool) -> int:
+    # 파싱할 바이트 수: 마지막 개행까지, 단 파일 끝까지 읽었고 쓰는 중인 쓰기가 없으면 끝까지
+    end = data.rfind(b"\n") + 1
+    if end < len(data) and at_eof and not writer_active(path + ".lock"):
+        end = len(data)
+    return end
+
+
+def _read_full(path: str, columns=None):
+    with open(path, "rb") as f:
+        data = f.read()
+    end = _complete_end(path, data, at_eof=True)
+    body = data[:end]
+    if body.strip():
+        df = pd.read_csv(io.BytesIO(body), encoding="utf-8-sig")
+    else:
+        df = pd.DataFrame(columns=columns or [])
+    return df, end, body[:_FINGERPRINT_BYTES], body[-_FINGERPRINT_BYTES:]
+
+
+def _read_tail(path: str, entry: _CacheEntry, new_size: int):
+    # 이전에 읽은 구간의 머리/꼬리가 그대로인지 확인 후, 그 뒤 바이트만 파싱
+    with open(path, "rb") as f:
+        if f.read(len(entry.head)) != entry.head:
+            return None
+        f.seek(entry.size - len(entry.tail))
+        if f.read(len(entry.tail)) != entry.tail:
+            return None
+        data = f.read(new_size - entry.size)
+        at_eof = not f.read(1)
+    end = _complete_end(path, data, at_eof)
+    if end == 0:
+        return entry.df, entry.size, entry.tail
+    chunk = data[:end]
+    df_tail = pd.read_csv(io.BytesIO(chunk), header=None, names=list(entry.df.columns), encoding="utf-8")
+    df = pd.concat([entry.df, df_tail], ignore_index=True)
+    return df, entry.size + end, (entry.tail + chunk)[-_FINGERPRINT_BYTES:]
+
+
+def load_records(path: str, columns=None) -> pd.DataFrame:
+    """CSV 기록을 캐시를 거쳐 DataFrame으로 반환합니다. 파일이 없으면 빈 DataFrame."""
+    key = os.path.abspath(path)
+    try:
+        st_ = os.stat(key)
+    except FileNotFoundError:
+        with _cache_lock:
+            _cache.pop(key, None)
+        return pd.DataFrame(columns=columns or [])
+
+    stat_key = (st_.st_mtime_ns, st_.st_size)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.stat_key == stat_key:
+            return entry.df
+
+        if entry is not None and st_.st_size > entry.size and entry.head:
+            try:
+                result = _read_tail(key, entry, st_.st_size)
+            except Exception:
+                result = None
+            if result is not None:
+                df, size, tail = result
+                _cache[key] = _CacheEntry(df, _settled(stat_key, size), size, entry.head, tail)
+                return df
+
+        df, size, head, tail = _read_full(key, columns)
+        _cache[key] = _CacheEntry(df, _settled(stat_key, size), size, head, tail)
+        return df
+
+
+def _settled(stat_key: tuple, size: int):
+    # 미룬 바이트가 있으면 파일이 그대로여도 캐시가 맞지 않도록 (다음 호출에서 꼬리를 다시 확인)
+    return stat_key if size >= stat_key[1] else None
+
+
+def records_complete(path: str) -> bool:
+    """캐시된 파싱 결과가 파일 끝까지 읽은 것인지 (쓰는 중인 마지막 줄을 미루지 않았는지)."""
+    key = os.path.abspath(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+    try:
+        return entry is not None and entry.size >= os.path.getsize(key)
+    except FileNotFoundError:
+        return True
+
+
+def records_version(path: str):
+    # 데이터 버전 키 (파생 캐시의 키로 사용). 파일이 없으면 None
+    try:
+        st_ = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st_.st_mtime_ns, st_.st_size)
+
+
+def invalidate(path: str = None):
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
+
+
+# ---- 기록 스키마 ----
+csv_columns = ["날짜","아파트 이름","주소","관심 평형","부동산 유형","건물 연식","층수",
+               "매매가","월세","관리비","대출 가능 여부","교통 편의성","생활 편의시설",
+               "개발 호재","내부 상태","외관 상태","안전/보안","예상 수익률",
+               "공실 가능성","임대 수요","투자 적합성","개인 코멘트"]
+number_columns = ["건물 연식", "층수", "매매가", "월세", "관리비"]
+id_column = "id"
+# 저장소 열 = 입력 항목 + 저장 시 계산하는 파생 열 (normalize 참고)
+store_columns = csv_columns + derived_columns
+
+
+def _clean_value(col: str, v):
+    # 저장용 값 정규화: 빈 값/NaN은 None, 날짜는 ISO 문자열, numpy 스칼라는 파이썬 기본형
+    if v is None:
+        return None
+    if hasattr(v, "item") and not isinstance(v, (str, bytes)):
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    if isinstance(v, (datetime.date, datetime.datetime)):
+        return v.isoformat()
+    if isinstance(v, str) and v.strip() == "":
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _atomic_write(path: str, write, encoding: str = "utf-8-sig"):
+    # 같은 디렉터리의 임시 파일에 쓰고 fsync 후 rename으로 교체 (읽는 쪽은 항상 완전한 파일만 봄)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", newline="", encoding=encoding) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ---- 저장소 공통 조회 (페이지/검색) ----
+# 필터·정렬은 데이터 버전별 FilterIndex로 후보 행 위치에서 처리하고,
+# 화면에 보낼 구간(페이지)만 잘라 DataFrame으로 만듭니다.
+
+class _IndexedQueries:
+    def page(self, offset: int = 0, limit: int = 50, sort_by: str = None, descending: bool = False,
+             **filters):
+        """(해당 페이지 DataFrame, 필터 결과 전체 건수)를 반환합니다."""
+        idx = index_for(self, self.load())
+        pos = idx.search(**filters)
+        pos = idx.order(pos, sort_by, descending)
+        return idx.frame.iloc[pos[offset:offset + limit]], len(pos)
+
+    def search(self, text: str = "", limit: int = 20) -> pd.DataFrame:
+        # 이름/주소로 최근 기록부터 최대 limit건의 후보만 반환 (선택 목록용)
+        idx = index_for(self, self.load())
+        pos = idx.search(text=text or None)
+        return idx.frame.iloc[pos[::-1][:limit]]
+
+    def iter_pages(self, batch_size: int = 1000, sort_by: str = None, descending: bool = False,
+                   limit: int = None, **filters):
+        # 필터 결과를 batch_size 행씩 DataFrame으로 내보냄 (스트리밍 응답용, 검색은 한 번만 수행)
+        # 결과가 없어도 빈 DataFrame 하나는 내보냄 (내보내기 파일에 열 머리글이 남도록)
+        idx = index_for(self, self.load())
+        pos = idx.order(idx.search(**filters), sort_by, descending)
+        if limit is not None:
+            pos = pos[:limit]
+        for start in range(0, max(len(pos), 1), batch_size):
+            yield idx.frame.iloc[pos[start:start + batch_size]]
+
+
+# ---- 변경 통지 ----
+# 이 프로세스에서 커밋된 쓰기를 구독자에게 fn(이전 버전, 새 버전, 변경 목록)으로 알립니다.
+# 변경 목록 항목: ("upsert", id, 변경된 필드 dict) 또는 ("delete", id, None).
+# 통지는 쓰기 잠금 안에서 호출되므로 이전/새 버전 사이에 다른 쓰기가 끼어들지 않습니다.
+# 구독자는 자신이 가진 버전이 '이전 버전'과 다르면(다른 프로세스의 쓰기 등) 전체를 다시 읽어야 합니다.
+# 구독자 오류는 저장을 실패시키지 않고 로그와 notify_errors로 남깁니다. 구독자 버전이 '새 버전'으로
+# 넘어가지 않으므로 그 구독자는 다음 조회 때 전체를 다시 읽습니다.
+
+class _ChangeFeed:
+    notify_errors = 0  # 구독자 오류 수
+    last_notify_error = None
+
+    def subscribe(self, fn):
+        self._listeners.append(fn)
+
+    def _notify(self, before, after, events: list):
+        for fn in list(self._listeners):
+            try:
+                fn(before, after, events)
+            except Exception as e:
+                name = getattr(fn, "__qualname__", repr(fn))
+                log.exception("변경 통지 구독자 오류: %s", name)
+                self.notify_errors += 1  # 통지는 쓰기 잠금 안이므로 직렬화됨
+                self.last_notify_error = f"{name}: {type(e).__name__}: {e}"
+
+
+def snapshot(store):
+    """(버전, DataFrame)을 같은 버전으로 읽습니다.
+    구독자는 자기 잠금을 잡기 전에 이것으로 읽어야 합니다. 통지는 저장소 잠금 안에서 구독자 잠금을
+    잡으므로, 구독자 잠금 안에서 version()/load()를 부르면 잠금 순서가 엇갈려 교착됩니다."""
+    while True:
+        ver = store.version()
+        df = store.load()
+        if store.version() == ver:
+            return ver, df
+
+
+# ---- 저장소 백엔드 ----
+# 세 백엔드(csv, sqlite, partitioned) 모두 같은 인터페이스를 제공합니다.
+#   version() / load() / get(id) / insert(rec) / update(id, rec) / delete(id)
+#   insert_many(recs) / update_many([(id, rec)]) / delete_many(ids)
+#   query(...) / page(...) / search(text) / iter_pages(...) / import_csv(path) / export_csv()
+# load()/query()는 레코드 id를 인덱스로 하는 DataFrame(열: csv_columns)을 반환합니다.
+
+class CsvRecordStore(_IndexedQueries, _ChangeFeed):
+    # 단일 CSV 파일 저장소. id 열이 없는 기존 파일은 행 순서(1부터)를 id로 사용하며,
+    # 파일을 다시 쓸 때 id 열을 함께 기록합니다.
+    # 신규 기록은 CSV 끝에 append 하고, 수정/삭제는 파일 전체를 다시 쓰는 대신
+    # 작업 저널(<path>.journal, JSON lines)에 upsert/delete 항목 한 줄만 추가합니다.
+    # 읽을 때는 기본 CSV에 저널을 순서대로 적용하며, 저널이 journal_limit 바이트를 넘으면
+    # 백그라운드 스레드가 병합 결과로 기본 CSV를 원자적으로(임시 파일 + rename) 다시 씁니다.
+    # 모든 쓰기는 <path>.lock 파일 잠금으로 세션/프로세스 간 직렬화됩니다.
+    def __init__(self, path: str, columns=None, journal_limit: int = 256 * 1024):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.columns = list(columns or store_columns)
+        self.journal_limit = journal_limit
+        self.lock = FileLock(path + ".lock")
+        self.lock_stats = self.lock.stats
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._listeners = []
+        self._base = None
+        self._base_version = None
+        self._frame = None
+        self._frame_version = None
+        header = self._header()
+        if header and set(self.columns) - set(header):
+            # 파생 열이 없는 이전 형식 파일은 한 번에 정규화해 다시 씀 (끝까지 읽은 경우에만, compact 참고)
+            self.compact(transform=normalize_frame)
+
+    def version(self):
+        return (records_version(self.path), records_version(self.journal_path))
+
+    def _load_base(self) -> pd.DataFrame:
+        ver = records_version(self.path)
+        if self._base is not None and ver == self._base_version:
+            return self._base
+        raw = load_records(self.path, self.columns)
+        if id_column in raw.columns:
+            df = raw.set_index(id_column)
+        else:
+            df = raw.copy()
+            df.index = pd.RangeIndex(1, len(df) + 1)
+        df.index.name = id_column
+        df = df.reindex(columns=self.columns)
+        if records_complete(self.path):  # 쓰는 중이라 미룬 줄이 있으면 다음에 다시 읽음
+            self._base, self._base_version = df, ver
+        return df
+
+    def _read_journal(self):
+        # 반환: (id -> 변경 필드 dict, 삭제된 id 집합, 다음 id 하한)
+        upserts, deleted, seq = {}, set(), 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # 쓰는 중인 마지막 줄
+                    entry = json.loads(line)
+                    op, rid = entry.get("op"), entry.get("id")
+                    if op == "upsert":
+                        deleted.discard(rid)
+                        upserts.setdefault(rid, {}).update(entry["record"])
+                    elif op == "delete":
+                        upserts.pop(rid, None)
+                        deleted.add(rid)
+                    elif op == "seq":
+                        seq = max(seq, entry["next"])
+        except FileNotFoundError:
+            pass
+        return upserts, deleted, seq
+
+    def load(self) -> pd.DataFrame:
+        ver = self.version()
+        if self._frame is not None and ver == self._frame_version:
+            return self._frame
+        df = self._load_base()
+        upserts, deleted, _ = self._read_journal()
+        if deleted:
+            df = df.drop(index=[rid for rid in deleted if rid in df.index])
+        changed = [rid for rid in upserts if rid in df.index]
+        if changed:
+            rows = df.loc[changed].astype(object)
+            for rid in changed:
+                for c, v in upserts[rid].items():
+                    if c in rows.columns:
+                        rows.at[rid, c] = v
+            df = pd.concat([df.drop(index=changed), rows.infer_objects()]).sort_index()
+        self._frame, self._frame_version = df, ver
+        return df
+
+    def count(self) -> int:
+        return len(self.load())
+
+    def get(self, rid: int):
+        df = self.load()
+        if rid not in df.index:
+            return None
+        return {c: _clean_value(c, v) for c, v in df.loc[rid].items()}
+
+    def _header(self):
+        try:
+            with open(self.path, "r", newline="", encoding="utf-8-sig") as f:
+                return next(csv.reader(f), None)
+        except FileNotFoundError:
+            return None
+
+    def _ends_with_newline(self) -> bool:
+        # 다른 도구로 저장해 끝 개행이 없는 파일에 append하면 마지막 행에 붙어 버리므로 확인
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except (FileNotFoundError, OSError):  # 없거나 빈 파일
+            return True
+
+    def insert(self, record: dict) -> int:
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records, ids=None) -> list:
+        # ids를 주면 그 id로 기록 (분할 저장소가 전역 id를 부여하는 경우)
+        with self.lock:
+            header = self._header()
+            if header is not None and set(self.columns) - set(header):
+                # 열 때 이후 다른 도구가 파일을 바꿔 저장 열이 빠졌으면 먼저 보정 (빠진 열의 값을 잃지 않도록)
+                self.compact(transform=normalize_frame)
+                header = self._header()
+            base = self._load_base()
+            if ids is not None and base.index.isin(ids).any():
+                # 저널에서 삭제된 행이 기본 파일에 남아 있으면 먼저 병합해 id 충돌을 없앰
+                self.compact()
+                base = self._load_base()
+                if base.index.isin(ids).any():
+                    raise ValueError("이미 존재하는 id입니다.")
+            before = self.version()
+            # 저널에서 삭제됐거나 압축으로 사라진 id도 재사용하지 않도록 기본 파일/저널 양쪽의 최대값 이후로 부여
+            next_id = max(int(base.index.max()) if len(base) else 0, self._read_journal()[2] - 1) + 1
+            given = iter(ids) if ids is not None else None
+            ids, events = [], []
+            with open(self.path, "a", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                if header is not None and not self._ends_with_newline():
+                    f.write("\r\n")
+                if header is None:
+                    header = [id_column] + self.columns
+                    writer.writerow(header)
+                for rec in records:
+                    rid = int(next(given)) if given is not None else next_id
+                    rec = normalize_record({c: rec.get(c) for c in self.columns})
+                    fields = {c: _clean_value(c, rec.get(c)) for c in self.columns}
+                    # 다른 도구로 저장한 파일은 열 순서가 다를 수 있으므로 파일 머리글 순서대로 씀
+                    row = {**fields, id_column: rid}
+                    writer.writerow(["" if row.get(c) is None else str(row.get(c)) for c in header])
+                    ids.append(rid)
+                    events.append(("upsert", rid, fields))
+                    next_id = max(next_id, rid) + 1
+            self._notify(before, self.version(), events)
+        return ids
+
+    def _append_journal(self, entries: list):
+        # 여러 항목도 한 번의 잠금/append로 기록
+        with self.lock:
+            before = self.version()
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+                size = f.tell()
+            self._notify(before, self.version(),
+                         [("upsert" if e["op"] == "upsert" else "delete", e["id"], e.get("record")) for e in entries])
+        if size > self.journal_limit:
+            self._schedule_compaction()
+
+    def update(self, rid: int, record: dict) -> bool:
+        return self.update_many([(rid, record)])[0]
+
+    def update_many(self, items) -> list:
+        # items: (id, 변경 필드 dict) 목록. 반환: 항목별 성공 여부 (없는 id는 False)
+        present = set(self.load().index.tolist())
+        entries, ok = [], []
+        for rid, record in items:
+            rid = int(rid)
+            if rid not in present:
+                ok.append(False)
+                continue
+            record = normalize_record({c: record[c] for c in self.columns if c in record})
+            fields = {c: _clean_value(c, record[c]) for c in self.columns if c in record}
+            entries.append({"op": "upsert", "id": rid, "record": fields})
+            ok.append(True)
+        if entries:
+            self._append_journal(entries)
+        return ok
+
+    def delete(self, rid: int) -> bool:
+        return self.delete_many([rid])[0]
+
+    def delete_many(self, ids) -> list:
+        present = set(self.load().index.tolist())
+        entries, ok = [], []
+        for rid in ids:
+            rid = int(rid)
+            ok.append(rid in present)
+            if rid in present:
+                present.discard(rid)
+                entries.append({"op": "delete", "id": rid})
+        if entries:
+            self._append_journal(entries)
+        return ok
+
+    def _schedule_compaction(self):
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="csv-journal-compactor", daemon=True)
+            self._compactor.start()
+
+    def compact(self, transform=None):
+        # 병합 결과로 기본 CSV를 원자적으로 교체한 뒤 저널을 비웁니다.
+        # 교체 직후 중단되더라도 남은 저널 항목은 다시 적용해도 같은 결과(멱등)입니다.
+        # transform(df)가 주어지면 병합 결과를 변환해 기록합니다 (파생 열 보정 등).
+        # 기본 파일을 끝까지 읽지 못했으면(바이트를 미룬 읽기) 다시 쓰지 않습니다 — 행이 영구히 사라지므로.
+        # 반환: 다시 썼는지 여부
+        with self.lock:
+            before = self.version()
+            df = self.load()
+            if not records_complete(self.path):
+                return False
+            if transform is not None:
+                df = transform(df)
+            base = self._load_base()
+            next_id = max(int(base.index.max()) if len(base) else 0, self._read_journal()[2] - 1) + 1
+            _atomic_write(self.path, lambda f: df.reset_index().to_csv(f, index=False))
+            _atomic_write(self.journal_path, lambda f: f.write(json.dumps({"op": "seq", "next": next_id}) + "\n"),
+                          encoding="utf-8")
+            if transform is None:
+                # 내용은 그대로이고 버전만 바뀜
+                self._notify(before, self.version(), [])
+        return True
+
+    def query(self, **filters) -> pd.DataFrame:
+        return index_for(self, self.load()).filter(**filters)
+
+    def import_csv(self, path: str) -> int:
+        src = pd.read_csv(path, encoding="utf-8-sig")
+        return len(self.insert_many(src.to_dict("records")))
+
+    def export_csv(self) -> bytes:
+        return self.load().to_csv(index=False).encode("utf-8-sig")
+
+
+class SqliteRecordStore(_IndexedQueries, _ChangeFeed):
+    # 내장 SQLite(WAL) 저장소. 각 레코드는 INTEGER PRIMARY KEY(id)를 가지며
+    # 날짜/부동산 유형/매매가에 인덱스를 두어 단건 수정·삭제와 범위 필터를 O(log N)으로 처리합니다.
+    # 연결 하나를 세션(스레드) 간에 공유하므로 모든 접근은 잠금으로 직렬화하고,
+    # 프로세스 간 쓰기 충돌은 SQLite 자체 잠금(BEGIN IMMEDIATE + busy timeout)으로 대기합니다.
+    def __init__(self, path: str, columns=None):
+        self.path = path
+        self.columns = list(columns or store_columns)
+        self.lock_stats = LockStats()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._frame = None
+        self._frame_version = None
+        self._listeners = []
+        self._ensure_schema()
+
+    @staticmethod
+    def _q(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _col_type(c: str) -> str:
+        if c in number_columns:
+            return "NUMERIC"
+        return "REAL" if c in derived_columns else "TEXT"
+
+    def _ensure_schema(self):
+        col_defs = ", ".join(f"{self._q(c)} {self._col_type(c)}" for c in self.columns)
+        with self._lock:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY AUTOINCREMENT, {col_defs})")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(records)")}
+            for c in self.columns:
+                if c not in existing:
+                    self._conn.execute(f"ALTER TABLE records ADD COLUMN {self._q(c)} {self._col_type(c)}")
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_date ON records("날짜")')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_type ON records("부동산 유형")')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_records_price ON records("매매가")')
+            self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            self._conn.execute("INSERT OR IGNORE INTO store_meta VALUES ('version', 0)")
+            # 정규화 규칙 버전: 이전 버전으로 저장된 행은 열기 시 한 번 보정
+            self._conn.execute("INSERT OR IGNORE INTO store_meta VALUES ('normalized', 0)")
+            done = self._conn.execute("SELECT value FROM store_meta WHERE key = 'normalized'").fetchone()[0]
+        if done < NORMALIZE_VERSION:
+            self._backfill()
+
+    def _backfill(self):
+        # 기존 행의 숫자 열/파생 열을 열 단위로 한 번에 계산해 한 트랜잭션으로 갱신
+        df = self._select()
+        targets = [c for c in self.columns if c in number_columns or c in derived_columns]
+        with self._tx() as conn:
+            if len(df):
+                norm = normalize_frame(df)[targets]
+                rows = [[_clean_value(c, v) for c, v in zip(targets, vals)] + [int(rid)]
+                        for rid, vals in zip(norm.index.tolist(), norm.itertuples(index=False, name=None))]
+                sets = ", ".join(f"{self._q(c)} = ?" for c in targets)
+                conn.executemany(f"UPDATE records SET {sets} WHERE id = ?", rows)
+            conn.execute("UPDATE store_meta SET value = ? WHERE key = 'normalized'", (NORMALIZE_VERSION,))
+
+    @contextlib.contextmanager
+    def _tx(self, events: list = None):
+        # 쓰기 트랜잭션: 성공 시 데이터 버전을 올리고 커밋, 실패 시 롤백.
+        # 호출자가 events에 담은 변경은 커밋 후 구독자에게 통지합니다.
+        t0 = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self.lock_stats.record(time.perf_counter() - t0)
+            try:
+                before = self._read_version()
+                yield self._conn
+                self._bump()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            # 변경이 없어도 버전은 올랐으므로 통지
+            self._notify(before, before + 1, events or [])
+
+    def _bump(self):
+        self._conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+
+    def _read_version(self):
+        return self._conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+
+    def version(self):
+        with self._lock:
+            return self._read_version()
+
+    def _select(self, where: str = "", params=(), order: str = "id") -> pd.DataFrame:
+        cols = ", ".join(self._q(c) for c in self.columns)
+        sql = f"SELECT id, {cols} FROM records {where} ORDER BY {order}"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=list(params), index_col="id")
+        return df
+
+    def load(self) -> pd.DataFrame:
+        ver = self.version()
+        if self._frame is not None and ver == self._frame_version:
+            return self._frame
+        df = self._select()
+        self._frame, self._frame_version = df, ver
+        return df
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def get(self, rid: int):
+        cols = ", ".join(self._q(c) for c in self.columns)
+        with self._lock:
+            row = self._conn.execute(f"SELECT {cols} FROM records WHERE id = ?", (int(rid),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self.columns, row))
+
+    def insert(self, record: dict) -> int:
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records, ids=None) -> list:
+        # ids를 주면 그 id로 기록 (삭제 되돌리기 등). 이미 있는 id면 ValueError
+        cols = ", ".join(self._q(c) for c in self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        sql = f"INSERT INTO records ({cols}) VALUES ({marks})"
+        sql_id = f"INSERT INTO records (id, {cols}) VALUES (?, {marks})"
+        given = iter(ids) if ids is not None else None
+        ids, events = [], []
+        with self._tx(events) as conn:
+            for rec in records:
+                rec = normalize_record({c: rec.get(c) for c in self.columns})
+                fields = {c: _clean_value(c, rec.get(c)) for c in self.columns}
+                if given is not None:
+                    rid = int(next(given))
+                    try:
+                        conn.execute(sql_id, [rid] + list(fields.values()))
+                    except sqlite3.IntegrityError as e:
+                        raise ValueError("이미 존재하는 id입니다.") from e
+                else:
+                    rid = conn.execute(sql, list(fields.values())).lastrowid
+                ids.append(rid)
+                events.append(("upsert", rid, fields))
+        return ids
+
+    def update(self, rid: int, record: dict) -> bool:
+        return self.update_many([(rid, record)])[0]
+
+    def update_many(self, items) -> list:
+        # 한 트랜잭션으로 여러 건 수정. 반환: 항목별 성공 여부 (없는 id는 False)
+        ok, events = [], []
+        with self._tx(events) as conn:
+            for rid, record in items:
+                record = normalize_record({c: record[c] for c in self.columns if c in record})
+                cols = [c for c in self.columns if c in record]
+                if not cols:
+                    hit = conn.execute("SELECT 1 FROM records WHERE id = ?", (int(rid),)).fetchone()
+                    ok.append(hit is not None)
+                    continue
+                sets = ", ".join(f"{self._q(c)} = ?" for c in cols)
+                fields = {c: _clean_value(c, record[c]) for c in cols}
+                cur = conn.execute(f"UPDATE records SET {sets} WHERE id = ?", list(fields.values()) + [int(rid)])
+                ok.append(cur.rowcount > 0)
+                if cur.rowcount > 0:
+                    events.append(("upsert", int(rid), fields))
+        return ok
+
+    def delete(self, rid: int) -> bool:
+        return self.delete_many([rid])[0]
+
+    def delete_many(self, ids) -> list:
+        ok, events = [], []
+        with self._tx(events) as conn:
+            for rid in ids:
+                cur = conn.execute("DELETE FROM records WHERE id = ?", (int(rid),))
+                ok.append(cur.rowcount > 0)
+                if cur.rowcount > 0:
+                    events.append(("delete", int(rid), None))
+        return ok
+
+    def query(self, date_from=None, date_to=None, types=None,
+              price_min=None, price_max=None, text=None) -> pd.DataFrame:
+        # 날짜/유형/매매가 조건은 인덱스를 타는 WHERE 절로 변환
+        conds, params = [], []
+        if date_from is not None:
+            conds.append('"날짜" >= ?')
+            params.append(str(date_from))
+        if date_to is not None:
+            conds.append('"날짜" <= ?')
+            params.append(str(date_to))
+        if types:
+            conds.append(f'"부동산 유형" IN ({", ".join("?" for _ in types)})')
+            params.extend(types)
+        if price_min:
+            conds.append('"매매가" >= ?')
+            params.append(price_min)
+        if price_max:
+            conds.append('"매매가" <= ?')
+            params.append(price_max)
+        if text:
+            conds.append('("아파트 이름" LIKE ? ESCAPE \'\\\' OR "주소" LIKE ? ESCAPE \'\\\')')
+            pat = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params.extend([pat, pat])
+        if not conds:
+            return self.load()
+        return self._select("WHERE " + " AND ".join(conds), params)
+
+    def import_csv(self, path: str) -> int:
+        src = pd.read_csv(path, encoding="utf-8-sig")
+        return len(self.insert_many(src.to_dict("records")))
+
+    def export_csv(self) -> bytes:
+        return self.load().to_csv(index=False).encode("utf-8-sig")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PartitionedRecordStore(_ChangeFeed):
+    # 작성자별·방문 월별로 나눈 CSV 저장소. 구조:
+    #   <root>/manifest.json            파티션 목록(작성자, 월, 행 수, id 범위)과 전역 id 순번
+    #   <root>/<작성자>/<YYYY-MM>.csv   파티션 하나 = CsvRecordStore 하나 (저널/압축 포함)
+    # 저장은 해당 레코드의 파티션과 manifest만 건드리고, 날짜 범위/작성자 조건이 있는 조회는
+    # manifest로 겹치는 파티션만 골라 읽습니다(파티션 가지치기). 조건 없는 '최근 등록순' 조회는
+    # id 범위가 큰 파티션부터 필요한 만큼만 읽습니다.
+    # 모든 쓰기는 manifest 잠금으로 세션/프로세스 간 직렬화됩니다.
+    owner_column = "작성자"
+    _UNKNOWN_MONTH = "unknown"
+
+    def __init__(self, root: str, columns=None, default_owner: str = "default"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.columns = list(columns or store_columns)
+        self.default_owner = default_owner
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock = FileLock(self.manifest_path + ".lock")
+        self.lock_stats = self.lock.stats
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._parts = {}
+        self._manifest = None
+        self._manifest_version = None
+        self._views = {}  # 파티션 (키, 버전) 묶음 -> (DataFrame, FilterIndex), 최근 몇 개만 보관
+        self._pending = None  # 쓰기 중 파티션에서 올라온 변경 통지
+
+    # -- manifest / 파티션 --
+    def version(self):
+        return records_version(self.manifest_path)
+
+    def manifest(self) -> dict:
+        ver = self.version()
+        with self._lock:
+            if self._manifest is not None and ver == self._manifest_version:
+                return self._manifest
+        if ver is None:
+            man = {"version": 0, "next_id": 1, "partitions": {}}
+        else:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                man = json.load(f)
+        with self._lock:
+            self._manifest, self._manifest_version = man, ver
+        return man
+
+    def _write_manifest(self, man: dict):
+        man["version"] += 1
+        _atomic_write(self.manifest_path, lambda f: json.dump(man, f, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    @staticmethod
+    def check_owner(owner) -> str:
+        """작성자 이름 검증: 비었거나 점(.)으로만 된 이름('.', '..' 등)은 ValueError."""
+        name = "" if owner is None else str(owner)
+        if not name.strip() or not name.strip().strip("."):
+            raise ValueError(f"사용할 수 없는 작성자 이름입니다: {name!r}")
+        return name
+
+    @staticmethod
+    def _key(owner: str, month: str) -> str:
+        # 작성자는 디렉터리 이름이 되므로 '/'까지 인코딩하고, 맨 앞 점도 인코딩해 '.'/'..'/숨김 디렉터리가 되지 않게 함
+        name = urllib.parse.quote(owner, safe="")
+        if name.startswith("."):
+            name = "%2E" + name[1:]
+        return name + "/" + month
+
+    def _route(self, rec: dict):
+        owner = self.check_owner(_clean_value(self.owner_column, rec.get(self.owner_column)) or self.default_owner)
+        date = _clean_value("날짜", rec.get("날짜"))
+        month = str(date)[:7] if date else ""
+        if not re.fullmatch(r"\d{4}-\d{2}", month):
+            month = self._UNKNOWN_MONTH
+        return owner, month
+
+    def _part(self, key: str) -> CsvRecordStore:
+        with self._lock:
+            part = self._parts.get(key)
+            if part is None:
+                path = os.path.join(self.root, *key.split("/")) + ".csv"
+                root = os.path.abspath(self.root)
+                if os.path.commonpath([root, os.path.abspath(path)]) != root:
+                    raise ValueError(f"저장소 밖을 가리키는 파티션입니다: {key}")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                part = CsvRecordStore(path, self.columns)
+                owner = urllib.parse.unquote(key.split("/")[0])
+                part.subscribe(lambda before, after, events, owner=owner: self._collect(events, owner))
+                self._parts[key] = part
+            return part
+
+    def _collect(self, events: list, owner: str):
+        # 파티션의 변경을 모아 두었다가 manifest 갱신 후 한 번에 통지 (작성자 열을 채워서)
+        if self._pending is not None:
+            self._pending.extend((op, rid, fields if op == "delete" else {**fields, self.owner_column: owner})
+                                 for op, rid, fields in events)
+
+    def owners(self) -> list:
+        return sorted({p["owner"] for p in self.manifest()["partitions"].values()})
+
+    def partitions(self, owner=None, date_from=None, date_to=None) -> list:
+        # 작성자/날짜 범위와 겹치는 파티션 키 (월 단위로 비교)
+        lo = str(date_from)[:7] if date_from else None
+        hi = str(date_to)[:7] if date_to else None
+        keys = []
+        for key, meta in self.manifest()["partitions"].items():
+            if owner is not None and meta["owner"] != owner:
+                continue
+            if lo or hi:
+                if meta["month"] == self._UNKNOWN_MONTH:
+                    continue
+                if (lo and meta["month"] < lo) or (hi and meta["month"] > hi):
+                    continue
+            keys.append(key)
+        return sorted(keys)
+
+    def _view(self, keys: list):
+        # 선택한 파티션만 합친 DataFrame과 FilterIndex (파티션 버전이 같으면 재사용)
+        man = self.manifest()["partitions"]
+        sig = tuple((k, self._part(k).version()) for k in keys)
+        with self._lock:
+            hit = self._views.get(sig)
+            if hit is not None:
+                return hit
+        frames = [self._part(k).load().assign(**{self.owner_column: man[k]["owner"]}) for k in keys]
+        if frames:
+            df = pd.concat(frames).sort_index()
+        else:
+            df = pd.DataFrame(columns=self.columns + [self.owner_column])
+            df.index.name = id_column
+        hit = (df, FilterIndex(df))
+        with self._lock:
+            if len(self._views) >= 8:
+                self._views.pop(next(iter(self._views)))
+            self._views[sig] = hit
+        return hit
+
+    # -- 조회 --
+    def load(self) -> pd.DataFrame:
+        return self._view(self.partitions())[0]
+
+    def count(self) -> int:
+        return sum(p["rows"] for p in self.manifest()["partitions"].values())
+
+    def _locate(self, rid: int, man: dict = None):
+        for key, meta in (man or self.manifest())["partitions"].items():
+            if meta["rows"] and meta["min_id"] <= rid <= meta["max_id"] and rid in self._part(key).load().index:
+                return key
+        return None
+
+    def get(self, rid: int):
+        key = self._locate(int(rid))
+        if key is None:
+            return None
+        rec = self._part(key).get(int(rid))
+        rec[self.owner_column] = self.manifest()["partitions"][key]["owner"]
+        return rec
+
+    def page(self, offset: int = 0, limit: int = 50, sort_by: str = None, descending: bool = False,
+             owner=None, **filters):
+        """(해당 페이지 DataFrame, 필터 결과 전체 건수)를 반환합니다."""
+        keys = self.partitions(owner, filters.get("date_from"), filters.get("date_to"))
+        if sort_by in (None, "id") and not any(filters.values()):
+            # 조건 없는 등록순 조회: id 범위로 필요한 파티션만 읽음
+            man = self.manifest()["partitions"]
+            need = offset + limit
+            ordered = sorted(keys, key=lambda k: man[k]["max_id"] if descending else -man[k]["min_id"], reverse=True)
+            chosen, ids = [], []
+            for k in ordered:
+                if not man[k]["rows"]:
+                    continue
+                if len(ids) >= need:
+                    kth = sorted(ids, reverse=descending)[need - 1]
+                    if (descending and man[k]["max_id"] < kth) or (not descending and man[k]["min_id"] > kth):
+                        break
+                chosen.append(k)
+                ids.extend(self._part(k).load().index.tolist())
+            df, idx = self._view(sorted(chosen))
+            pos = idx.order(idx.search(), None, descending)
+            return df.iloc[pos[offset:offset + limit]], sum(man[k]["rows"] for k in keys)
+        df, idx = self._view(keys)
+        pos = idx.order(idx.search(**filters), sort_by, descending)
+        return df.iloc[pos[offset:offset + limit]], len(pos)
+
+    def search(self, text: str = "", limit: int = 20, owner=None) -> pd.DataFrame:
+        return self.page(0, limit, None, True, owner=owner, text=text or None)[0]
+
+    def iter_pages(self, batch_size: int = 1000, sort_by: str = None, descending: bool = False,
+                   limit: int = None, owner=None, **filters):
+        df, idx = self._view(self.partitions(owner, filters.get("date_from"), filters.get("date_to")))
+        pos = idx.order(idx.search(**filters), sort_by, descending)
+        if limit is not None:
+            pos = pos[:limit]
+        for start in range(0, max(len(pos), 1), batch_size):
+            yield df.iloc[pos[start:start + batch_size]]
+
+    def query(self, owner=None, **filters) -> pd.DataFrame:
+        df, idx = self._view(self.partitions(owner, filters.get("date_from"), filters.get("date_to")))
+        return idx.filter(**filters)
+
+    # -- 쓰기 --
+    @contextlib.contextmanager
+    def _write(self):
+        # manifest 잠금 안에서 파티션 쓰기를 모아 한 번에 manifest 갱신 + 변경 통지
+        with self.lock:
+            before = self.version()
+            man = json.loads(json.dumps(self.manifest()))  # 수정용 사본
+            self._pending = []
+            try:
+                yield man
+                self._write_manifest(man)
+                events, self._pending = self._pending, None
+            finally:
+                self._pending = None
+            self._notify(before, self.version(), events)
+
+    @staticmethod
+    def _meta_add(man: dict, key: str, owner: str, month: str, ids: list):
+        meta = man["partitions"].setdefault(key, {"owner": owner, "month": month, "rows": 0,
+                                                  "min_id": None, "max_id": None})
+        meta["rows"] += len(ids)
+        meta["min_id"] = min(ids + ([meta["min_id"]] if meta["min_id"] is not None else []))
+        meta["max_id"] = max(ids + ([meta["max_id"]] if meta["max_id"] is not None else []))
+
+    def insert(self, record: dict) -> int:
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records, ids=None) -> list:
+        # ids를 주면 그 id로 기록 (삭제 되돌리기 등). 이미 있는 id면 ValueError
+        given = iter(ids) if ids is not None else None
+        with self._write() as man:
+            groups, ids = {}, []
+            for rec in records:
+                owner, month = self._route(rec)
+                if given is not None:
+                    rid = int(next(given))
+                    if self._locate(rid, man) is not None:
+                        raise ValueError("이미 존재하는 id입니다.")
+                    man["next_id"] = max(man["next_id"], rid + 1)
+                else:
+                    rid = man["next_id"]
+                    man["next_id"] += 1
+                groups.setdefault((owner, month), []).append((rid, rec))
+                ids.append(rid)
+            for (owner, month), items in groups.items():
+                key = self._key(owner, month)
+                self._part(key).insert_many([r for _, r in items], ids=[i for i, _ in items])
+                self._meta_add(man, key, owner, month, [i for i, _ in items])
+        return ids
+
+    def update(self, rid: int, record: dict) -> bool:
+        return self.update_many([(rid, record)])[0]
+
+    def update_many(self, items) -> list:
+        # 날짜의 월이나 작성자가 바뀌면 파티션 사이에서 이동(같은 id 유지)
+        ok = []
+        with self._write() as man:
+            for rid, record in items:
+                rid = int(rid)
+                key = self._locate(rid, man)
+                if key is None:
+                    ok.append(False)
+                    continue
+                meta = man["partitions"][key]
+                current = self._part(key).get(rid)
+                merged = {**current, self.owner_column: meta["owner"], **record}
+                owner, month = self._route(merged)
+                new_key = self._key(owner, month)
+                if new_key == key:
+                    ok.append(self._part(key).update(rid, {c: v for c, v in record.items() if c != self.owner_column}))
+                    continue
+                self._part(key).delete(rid)
+                meta["rows"] -= 1
+                self._part(new_key).insert_many([merged], ids=[rid])
+                self._meta_add(man, new_key, owner, month, [rid])
+                ok.append(True)
+        return ok
+
+    def delete(self, rid: int) -> bool:
+        return self.delete_many([rid])[0]
+
+    def delete_many(self, ids) -> list:
+        ok = []
+        with self._write() as man:
+            for rid in ids:
+                key = self._locate(int(rid), man)
+                if key is None or not self._part(key).delete(int(rid)):
+                    ok.append(False)
+                    continue
+                man["partitions"][key]["rows"] -= 1
+                ok.append(True)
+        return ok
+
+    def import_csv(self, path: str) -> int:
+        src = pd.read_csv(path, encoding="utf-8-sig")
+        return len(self.insert_many(src.to_dict("records")))
+
+    def export_csv(self) -> bytes:
+        return self.load().to_csv(index=False).encode("utf-8-sig")
+
+
+def open_store(backend: str = None, path: str = None, legacy_csv: str = "real_estate_records.csv"):
+    # 저장소 선택: 인자 > 환경변수 RECORD_STORE_BACKEND > 기본값(sqlite)
+    backend = (backend or os.environ.get("RECORD_STORE_BACKEND", "sqlite")).lower()
+    if backend == "csv":
+        return CsvRecordStore(path or os.environ.get("RECORD_STORE_PATH", legacy_csv))
+    if backend == "sqlite":
+        path = path or os.environ.get("RECORD_STORE_PATH", "real_estate_records.db")
+        is_new = not os.path.isfile(path)
+        store = SqliteRecordStore(path)
+        # 최초 생성 시 기존 CSV 기록을 한 번 가져옵니다.
+        if is_new and legacy_csv and os.path.isfile(legacy_csv):
+            store.import_csv(legacy_csv)
+        return store
+    if backend == "partitioned":
+        root = path or os.environ.get("RECORD_STORE_PATH", "real_estate_records")
+        is_new = not os.path.isfile(os.path.join(root, "manifest.json"))
+        store = PartitionedRecordStore(root)
+        if is_new and legacy_csv and os.path.isfile(legacy_csv):
+            store.import_csv(legacy_csv)
+        return store
+    raise ValueError(f"알 수 없는 저장소 백엔드: {backend}")
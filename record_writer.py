@@ -0,0 +1,254 @@
+import collections
+import contextlib
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+# ---- 쓰기 직렬화 ----
+# 여러 세션(스레드)과 여러 프로세스가 같은 저장 파일에 쓰므로,
+# 모든 쓰기는 <파일>.lock 에 대한 advisory lock(flock)을 잡은 상태에서 수행합니다.
+# 파일 전체를 다시 쓰는 경우는 임시 파일 + rename(record_store._atomic_write)으로 교체합니다.
+
+
+class LockStats:
+    # 잠금 대기 시간 통계 (초 단위)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def record(self, wait: float):
+        with self._lock:
+            self.count += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.last_wait = wait
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "acquisitions": self.count,
+                "wait_total_ms": round(self.total_wait * 1000, 3),
+                "wait_max_ms": round(self.max_wait * 1000, 3),
+                "wait_last_ms": round(self.last_wait * 1000, 3),
+                "wait_avg_ms": round(self.total_wait / self.count * 1000, 3) if self.count else 0.0,
+            }
+
+
+_owners = {}  # 잠금 파일 절대경로 -> 이 프로세스에서 잠금을 잡고 있는 스레드 id
+
+
+def writer_active(lock_path: str) -> bool:
+    """다른 스레드/프로세스가 lock_path 잠금을 잡고 쓰는 중인지 (이 스레드가 잡고 있으면 False)."""
+    owner = _owners.get(os.path.abspath(lock_path))
+    if owner is not None:
+        return owner != threading.get_ident()
+    if fcntl is None:
+        return False
+    try:
+        fd = os.open(lock_path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    # 프로세스 간 advisory lock. 같은 스레드에서 중첩해서 잡아도 되도록 재진입을 허용합니다.
+    def __init__(self, path: str):
+        self.path = path
+        self._key = os.path.abspath(path)
+        self.stats = LockStats()
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        t0 = time.perf_counter()
+        self._rlock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._rlock.release()
+                raise
+            self.stats.record(time.perf_counter() - t0)
+            _owners[self._key] = threading.get_ident()
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
+            _owners.pop(self._key, None)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._rlock.release()
+        return False
+
+
+# ---- 배치 write-behind 큐 ----
+# 저장 버튼/자동 저장은 큐에 넣고 즉시 반환하며, 단일 백그라운드 스레드가
+# 쌓인 작업을 꺼내 연속된 신규 추가는 insert_many 한 번(한 트랜잭션/한 번의 append)으로 묶어 씁니다.
+# 작업마다 tag(예: 세션 id)를 붙일 수 있으며, context(tag)를 주면 각 쓰기를 그 컨텍스트 안에서 수행합니다
+# (변경 이력이 어느 세션의 쓰기인지 알 수 있도록). tag가 다른 추가는 한 묶음으로 합치지 않습니다.
+# 실패한 쓰기는 tag별로 모아 두었다가 take_failures(tag)로 그 tag(세션)에만 한 번 알려 줍니다.
+
+MAX_FAILURES = 20  # tag별로 보관하는 최근 실패 수
+
+class WriteBehindQueue:
+    def __init__(self, store, max_batch: int = 500, context=None):
+        self.store = store
+        self.max_batch = max_batch
+        self.context = context
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error = None  # 전체 기준 (디버그/지표용)
+        self._pending = collections.Counter()  # tag -> 아직 끝나지 않은 작업 수
+        self._failures = {}  # tag -> 최근 실패 메시지 목록
+        self._thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+        self._thread.start()
+
+    def _put(self, item: tuple):
+        with self._stats_lock:
+            self._pending[item[3]] += 1
+        self._queue.put(item)
+
+    def submit_insert(self, record: dict, tag=None):
+        self._put(("insert", None, dict(record), tag))
+
+    def submit_update(self, rid: int, record: dict, tag=None):
+        # id가 이미 사라졌다면 신규로 추가합니다 (기존 저장 로직과 동일)
+        self._put(("update", rid, dict(record), tag))
+
+    def depth(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def _busy(self, tag) -> bool:
+        if tag is None:
+            return bool(self._queue.unfinished_tasks)
+        with self._stats_lock:
+            return self._pending[tag] > 0
+
+    def flush(self, timeout: float = None, tag=None) -> bool:
+        # 대기 중인 쓰기(tag를 주면 그 tag의 쓰기만)가 끝날 때까지 대기 (timeout 초과 시 False)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._busy(tag):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(items)
+            finally:
+                with self._stats_lock:
+                    for item in items:
+                        self._pending[item[3]] -= 1
+                        if self._pending[item[3]] <= 0:
+                            del self._pending[item[3]]
+                for _ in items:
+                    self._queue.task_done()
+
+    def _context(self, tag):
+        return self.context(tag) if self.context is not None else contextlib.nullcontext()
+
+    def _apply(self, items: list):
+        pending, pending_tag = [], None  # 같은 tag의 연속된 insert 묶음
+        for op, rid, record, tag in items:
+            if op == "update" or tag != pending_tag:
+                self._write(pending, pending_tag)
+                pending, pending_tag = [], tag
+            if op == "update":
+                try:
+                    with self._context(tag):
+                        done = self.store.update(rid, record)
+                    if not done:
+                        pending.append(record)
+                    else:
+                        self._count(1)
+                except Exception as e:
+                    self._fail(e, tag)
+            else:
+                pending.append(record)
+        self._write(pending, pending_tag)
+
+    def _write(self, records: list, tag=None):
+        if not records:
+            return
+        try:
+            with self._context(tag):
+                self.store.insert_many(records)
+            self._count(len(records))
+        except Exception as e:
+            self._fail(e, tag)
+
+    def _count(self, n: int):
+        with self._stats_lock:
+            self.written += n
+            self.batches += 1
+
+    def _fail(self, e: Exception, tag=None):
+        msg = f"{type(e).__name__}: {e}"
+        with self._stats_lock:
+            self.errors += 1
+            self.last_error = msg
+            if tag is not None:
+                self._failures.setdefault(tag, collections.deque(maxlen=MAX_FAILURES)).append(msg)
+
+    def take_failures(self, tag) -> list:
+        """tag의 실패한 쓰기 메시지 (가져가면 비움)."""
+        with self._stats_lock:
+            return list(self._failures.pop(tag, ()))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = {
+                "queue_depth": self.depth(),
+                "written": self.written,
+                "batches": self.batches,
+                "errors": self.errors,
+                "last_error": self.last_error,
+            }
+        lock_stats = getattr(self.store, "lock_stats", None)
+        if lock_stats is not None:
+            out["lock"] = lock_stats.snapshot()
+        if hasattr(self.store, "notify_errors"):
+            out["notify_errors"] = self.store.notify_errors
+            out["last_notify_error"] = self.store.last_notify_error
+        return out
@@ -0,0 +1,168 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from filter_index import index_for
+from form_model import load_form
+
+# ---- 투자 점수 ----
+# 평가 항목(선택지)과 가격/수익률/연식을 0~1 특성 값으로 바꾼 행렬을 데이터 버전마다 한 번 만들고,
+# 가중치가 바뀌면 행렬-벡터 곱 두 번으로 전체 점수를 다시 계산합니다 (10만 건 기준 수 ms).
+# 값이 없는 특성은 점수에서 빼고 남은 가중치로 정규화하므로, 입력을 덜 한 기록이 불리해지지 않습니다.
+#   점수 = Σ(가중치 × 특성) / Σ(값이 있는 특성의 가중치) × 100
+
+# 선택지 → 점수 (모름/미입력은 값 없음)
+_SCALE = {"매우 좋음": 1.0, "좋음": 0.75, "보통": 0.5, "나쁨": 0.0}
+_FIT = {"매우 적합": 1.0, "적합": 0.67, "보통": 0.33, "부적합": 0.0}
+_YN = {"가능": 1.0, "미정": 0.5, "불가": 0.0}
+
+MAX_AGE = 40  # 이 연식 이상은 연식 점수 0
+
+# 특성 이름 -> 기본 가중치
+default_weights = {
+    "교통 편의성": 1.0,
+    "생활 편의시설": 1.0,
+    "내부 상태": 0.5,
+    "외관 상태": 0.5,
+    "안전/보안": 0.5,
+    "공실 가능성": 1.0,
+    "임대 수요": 1.0,
+    "투자 적합성": 1.5,
+    "대출 가능 여부": 0.5,
+    "가격": 1.0,
+    "수익률": 1.5,
+    "연식": 0.5,
+}
+
+
+def _robust_scale(x: np.ndarray, invert: bool = False) -> np.ndarray:
+    # 5~95 백분위로 잘라 0~1로 변환 (이상치 하나가 전체 분포를 누르지 않도록)
+    ok = ~np.isnan(x)
+    out = np.full(x.shape, np.nan, dtype=np.float32)
+    if not ok.any():
+        return out
+    lo, hi = np.percentile(x[ok], [5, 95])
+    span = hi - lo if hi > lo else 1.0
+    out[ok] = np.clip((x[ok] - lo) / span, 0, 1)
+    return 1 - out if invert else out
+
+
+def _num(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+class ScoreMatrix:
+    def __init__(self, df: pd.DataFrame, form=None):
+        form = form or load_form()
+        self.frame = df
+        self.ids = df.index.to_numpy()
+        self._pos_of = {int(rid): i for i, rid in enumerate(self.ids.tolist())}
+        scale = form.option_sets.get("scale", [])
+        rating_keys = [q["key"] for q in form.questions if q.get("options") == scale]
+
+        cols = {}
+        for key in rating_keys:
+            cols[key] = df[key].map(_SCALE) if key in df.columns else None
+        cols["투자 적합성"] = df["투자 적합성"].map(_FIT) if "투자 적합성" in df.columns else None
+        cols["대출 가능 여부"] = df["대출 가능 여부"].map(_YN) if "대출 가능 여부" in df.columns else None
+
+        price = _num(df, "매매가")
+        price = np.where(price > 0, price, np.nan)
+        # 수익률: 기록한 예상 수익률(중간값) 우선, 없으면 (월세 - 관리비) × 12 / 매매가
+        stated = _num(df, "수익률 중간(%)")
+        rent = _num(df, "월세")
+        fee = np.nan_to_num(_num(df, "관리비"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            derived = np.where(rent > 0, (rent - fee) * 12 / price * 100, np.nan)
+        self.yield_pct = np.where(np.isnan(stated), derived, stated)
+        self.price = price
+        age = _num(df, "건물 연식")
+
+        self.features = [k for k in default_weights if k in cols or k in ("가격", "수익률", "연식")]
+        mats = []
+        for k in self.features:
+            if k == "가격":
+                mats.append(_robust_scale(np.log(price), invert=True))
+            elif k == "수익률":
+                mats.append(_robust_scale(self.yield_pct))
+            elif k == "연식":
+                mats.append(np.clip(1 - age / MAX_AGE, 0, 1).astype(np.float32))
+            elif cols.get(k) is not None:
+                mats.append(cols[k].to_numpy(dtype=np.float32, na_value=np.nan))
+            else:
+                mats.append(np.full(len(df), np.nan, dtype=np.float32))
+        values = np.column_stack(mats) if mats else np.empty((len(df), 0), dtype=np.float32)
+        # (값, 존재 여부) 두 행렬로 나눠 두면 가중치 변경 시 재계산은 행렬-벡터 곱 두 번
+        self.present = (~np.isnan(values)).astype(np.float32)
+        self.values = np.nan_to_num(values).astype(np.float32)
+
+    def weight_vector(self, weights: dict = None) -> np.ndarray:
+        weights = {**default_weights, **(weights or {})}
+        return np.asarray([max(0.0, float(weights.get(k, 0))) for k in self.features], dtype=np.float32)
+
+    def scores(self, weights: dict = None) -> np.ndarray:
+        w = self.weight_vector(weights)
+        num = self.values @ w
+        den = self.present @ w
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(den > 0, num.astype(np.float64) / den * 100, np.nan)
+
+    def top_k(self, k: int = 10, weights: dict = None, positions: np.ndarray = None):
+        """(행 위치 배열, 점수 배열)을 점수 내림차순으로. positions로 후보(현재 필터 결과)를 제한."""
+        s = self.scores(weights)
+        cand = np.arange(len(s)) if positions is None else np.asarray(positions, dtype=np.int64)
+        sub = s[cand]
+        valid = ~np.isnan(sub)
+        cand, sub = cand[valid], sub[valid]
+        if not len(cand):
+            return cand, sub
+        k = min(k, len(cand))
+        # 부분 선택(O(n)) 후 k개만 정렬 — 힙 기반 top-k와 같은 결과를 배열 연산으로
+        part = np.argpartition(-sub, k - 1)[:k]
+        order = part[np.lexsort((cand[part], -sub[part]))]
+        return cand[order], sub[order]
+
+    def ranking(self, k: int = 10, weights: dict = None, positions: np.ndarray = None) -> pd.DataFrame:
+        pos, s = self.top_k(k, weights, positions)
+        out = self.frame.iloc[pos][["날짜", "아파트 이름", "주소", "부동산 유형", "매매가"]].copy()
+        out.insert(0, "점수", np.round(s, 1))
+        out["수익률(%)"] = np.round(self.yield_pct[pos], 2)
+        return out
+
+    def compare(self, ids: list, weights: dict = None) -> pd.DataFrame:
+        # 선택한 기록의 특성 점수/원본 값을 나란히 (행: 항목, 열: 기록)
+        pos = [self._pos_of[int(r)] for r in ids if int(r) in self._pos_of]
+        w = self.weight_vector(weights)
+        s = self.scores(weights)
+        rows = {"총점": np.round(s[pos], 1)}
+        for j, k in enumerate(self.features):
+            if w[j] <= 0:
+                continue
+            rows[f"{k} (가중치 {w[j]:g})"] = [round(float(self.values[p, j]) * 100) if self.present[p, j] else None
+                                            for p in pos]
+        rows["매매가"] = self.price[pos]
+        rows["수익률(%)"] = np.round(self.yield_pct[pos], 2)
+        labels = [f"{self.ids[p]}: {self.frame.iloc[p]['아파트 이름']}" for p in pos]
+        return pd.DataFrame(rows, index=labels).T
+
+
+# ---- 저장소 버전별 점수 행렬 캐시 ----
+_matrix_cache = {}  # id(store) -> (version, ScoreMatrix, FilterIndex)
+_matrix_lock = threading.Lock()
+
+
+def matrix_for(store):
+    """(ScoreMatrix, FilterIndex)를 반환합니다. 두 객체의 행 위치는 같은 프레임 기준."""
+    ver = store.version()
+    with _matrix_lock:
+        hit = _matrix_cache.get(id(store))
+        if hit is not None and hit[0] == ver:
+            return hit[1], hit[2]
+    idx = index_for(store, store.load())
+    matrix = ScoreMatrix(idx.frame)
+    with _matrix_lock:
+        _matrix_cache[id(store)] = (ver, matrix, idx)
+    return matrix, idx
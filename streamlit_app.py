@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
-import os
 import datetime
-import csv
+import os
+import uuid
+from streamlit.errors import StreamlitAPIException
+
+from app_resources import (csv_file, get_autocomplete, get_exporter, get_history, get_profiler, get_store,
+                           get_writer)
+from autocomplete import suggest_columns
+from bulk_import import import_records
+from form_model import load_form
+from profiling import leaf_spans
+from record_export import available_formats, file_name, mime_type
+from record_store import csv_columns
 
 # ---- 페이지 설정 ----
 st.set_page_config(page_title="부동산 임장 기록 챗봇 🏢", layout="centered")
@@ -19,191 +29,240 @@ if "answers" not in st.session_state:
 if "saved" not in st.session_state:
     st.session_state.saved = False  # 마지막 저장 완료 상태
 if "edit_index" not in st.session_state:
-    st.session_state.edit_index = None  # 편집 중인 행 인덱스 (없으면 신규)
+    st.session_state.edit_index = None  # 편집 중인 레코드 id (없으면 신규)
 if "auto_save" not in st.session_state:
     st.session_state.auto_save = False  # 마지막 단계에서 즉시 저장 트리거
-
-# ---- CSV 파일 경로 ----
-csv_file = "real_estate_records.csv"
-csv_columns = ["날짜","아파트 이름","주소","관심 평형","부동산 유형","건물 연식","층수",
-               "매매가","월세","관리비","대출 가능 여부","교통 편의성","생활 편의시설",
-               "개발 호재","내부 상태","외관 상태","안전/보안","예상 수익률",
-               "공실 가능성","임대 수요","투자 적합성","개인 코멘트"]
+if "profile_sid" not in st.session_state:
+    st.session_state.profile_sid = uuid.uuid4().hex[:8]  # 세션 구분자 (재실행 지표, 되돌리기 범위)
+
+# ---- 재실행 프로파일링 ----
+# 이번 실행을 하나의 런으로 기록합니다 (프래그먼트 단독 재실행은 각 프래그먼트가 별도 런으로 기록).
+prof = get_profiler()
+profile_sid = st.session_state.profile_sid
+prof.begin_run(profile_sid)
+
+# ---- 저장소 ----
+# 저장소/쓰기 큐는 페이지 간에 공유되도록 app_resources에서 프로세스당 한 번 만듭니다.
+with prof.span("resources"):
+    store = get_store()
+    writer = get_writer()
+    history = get_history()  # 저장소 변경 통지로 쌓이는 변경 이력
+    exporter = get_exporter()
+
+# 작성자·월별 분할 저장소(RECORD_STORE_BACKEND=partitioned)에서는 새 기록을 작성자 파티션에 저장하고,
+# '내 기록만 보기'로 조회 범위를 자기 파티션으로 좁힐 수 있습니다.
+owner_column = getattr(store, "owner_column", None)
+if owner_column:
+    st.sidebar.text_input("작성자", value=store.default_owner, key="owner")
+    if st.session_state.owner:
+        try:
+            store.check_owner(st.session_state.owner)
+        except ValueError as e:
+            st.sidebar.error(f"{e} 저장하려면 이름을 바꾸세요.")
+
+def save_record(row_values: list):
+    # 편집 모드면 해당 id 레코드를 갱신, 아니면(또는 id가 사라졌으면) 신규 추가.
+    # 쓰기 큐에 넣고 이 세션의 쓰기를 잠깐만 기다립니다. 그 안에 실패하면 예외로 알리고,
+    # 그 뒤에 실패하면 저장 기록 영역에서 이 세션에만 알립니다.
+    record = dict(zip(csv_columns, row_values))
+    edit_id = st.session_state.edit_index
+    with prof.span("save") as sp:
+        if edit_id is None:
+            if owner_column:
+                record[owner_column] = store.check_owner(st.session_state.owner or store.default_owner)
+            writer.submit_insert(record, tag=profile_sid)
+        else:
+            writer.submit_update(edit_id, record, tag=profile_sid)
+        sp.count(rows=1)
+        writer.flush(timeout=0.5, tag=profile_sid)
+    failures = writer.take_failures(profile_sid)
+    if failures:
+        raise RuntimeError(failures[-1])
+
+# ---- 내보내기 ----
+# 다운로드 버튼에는 파일 내용 대신 만드는 함수를 넘겨, 버튼을 누를 때만(별도 스레드에서) 파일을 만듭니다.
+# 재실행마다 전체 데이터를 읽어 CSV로 바꾸던 비용이 화면 렌더링에서 빠집니다.
+def export_payload(fmt: str, rows: int, sort_by=None, descending=False, filters: dict = None):
+    def build():
+        with prof.span("export.build") as sp:
+            data = exporter.read(fmt, sort_by, descending, **(filters or {}))
+            sp.count(rows=rows, bytes=len(data))
+        return data
+    return build
+
+# ---- 프래그먼트 재실행 ----
+# 화면은 빠른 보기 / 입력 흐름(진행 현황 + 단계 입력 + 완료·저장) / 저장 기록 영역의 프래그먼트로 나뉘며,
+# 각 영역 안의 위젯 조작은 그 영역만 다시 실행합니다. 다른 영역에 영향을 주는 동작(저장, 편집 불러오기 등)만
+# 앱 전체를 다시 실행합니다.
+def rerun_fragment():
+    # 프래그먼트 단독 재실행 중이 아니면(전체 실행 중 처리된 클릭 등) 앱 전체를 다시 실행
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
 # ---- 저장 데이터 보기(빠른 보기) 버튼 ----
 if "show_records_top" not in st.session_state:
     st.session_state.show_records_top = False  # 상단 빠른 보기 토글 초기화
-col_top_a, col_top_b = st.columns([0.6, 0.4])
-with col_top_b:
-    if st.button("📄 저장 데이터 보기", use_container_width=True):
-        st.session_state.show_records_top = not st.session_state.get("show_records_top", False)
-        st.rerun()
 
-if st.session_state.show_records_top:
-    st.markdown("### 📄 저장된 기록 (빠른 보기)")
-    if os.path.isfile(csv_file):
-        try:
-            df_quick = pd.read_csv(csv_file, encoding="utf-8-sig")
-            st.dataframe(df_quick, use_container_width=True)
-            with open(csv_file, "rb") as f:
-                st.download_button("⬇️ CSV 다운로드", f, file_name=csv_file, mime="text/csv")
-            st.caption("상세 검색/필터/편집은 페이지 하단의 '현재 저장된 기록' 섹션을 이용하세요.")
-        except Exception as e:
-            st.error(f"저장된 기록을 불러오지 못했습니다: {e}")
-    else:
-        st.info("아직 저장된 기록이 없습니다.")
-
-# ---- 질문 메타데이터 (csv_columns와 동일 순서 유지를 권장) ----
-scale_opts = ["매우 좋음","좋음","보통","나쁨","모름"]
-yn_opts = ["가능","불가","미정"]
-type_opts = ["아파트","오피스텔","빌라","주택","상가","토지","기타"]
-
-questions = [
-    {"key": "날짜", "label": "방문 날짜", "type": "date", "default": datetime.date.today()},
-    {"key": "아파트 이름", "label": "아파트/건물 이름", "type": "text"},
-    {"key": "주소", "label": "주소", "type": "text"},
-    {"key": "관심 평형", "label": "관심 평형(예: 84m²)", "type": "text"},
-    {"key": "부동산 유형", "label": "부동산 유형", "type": "select", "options": type_opts},
-    {"key": "건물 연식", "label": "건물 연식(년)", "type": "number", "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "층수", "label": "층수", "type": "number", "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "매매가", "label": "매매가(만원 단위 추천)", "type": "number"},
-    {"key": "월세", "label": "월세(만원)", "type": "number", "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "관리비", "label": "관리비(만원)", "type": "number", "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "대출 가능 여부", "label": "대출 가능 여부", "type": "select", "options": yn_opts},
-    {"key": "교통 편의성", "label": "교통 편의성", "type": "select", "options": scale_opts},
-    {"key": "생활 편의시설", "label": "생활 편의시설", "type": "select", "options": scale_opts},
-    {"key": "개발 호재", "label": "개발 호재(있다면 간단히)", "type": "text"},
-    {"key": "내부 상태", "label": "내부 상태", "type": "select", "options": scale_opts, "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "외관 상태", "label": "외관 상태", "type": "select", "options": scale_opts, "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "안전/보안", "label": "안전/보안", "type": "select", "options": scale_opts, "visible_if": {"key": "부동산 유형", "exclude": ["토지"]}},
-    {"key": "예상 수익률", "label": "예상 수익률(예: 4~5%)", "type": "text"},
-    {"key": "공실 가능성", "label": "공실 가능성", "type": "select", "options": scale_opts},
-    {"key": "임대 수요", "label": "임대 수요", "type": "select", "options": scale_opts},
-    {"key": "투자 적합성", "label": "투자 적합성", "type": "select", "options": ["매우 적합","적합","보통","부적합"]},
-    {"key": "개인 코멘트", "label": "개인 코멘트", "type": "textarea"},
-]
-
-# 필수 항목 정의 (미입력 시 다음 단계 제한 및 사이드바 표시)
-required_keys = {"날짜", "아파트 이름", "주소", "부동산 유형", "매매가"}
+@st.fragment
+@prof.fragment(profile_sid, "quick_view")
+def quick_view():
+    col_top_a, col_top_b = st.columns([0.6, 0.4])
+    with col_top_b:
+        if st.button("📄 저장 데이터 보기", use_container_width=True):
+            st.session_state.show_records_top = not st.session_state.get("show_records_top", False)
+            rerun_fragment()
+
+    if st.session_state.show_records_top:
+        st.markdown("### 📄 저장된 기록 (빠른 보기)")
+        if store.count() > 0:
+            try:
+                with prof.span("quick_view.page") as sp:
+                    df_quick, quick_total = store.page(limit=50, descending=True)
+                    sp.count(rows=len(df_quick))
+                st.dataframe(df_quick, use_container_width=True)
+                if quick_total > len(df_quick):
+                    st.caption(f"최근 {len(df_quick)}건만 표시합니다 (전체 {quick_total}건).")
+                st.download_button("⬇️ 전체 CSV(gzip) 다운로드", export_payload("csv.gz", quick_total),
+                                   file_name=file_name(csv_file, "csv.gz"), mime=mime_type("csv.gz"),
+                                   on_click="ignore", key="export_quick")
+                st.caption("상세 검색/필터/편집은 페이지 하단의 '현재 저장된 기록' 섹션을 이용하세요.")
+            except Exception as e:
+                st.error(f"저장된 기록을 불러오지 못했습니다: {e}")
+        else:
+            st.info("아직 저장된 기록이 없습니다.")
 
-# ---- 초기화 버튼 ----
-if st.sidebar.button("🧹 입력 초기화"):
-    st.session_state.step = 0
-    st.session_state.answers = {}
-    st.session_state.saved = False
-    st.rerun()
+quick_view()
+
+# ---- 질문 메타데이터 (form_schema.json, csv_columns와 동일 순서 유지를 권장) ----
+# 스키마 파일은 한 번 컴파일되어 캐시되며(파일이 바뀌면 다시 컴파일), 필수 항목·그룹·가시성 규칙을 포함합니다.
+with prof.span("form.load"):
+    form = load_form()
+questions = form.questions
+required_keys = form.required_keys  # 미입력 시 다음 단계 제한 및 사이드바 표시
+groups = form.groups
+type_opts = form.option_sets["type"]
 
 # ---- 순차 질문 UI ----
 st.markdown("### 💬 오늘 방문한 곳 정보를 단계별로 입력하세요")
 
-current = st.session_state.step
 total = len(questions)
 
 # ---- 가시성 규칙 처리 ----
-def is_visible(idx: int, answers: dict) -> bool:
-    q = questions[idx]
-    cond = q.get("visible_if")
-    if not cond:
-        return True
-    ref_key = cond.get("key")
-    ref_val = answers.get(ref_key)
-    if "include" in cond:
-        return ref_val in cond["include"]
-    if "exclude" in cond:
-        return ref_val not in cond["exclude"]
-    return True
-
-def get_visible_indices() -> list:
-    return [i for i in range(len(questions)) if is_visible(i, st.session_state.answers)]
+# 가시성 상태(mask)는 세션에 보관하고, 답 하나가 바뀌면 그 답에 의존하는 질문만 다시 평가합니다.
+def current_nav():
+    mask = st.session_state.get("vis_mask")
+    if mask is None or len(mask) != total:
+        mask = st.session_state.vis_mask = form.visibility(st.session_state.answers)
+    return form.nav(mask)
+
+def set_answer(key: str, value):
+    st.session_state.answers[key] = value
+    current_nav()
+    st.session_state.vis_mask = form.update_visibility(st.session_state.vis_mask, st.session_state.answers, key)
+
+def replace_answers(new_answers: dict):
+    st.session_state.answers = new_answers
+    st.session_state.vis_mask = form.visibility(new_answers)
+
+def commit_answer(q: dict, value) -> bool:
+    # 값 저장 (date는 문자열로 저장) 후 필수 검증
+    set_answer(q["key"], value.isoformat() if isinstance(value, datetime.date) else value)
+    return form.validate(q, st.session_state.answers.get(q["key"]))
 
-# ---- 사이드바 진행 메뉴 (안 2: 그룹핑 + 필수 배지) ----
-def _is_filled(key: str, qtype: str, val):
-    if val is None:
-        return False
-    if qtype in ("text", "textarea", "select"):
-        return str(val).strip() != ""
-    if qtype == "number":
-        try:
-            return float(val) > 0
-        except Exception:
-            return False
-    if qtype == "date":
-        return bool(val)
-    return False
-
-# 인덱스 그룹핑 정의 (모든 질문 인덱스 포함)
-groups = [
-    ("기본 정보", [0, 1, 2, 3, 4]),         # 날짜~유형
-    ("건물 정보", [5, 6]),                  # 연식, 층수
-    ("금액 정보", [7, 8, 9]),               # 매매가~관리비
-    ("상태/입지", [11, 12, 13, 14, 15, 16]),# 교통~안전/보안
-    ("투자 판단", [17, 18, 19, 20, 21]),    # 수익률~개인 코멘트
-]
-
-# 전체 진행률 계산
-filled_count = 0
-for i, q in enumerate(questions):
-    val = st.session_state.answers.get(q["key"])
-    if _is_filled(q["key"], q["type"], val):
-        filled_count += 1
-progress_ratio = filled_count / total if total else 0
-
-with st.sidebar:
-    st.markdown("#### 진행 현황")
-    st.progress(progress_ratio)
-    st.caption(f"{filled_count}/{total} 완료")
-
-    # 현재 가시성에 따라 필터링된 인덱스만 표시
-    visible_set = set(get_visible_indices())
-    for group_title, indices in groups:
-        st.markdown(f"**{group_title}**")
-        for i in indices:
-            if i >= total:
-                continue
-            if i not in visible_set:
-                continue
-            q = questions[i]
-            key = q["key"]
-            qtype = q["type"]
-            val = st.session_state.answers.get(key, "")
-            # 상태 아이콘
-            if i == current:
-                icon = "●"
-            else:
-                is_filled = _is_filled(key, qtype, val)
-                if is_filled:
-                    icon = "✓"
-                else:
-                    # 과거 단계인데 비어있으면 '건너뜀' 표시, 그 외는 대기
-                    icon = "⏭" if i < current else "○"
-
-            # 값 미리보기 (최대 12자)
-            preview = str(val)
-            if isinstance(val, float) and val.is_integer():
-                preview = str(int(val))
-            if len(preview) > 12:
-                preview = preview[:12] + "…"
-
-            # 필수 배지
-            badge = " (필수)" if key in required_keys else ""
-
-            col_a, col_b = st.columns([0.22, 0.78])
-            with col_a:
-                st.write(icon)
-            with col_b:
-                if st.button(f"{i+1}. {q['label']}{badge}", key=f"nav_{i}"):
-                    st.session_state.step = i
-                    st.rerun()
-                if preview:
-                    st.caption(preview)
-
-visible_indices = get_visible_indices()
-if current not in visible_indices and visible_indices:
-    # 가시성 변경으로 현재 단계가 숨겨졌다면, 가장 가까운 다음 가시 단계로 이동
-    st.session_state.step = visible_indices[0]
+# ---- 초기화 버튼 ----
+if st.sidebar.button("🧹 입력 초기화"):
+    st.session_state.step = 0
+    replace_answers({})
+    st.session_state.saved = False
     st.rerun()
 
-if visible_indices and current in visible_indices:
+# ---- 사이드바 진행 메뉴 (안 2: 그룹핑 + 필수 배지) ----
+@prof.span("input.sidebar")
+def render_progress(current: int, nav):
+    # 전체 진행률 계산
+    filled_count = 0
+    for i, q in enumerate(questions):
+        val = st.session_state.answers.get(q["key"])
+        if form.is_filled(q, val):
+            filled_count += 1
+    progress_ratio = filled_count / total if total else 0
+
+    with st.sidebar:
+        st.markdown("#### 진행 현황")
+        st.progress(progress_ratio)
+        st.caption(f"{filled_count}/{total} 완료")
+
+        # 현재 가시성에 따라 필터링된 인덱스만 표시
+        visible_set = nav.visible_set
+        for group_title, indices in groups:
+            st.markdown(f"**{group_title}**")
+            for i in indices:
+                if i >= total:
+                    continue
+                if i not in visible_set:
+                    continue
+                q = questions[i]
+                key = q["key"]
+                val = st.session_state.answers.get(key, "")
+                # 상태 아이콘
+                if i == current:
+                    icon = "●"
+                else:
+                    is_filled = form.is_filled(q, val)
+                    if is_filled:
+                        icon = "✓"
+                    else:
+                        # 과거 단계인데 비어있으면 '건너뜀' 표시, 그 외는 대기
+                        icon = "⏭" if i < current else "○"
+
+                # 값 미리보기 (최대 12자)
+                preview = str(val)
+                if isinstance(val, float) and val.is_integer():
+                    preview = str(int(val))
+                if len(preview) > 12:
+                    preview = preview[:12] + "…"
+
+                # 필수 배지
+                badge = " (필수)" if key in required_keys else ""
+
+                col_a, col_b = st.columns([0.22, 0.78])
+                with col_a:
+                    st.write(icon)
+                with col_b:
+                    if st.button(f"{i+1}. {q['label']}{badge}", key=f"nav_{i}"):
+                        st.session_state.step = i
+                        rerun_fragment()
+                    if preview:
+                        st.caption(preview)
+
+# ---- 입력 자동완성 ----
+# 아파트 이름/주소 단계에서 저장된 기록 중 입력값과 맞는 항목(초성 검색 포함)을 방문 횟수 순으로 보여 주고,
+# 고르면 가장 최근 방문 기록의 주소/부동산 유형/건물 연식을 함께 채웁니다.
+def pick_suggestion(q: dict, widget_key: str, suggestion: dict):
+    # 버튼 콜백: 입력칸 위젯 상태를 지워 다음 실행에서 고른 값(답)으로 다시 그려지게 함
+    st.session_state.pop(widget_key, None)
+    set_answer(q["key"], suggestion["value"])
+    for key, val in suggestion["prefill"].items():
+        set_answer(key, val)
+
+@prof.span("input.suggestions")
+def render_suggestions(q: dict, widget_key: str, text):
+    ac = get_autocomplete()
+    ac.refresh()
+    suggestions = ac.suggest(q["key"], text or "", limit=5)
+    if not suggestions:
+        return
+    st.caption("이전 방문 기록에서 선택" if text else "자주 방문한 곳")
+    cols = st.columns(len(suggestions))
+    for i, (col, s) in enumerate(zip(cols, suggestions)):
+        with col:
+            st.button(s["value"], key=f"sug_{widget_key}_{i}", help=f"방문 {s['count']}회 · 최근 {s['last_visit'] or '-'}",
+                      on_click=pick_suggestion, args=(q, widget_key, s), use_container_width=True)
+
+@prof.span("input.step_form")
+def render_step_form(current: int, nav):
     q = questions[current]
     req_badge = " <span style='color:#d9534f'>(필수)</span>" if q["key"] in required_keys else ""
     st.markdown(f"**단계 {current+1}/{total}** — {q['label']}{req_badge}", unsafe_allow_html=True)
@@ -216,6 +275,8 @@ if visible_indices and current in visible_indices:
     value = None
     if q["type"] == "text":
         value = st.text_input(q["label"], value=prev_val if isinstance(prev_val, str) else None, key=widget_key)
+        if q["key"] in suggest_columns:
+            render_suggestions(q, widget_key, value)
     elif q["type"] == "textarea":
         value = st.text_area(q["label"], value=prev_val if isinstance(prev_val, str) else None, key=widget_key)
     elif q["type"] == "number":
@@ -225,11 +286,11 @@ if visible_indices and current in visible_indices:
         default_index = options.index(prev_val) if (prev_val in options) else 0
         value = st.selectbox(q["label"], options=options, index=default_index, key=widget_key)
     elif q["type"] == "date":
-        default_date = prev_val if isinstance(prev_val, datetime.date) else q.get("default", datetime.date.today())
+        default_date = prev_val if isinstance(prev_val, datetime.date) else form.default(q)
         value = st.date_input(q["label"], value=default_date, key=widget_key)
 
     # 마지막 가시 단계인지 여부
-    is_last_step = (current == max(visible_indices)) if visible_indices else False
+    is_last_step = current == nav.last
 
     # 버튼 영역 (마지막 단계에서 저장 버튼 추가)
     if is_last_step:
@@ -239,81 +300,47 @@ if visible_indices and current in visible_indices:
 
     with col1:
         # 이전 가시 단계로 이동
-        prev_vis = [i for i in visible_indices if i < current]
-        if st.button("⬅️ 이전", disabled=(len(prev_vis) == 0)):
-            st.session_state.step = prev_vis[-1] if prev_vis else current
-            st.rerun()
+        prev_step = nav.prev_of[current]
+        if st.button("⬅️ 이전", disabled=(prev_step is None)):
+            st.session_state.step = current if prev_step is None else prev_step
+            rerun_fragment()
 
     with col2:
         if st.button("⏭️ 건너뛰기"):
-            next_vis = [i for i in visible_indices if i > current]
-            st.session_state.step = next_vis[0] if next_vis else current
-            st.rerun()
+            next_step = nav.next_of[current]
+            st.session_state.step = current if next_step is None else next_step
+            rerun_fragment()
 
     with col3:
         if st.button("➡️ 다음"):
-            # 값 저장 (date는 문자열로 저장)
-            if isinstance(value, datetime.date):
-                st.session_state.answers[q["key"]] = value.isoformat()
-            else:
-                st.session_state.answers[q["key"]] = value
-            # 필수 검증
-            valid = True
-            if q["key"] in required_keys:
-                v = st.session_state.answers.get(q["key"])
-                if q["type"] in ("text", "textarea"):
-                    valid = bool(str(v).strip())
-                elif q["type"] == "number":
-                    # 매매가 등은 0보다 큰 값 권장
-                    try:
-                        valid = float(v) > 0
-                    except Exception:
-                        valid = False
-                elif q["type"] == "select":
-                    valid = v is not None and str(v).strip() != ""
-                elif q["type"] == "date":
-                    valid = bool(v)
+            valid = commit_answer(q, value)
             if not valid:
                 st.warning("필수 항목을 입력해 주세요.")
             else:
-                next_vis = [i for i in visible_indices if i > current]
-                if next_vis:
-                    st.session_state.step = next_vis[0]
+                # 입력값에 따라 가시성이 바뀌었을 수 있으므로 갱신된 테이블로 다음 단계 결정
+                next_step = current_nav().next_of[current]
+                if next_step is not None:
+                    st.session_state.step = next_step
                 else:
                     # 마지막 단계였다면 완료 화면으로 전환되도록 현재를 벗어나게 함
                     st.session_state.step = current + 1
                     st.session_state.auto_save = True
-                st.rerun()
+                rerun_fragment()
     if is_last_step:
         with col4:
             if st.button("💾 저장하기(바로)"):
                 # 현재 값 저장 후 유효성 검사, 완료 화면으로 이동하여 자동 저장 진행
-                if isinstance(value, datetime.date):
-                    st.session_state.answers[q["key"]] = value.isoformat()
-                else:
-                    st.session_state.answers[q["key"]] = value
-                # 필수 검증
-                valid = True
-                if q["key"] in required_keys:
-                    v = st.session_state.answers.get(q["key"])
-                    if q["type"] in ("text", "textarea"):
-                        valid = bool(str(v).strip())
-                    elif q["type"] == "number":
-                        try:
-                            valid = float(v) > 0
-                        except Exception:
-                            valid = False
-                    elif q["type"] == "select":
-                        valid = v is not None and str(v).strip() != ""
-                    elif q["type"] == "date":
-                        valid = bool(v)
+                valid = commit_answer(q, value)
                 if not valid:
                     st.warning("필수 항목을 입력해 주세요.")
                 else:
                     st.session_state.step = current + 1
                     st.session_state.auto_save = True
-                    st.rerun()
-elif not visible_indices or current >= max(visible_indices) + 1:
+                    rerun_fragment()
+
+@prof.span("input.completion")
+def render_completion_panel():
+    # 저장하면 저장 기록 영역도 바뀌므로 저장 직후에는 앱 전체를 다시 실행합니다.
     st.success("모든 항목 입력이 완료되었습니다. 아래 요약을 확인하고 CSV로 저장하세요.")
 
     # 요약 테이블 생성
@@ -331,26 +358,7 @@ elif not visible_indices or current >= max(visible_indices) + 1:
     # 마지막 단계에서 '바로 저장'을 누른 경우 자동 저장 처리
     if st.session_state.auto_save:
         try:
-            file_exists = os.path.isfile(csv_file)
-            if st.session_state.edit_index is not None and os.path.isfile(csv_file):
-                df_all = pd.read_csv(csv_file)
-                idx = st.session_state.edit_index
-                if 0 <= idx < len(df_all):
-                    for c, v in zip(csv_columns, row_values):
-                        df_all.at[idx, c] = v
-                    df_all.to_csv(csv_file, index=False, encoding="utf-8-sig")
-                else:
-                    with open(csv_file, "a", newline="", encoding="utf-8-sig") as f:
-                        writer = csv.writer(f)
-                        if not file_exists:
-                            writer.writerow(csv_columns)
-                        writer.writerow([str(v) if v is not None else "" for v in row_values])
-            else:
-                with open(csv_file, "a", newline="", encoding="utf-8-sig") as f:
-                    writer = csv.writer(f)
-                    if not file_exists:
-                        writer.writerow(csv_columns)
-                    writer.writerow([str(v) if v is not None else "" for v in row_values])
+            save_record(row_values)
             st.success("✅ 기록이 CSV에 저장되었습니다!")
             st.session_state.saved = True
             st.session_state.edit_index = None
@@ -364,34 +372,14 @@ elif not visible_indices or current >= max(visible_indices) + 1:
     with colA:
         if st.button("✏️ 수정하기"):
             # 마지막 항목으로 이동하여 필요한 항목 수정하도록 유도
-            vis = get_visible_indices()
-            st.session_state.step = vis[-1] if vis else 0
-            st.rerun()
+            last = current_nav().last
+            st.session_state.step = 0 if last is None else last
+            rerun_fragment()
     with colB:
         if st.button("💾 CSV 저장"):
             try:
-                file_exists = os.path.isfile(csv_file)
-                # 편집 모드면 해당 행을 업데이트, 아니면 append
-                if st.session_state.edit_index is not None and os.path.isfile(csv_file):
-                    df_all = pd.read_csv(csv_file)
-                    idx = st.session_state.edit_index
-                    if 0 <= idx < len(df_all):
-                        for c, v in zip(csv_columns, row_values):
-                            df_all.at[idx, c] = v
-                        df_all.to_csv(csv_file, index=False, encoding="utf-8-sig")
-                    else:
-                        # 인덱스 범위 밖이면 append
-                        with open(csv_file, "a", newline="", encoding="utf-8-sig") as f:
-                            writer = csv.writer(f)
-                            if not file_exists:
-                                writer.writerow(csv_columns)
-                            writer.writerow([str(v) if v is not None else "" for v in row_values])
-                else:
-                    with open(csv_file, "a", newline="", encoding="utf-8-sig") as f:
-                        writer = csv.writer(f)
-                        if not file_exists:
-                            writer.writerow(csv_columns)
-                        writer.writerow([str(v) if v is not None else "" for v in row_values])
+                # 편집 모드면 해당 레코드를 업데이트, 아니면 추가
+                save_record(row_values)
                 st.success("✅ 기록이 CSV에 저장되었습니다!")
                 # 저장 완료 상태 표시 후, 신규 매물 추가 버튼 제공
                 st.session_state.saved = True
@@ -406,103 +394,268 @@ elif not visible_indices or current >= max(visible_indices) + 1:
         st.info("저장이 완료되었습니다. 다른 매물을 계속 추가하시겠습니까?")
         if st.button("➕ 신규 매물 추가"):
             st.session_state.step = 0
-            st.session_state.answers = {}
+            replace_answers({})
             st.session_state.saved = False
-            st.rerun()
+            rerun_fragment()
         # 이전 답변 복사하여 신규 입력 시작 (날짜는 오늘로, 개인 코멘트는 공백)
         if st.button("📋 이전 답변 복사하여 신규 매물"):
             new_answers = {k: v for k, v in zip(csv_columns, row_values)}
             new_answers["날짜"] = datetime.date.today().isoformat()
             new_answers["개인 코멘트"] = ""
-            st.session_state.answers = new_answers
+            replace_answers(new_answers)
             st.session_state.step = 0
             st.session_state.saved = False
-            st.rerun()
-
-# ---- CSV 기록 확인 + 필터/검색 + CRUD ----
-st.markdown("### 📊 현재 저장된 기록")
-if os.path.isfile(csv_file):
-    df_records = pd.read_csv(csv_file, encoding="utf-8-sig")
-
-    with st.expander("🔍 검색/필터"):
-        colf1, colf2 = st.columns(2)
-        with colf1:
-            date_from = st.date_input("시작일", value=None, key="flt_from")
-        with colf2:
-            date_to = st.date_input("종료일", value=None, key="flt_to")
-        colf3, colf4 = st.columns(2)
-        with colf3:
-            type_sel = st.multiselect("유형", options=type_opts, default=[])
-        with colf4:
-            name_text = st.text_input("이름/주소 검색")
-        colf5, colf6 = st.columns(2)
-        with colf5:
-            price_min = st.number_input("최소 매매가(만원)", value=0, step=100)
-        with colf6:
-            price_max = st.number_input("최대 매매가(만원)", value=0, step=100)
-
-    # 필터 적용
-    df_view = df_records.copy()
-    try:
-        if date_from is not None:
-            df_view = df_view[df_view["날짜"] >= date_from.isoformat()]
-        if date_to is not None:
-            df_view = df_view[df_view["날짜"] <= date_to.isoformat()]
-    except Exception:
-        pass
-    if type_sel:
-        df_view = df_view[df_view["부동산 유형"].isin(type_sel)]
-    if name_text:
-        m = df_view["아파트 이름"].astype(str).str.contains(name_text, case=False, na=False) | \
-            df_view["주소"].astype(str).str.contains(name_text, case=False, na=False)
-        df_view = df_view[m]
-    if price_min and price_min > 0:
-        with pd.option_context('mode.chained_assignment', None):
-            df_view["매매가_num"] = pd.to_numeric(df_view["매매가"], errors='coerce')
-        df_view = df_view[df_view["매매가_num"] >= price_min]
-    if price_max and price_max > 0:
-        if "매매가_num" not in df_view.columns:
-            with pd.option_context('mode.chained_assignment', None):
-                df_view["매매가_num"] = pd.to_numeric(df_view["매매가"], errors='coerce')
-        df_view = df_view[df_view["매매가_num"] <= price_max]
-    if "매매가_num" in df_view.columns:
-        df_view = df_view.drop(columns=["매매가_num"])
-
-    st.dataframe(df_view, use_container_width=True)
-
-    # CRUD 영역
-    st.markdown("#### ✏️ 레코드 수정 / 🗑 삭제")
-    if not df_records.empty:
-        options = [f"{i}: {row['아파트 이름']} | {row['주소']}" for i, row in df_records.iterrows()]
-        sel_label = st.selectbox("수정/삭제할 항목 선택", options=options, index=0)
-        try:
-            sel_index = int(sel_label.split(":", 1)[0])
-        except Exception:
-            sel_index = 0
+            rerun_fragment()
+
+@st.fragment
+@prof.fragment(profile_sid, "input_flow")
+def input_flow():
+    current = st.session_state.step
+    flash = st.session_state.pop("flash", None)
+    if flash:
+        st.success(flash)
+    nav = current_nav()
+    render_progress(current, nav)
+
+    if nav.visible and current not in nav.visible_set and current <= nav.last:
+        # 가시성 변경으로 현재 단계가 숨겨졌다면, 가장 가까운 다음 가시 단계로 이동
+        # (마지막 단계를 지난 완료 상태는 그대로 둠)
+        st.session_state.step = nav.next_of[current]
+        rerun_fragment()
+
+    if nav.visible and current in nav.visible_set:
+        render_step_form(current, nav)
+    elif not nav.visible or current >= nav.last + 1:
+        render_completion_panel()
+
+input_flow()
+
+# ---- 저장 기록 확인 + 필터/검색 + CRUD ----
+@st.fragment
+@prof.fragment(profile_sid, "records_browser")
+def records_browser():
+    st.markdown("### 📊 현재 저장된 기록")
+    if st.session_state.saved:
+        # 방금 저장한 기록이 목록에 보이도록 이 세션이 넣은 쓰기만 잠깐 기다립니다 (다른 세션의 쓰기는 기다리지 않음).
+        with prof.span("records.flush"):
+            writer.flush(timeout=0.5, tag=profile_sid)
+    failures = writer.take_failures(profile_sid)  # 이 세션의 실패만, 한 번 보여 주고 비움
+    if failures:
+        more = f" (외 {len(failures) - 1}건)" if len(failures) > 1 else ""
+        st.error(f"❌ 백그라운드 저장 중 오류가 발생했습니다: {failures[-1]}{more}")
+        st.session_state.saved = False
+    writer_stats = writer.stats()
+    if writer_stats["queue_depth"]:
+        lock_info = writer_stats.get("lock", {})
+        st.caption(f"쓰기 대기열 {writer_stats['queue_depth']}건 · 잠금 대기 최근 {lock_info.get('wait_last_ms', 0)}ms"
+                   f" / 최대 {lock_info.get('wait_max_ms', 0)}ms")
+    if store.count() > 0:
+        with st.expander("🔍 검색/필터"):
+            colf1, colf2 = st.columns(2)
+            with colf1:
+                date_from = st.date_input("시작일", value=None, key="flt_from")
+            with colf2:
+                date_to = st.date_input("종료일", value=None, key="flt_to")
+            colf3, colf4 = st.columns(2)
+            with colf3:
+                type_sel = st.multiselect("유형", options=type_opts, default=[])
+            with colf4:
+                name_text = st.text_input("이름/주소 검색")
+            colf5, colf6 = st.columns(2)
+            with colf5:
+                price_min = st.number_input("최소 매매가(만원)", value=0, step=100)
+            with colf6:
+                price_max = st.number_input("최대 매매가(만원)", value=0, step=100)
+            mine = owner_column and st.checkbox("내 기록만 보기", key="flt_mine")
+        # 분할 저장소: 작성자 조건은 읽을 파티션을 고르는 데 사용
+        scope = {"owner": st.session_state.owner or store.default_owner} if mine else {}
+
+        # 정렬/페이지: 필터·정렬은 저장소에서 처리하고 현재 페이지만 화면으로 보냅니다.
+        colp1, colp2, colp3 = st.columns([0.4, 0.3, 0.3])
+        with colp1:
+            sort_label = st.selectbox("정렬", options=["최근 등록순", "날짜", "매매가", "아파트 이름"], key="rec_sort")
+        with colp2:
+            sort_desc = st.checkbox("내림차순", value=True, key="rec_sort_desc")
+        with colp3:
+            page_size = st.selectbox("페이지 크기", options=[20, 50, 100], index=1, key="rec_page_size")
+        sort_by = None if sort_label == "최근 등록순" else sort_label
+        filters = dict(date_from=date_from, date_to=date_to, types=type_sel, text=name_text,
+                       price_min=price_min if price_min and price_min > 0 else None,
+                       price_max=price_max if price_max and price_max > 0 else None, **scope)
+        if "rec_page" not in st.session_state:
+            st.session_state.rec_page = 1
+        page_no = st.session_state.rec_page
+        with prof.span("records.page") as sp:
+            df_view, total_rows = store.page(offset=(page_no - 1) * page_size, limit=page_size,
+                                             sort_by=sort_by, descending=sort_desc, **filters)
+            page_count = max(1, -(-total_rows // page_size))
+            if page_no > page_count:
+                # 필터 변경으로 페이지 수가 줄었으면 마지막 페이지로
+                page_no = st.session_state.rec_page = page_count
+                df_view, total_rows = store.page(offset=(page_no - 1) * page_size, limit=page_size,
+                                                 sort_by=sort_by, descending=sort_desc, **filters)
+            sp.count(rows=total_rows)
+
+        st.dataframe(df_view, use_container_width=True)
+        st.number_input(f"페이지 (총 {page_count}쪽 · {total_rows}건)", min_value=1, max_value=page_count,
+                        step=1, key="rec_page")
+
+        # CRUD 영역
+        st.markdown("#### ✏️ 레코드 수정 / 🗑 삭제")
+        # 전체 행으로 선택 목록을 만들지 않고, 검색어로 저장소에서 최대 20건만 후보로 가져옵니다.
+        pick_text = st.text_input("수정/삭제할 항목 검색 (이름/주소, 비우면 최근 기록)", key="pick_text")
+        with prof.span("records.picker") as sp:
+            df_pick = store.search(pick_text, limit=20, **scope)
+            sp.count(rows=len(df_pick))
+        pick_labels = {int(i): f"{i}: {row['아파트 이름']} | {row['주소']}" for i, row in df_pick.iterrows()}
+        if not pick_labels:
+            st.caption("검색 결과가 없습니다.")
+            sel_index = None
+        else:
+            sel_index = st.selectbox("수정/삭제할 항목 선택", options=list(pick_labels),
+                                     format_func=pick_labels.get, index=0)
 
         colc1, colc2 = st.columns(2)
         with colc1:
-            if st.button("✏️ 선택 항목 수정 로드"):
+            if st.button("✏️ 선택 항목 수정 로드", disabled=sel_index is None):
                 # answers에 로드하고 편집 모드로 전환
-                rec = df_records.loc[sel_index]
-                st.session_state.answers = {c: rec.get(c, "") for c in csv_columns}
+                rec = store.get(sel_index) or {}
+                replace_answers({c: rec.get(c, "") for c in csv_columns})
                 st.session_state.step = 0
                 st.session_state.saved = False
                 st.session_state.edit_index = sel_index
-                st.success("선택한 항목을 편집 모드로 불러왔습니다. 위 입력 단계를 통해 수정 후 저장하세요.")
+                st.session_state.flash = "선택한 항목을 편집 모드로 불러왔습니다. 위 입력 단계를 통해 수정 후 저장하세요."
+                st.rerun()
         with colc2:
-            if st.button("🗑 선택 항목 삭제"):
+            if st.button("🗑 선택 항목 삭제", disabled=sel_index is None):
                 try:
-                    df_after = df_records.drop(index=sel_index)
-                    df_after.to_csv(csv_file, index=False, encoding="utf-8-sig")
-                    st.success("삭제되었습니다. 새로고침 후 반영됩니다.")
+                    with history.acting_as(profile_sid):
+                        deleted = store.delete(sel_index)
+                    if deleted:
+                        st.success("삭제되었습니다. 새로고침 후 반영됩니다.")
+                    else:
+                        st.warning("이미 삭제되었거나 존재하지 않는 항목입니다.")
                 except Exception as e:
                     st.error(f"삭제 중 오류: {e}")
 
-    try:
-        with open(csv_file, "rb") as f:
-            st.download_button("⬇️ CSV 다운로드", f, file_name=csv_file, mime="text/csv")
-    except Exception:
-        pass
-else:
-    st.info("아직 기록이 없습니다.")
+        # 변경 이력 / 되돌리기: 이 세션에서 한 변경만 되돌릴 수 있고, 이후 다른 변경이 있으면 거부됩니다.
+        with prof.span("records.history"):
+            last = history.last_change(session=profile_sid)
+        if last is not None:
+            op_label = {"insert": "추가", "update": "수정", "delete": "삭제"}[last["op"]]
+            if st.button(f"↩️ 마지막 변경 되돌리기 (id {last['rid']} {op_label})"):
+                try:
+                    if history.undo(session=profile_sid):
+                        st.session_state.flash = f"id {last['rid']} {op_label} 변경을 되돌렸습니다."
+                        st.rerun()
+                except ValueError as e:
+                    st.warning(str(e))
+        if sel_index is not None:
+            with st.expander("🕓 선택 항목 변경 이력"):
+                df_changes = history.changes(sel_index)
+                if df_changes.empty:
+                    st.caption("기록된 변경이 없습니다.")
+                else:
+                    st.dataframe(df_changes, use_container_width=True, hide_index=True)
+
+        # 내보내기: 현재 필터·정렬 결과 전체 (페이지와 무관)
+        export_formats = available_formats()
+        cole1, cole2 = st.columns([0.4, 0.6], vertical_alignment="bottom")
+        with cole1:
+            export_fmt = st.selectbox("내보내기 형식", options=list(export_formats), format_func=export_formats.get,
+                                      key="export_fmt")
+        with cole2:
+            st.download_button(f"⬇️ 필터 결과 다운로드 ({total_rows}건)",
+                               export_payload(export_fmt, total_rows, sort_by, sort_desc, filters),
+                               file_name=file_name(csv_file, export_fmt), mime=mime_type(export_fmt),
+                               on_click="ignore", key="export_records")
+        with st.expander("📅 특정 시점 데이터 보기"):
+            as_of_date = st.date_input("기준일 (그날 끝 시점)", value=None, key="as_of_date")
+            if as_of_date is not None:
+                df_past = history.as_of(as_of_date)
+                st.caption(f"{as_of_date} 기준 {len(df_past)}건")
+                st.dataframe(df_past, use_container_width=True)
+                # CSV는 다운로드를 누를 때만 만듭니다 (재실행마다 전체를 직렬화하지 않도록)
+                st.download_button("⬇️ 이 시점 CSV 다운로드", lambda: df_past.to_csv(index=False).encode("utf-8-sig"),
+                                   file_name=f"records_{as_of_date}.csv", mime="text/csv",
+                                   on_click="ignore", key="export_as_of")
+    else:
+        st.info("아직 기록이 없습니다.")
+
+records_browser()
+
+# ---- 대량 가져오기 (과거 임장 기록 CSV/Excel) ----
+@st.fragment
+@prof.fragment(profile_sid, "bulk_import_panel")
+def bulk_import_panel():
+    with st.expander("📥 기존 기록 대량 가져오기 (CSV/Excel)"):
+        st.caption("열 이름은 저장 CSV와 같아야 합니다. 필수 항목/숫자·날짜 형식/선택지를 검사하고, "
+                   "이미 저장된 기록(날짜·이름·주소·평형·매매가 기준)과 중복되는 행은 건너뜁니다.")
+        upload = st.file_uploader("파일 선택", type=["csv", "xlsx"], key="bulk_file")
+        if upload is not None and st.button("가져오기 시작", key="bulk_start"):
+            bar = st.progress(0.0, text="가져오는 중...")
+
+            def on_progress(report, fraction):
+                msg = f"{report.rows}행 처리 · 추가 {report.inserted} · 중복 {report.duplicates} · 오류 {report.invalid}"
+                bar.progress(fraction if fraction is not None else 0.0, text=msg)
+
+            try:
+                owner = {owner_column: store.check_owner(st.session_state.owner or store.default_owner)} \
+                    if owner_column else None
+                with history.acting_as(profile_sid):
+                    report = import_records(store, upload, filename=upload.name, total_bytes=upload.size,
+                                            form=form, progress=on_progress, defaults=owner)
+            except Exception as e:
+                st.error(f"가져오기 중 오류: {e}")
+            else:
+                st.session_state.bulk_report = (report.summary(), report.errors)
+                # 저장 기록 영역에도 반영되도록 전체 재실행
+                st.rerun()
+
+        if st.session_state.get("bulk_report"):
+            summary, errors = st.session_state.bulk_report
+            st.success(f"{summary['rows']}행 중 {summary['inserted']}건 추가 · 중복 {summary['duplicates']}건 건너뜀"
+                       f" · 오류 {summary['invalid']}행")
+            if len(errors):
+                st.dataframe(errors, use_container_width=True)
+                if summary["errors"] > len(errors):
+                    st.caption(f"오류 {summary['errors']}건 중 {len(errors)}건만 표시합니다.")
+                st.download_button("⬇️ 오류 보고서 다운로드", errors.to_csv(index=False).encode("utf-8-sig"),
+                                   file_name="import_errors.csv", mime="text/csv")
+
+bulk_import_panel()
+prof.end_run(profile_sid)
+
+# ---- 성능 디버그 패널 (?debug=1 또는 RECORD_APP_DEBUG=1 일 때 사이드바에서 켤 수 있음) ----
+# 패널 자체는 위 런이 끝난 뒤 그리므로 측정에 포함되지 않습니다.
+def debug_panel():
+    if not st.sidebar.toggle("🛠 성능 디버그", key="debug_panel"):
+        return
+    with st.sidebar:
+        stats = writer.stats()
+        st.caption(f"쓰기 {stats['written']}건 · 쓰기 오류 {stats['errors']}건 · "
+                   f"변경 통지 오류 {stats.get('notify_errors', 0)}건")
+        if stats.get("last_notify_error"):
+            st.caption(f"최근 통지 오류: {stats['last_notify_error']}")
+        n = st.slider("최근 실행 수", min_value=5, max_value=50, value=10, key="debug_runs")
+        runs = prof.recent(n)
+        if not runs:
+            st.caption("기록된 실행이 없습니다.")
+            return
+        st.dataframe(pd.DataFrame([{
+            "시각": r["ts"][11:23], "종류": r["kind"], "상태": r["status"], "전체(ms)": r["total_ms"],
+            "가장 느린 구간": max(leaf_spans(r["spans"]), key=lambda sp: sp["ms"] or 0)["name"] if r["spans"] else "",
+        } for r in runs]), hide_index=True, use_container_width=True)
+        pick = st.selectbox("구간 보기", options=range(len(runs)), key="debug_pick",
+                            format_func=lambda i: f"{runs[i]['ts'][11:23]} {runs[i]['kind']} ({runs[i]['total_ms']}ms)")
+        st.dataframe(pd.DataFrame([{
+            "구간": "\u00a0\u00a0" * sp["depth"] + sp["name"], "ms": sp["ms"], "행": sp["rows"] or None,
+            "바이트": sp["bytes"] or None,
+        } for sp in runs[pick]["spans"]]), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Prometheus 지표", prof.prometheus_text(), file_name="metrics.prom",
+                           mime="text/plain", key="debug_prom")
+        st.download_button("⬇️ 실행 기록 (JSON lines)", prof.jsonl(n), file_name="reruns.jsonl",
+                           mime="application/x-ndjson", key="debug_jsonl")
+
+if st.query_params.get("debug") == "1" or os.environ.get("RECORD_APP_DEBUG") == "1":
+    debug_panel()
@@ -0,0 +1,89 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import bulk_import  # noqa: E402
+from bulk_import import import_records  # noqa: E402
+from record_store import open_store  # noqa: E402
+
+# ---- 대량 가져오기: 중복 제거와 오류 행 ----
+# 형식이 틀린 행은 원본 행 번호(헤더가 1행)와 함께 보고하고 저장하지 않으며,
+# 파일 안 중복(청크를 넘어도)과 기존 기록 중복은 표기 차이(공백/대소문자/천 단위 쉼표)를 무시하고 한 번만 저장합니다.
+
+HEADER = "날짜,아파트 이름,주소,부동산 유형,매매가,층수,교통 편의성\n"
+ROWS = [
+    "2024-01-01,래미안,서울 강남구 역삼동 1,아파트,100000,10,좋음",     # 2: 기존 기록과 중복
+    "2024-01-02,자이,서울 강남구 도곡동 2,아파트,\"90,000\",5,보통",    # 3
+    "2024-01-02, 자이 ,서울 강남구  도곡동 2,아파트,90000,7,",         # 4: 3행과 중복 (공백/쉼표)
+    "2024-01-03,푸르지오,서울 마포구 공덕동 3,빌라,5만,,",              # 5: 매매가 숫자 아님
+    "2024-13-40,더샵,서울 송파구 잠실동 4,아파트,80000,,",              # 6: 날짜 형식 아님
+    "2024-01-04,,서울 송파구 잠실동 5,아파트,70000,,",                  # 7: 이름 없음
+    "2024-01-05,센트레빌,서울 노원구 상계동 6,원룸,30000,,",            # 8: 유형 선택지 없음
+    "2024-01-06,힐스테이트,서울 양천구 목동 7,오피스텔,40000,3층,매우 나쁨",  # 9: 층수·선택지 둘 다
+    "2024-01-07,SK뷰,서울 마포구 상암동 8,아파트,0,,",                  # 10: 매매가 0
+    "2024-01-08,sk뷰,서울 마포구 상암동 8,아파트,60000,,",              # 11
+    "2024-01-08,SK뷰,서울 마포구 상암동 8,아파트,60000,12,",            # 12: 11행과 중복 (대소문자)
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None)
+    s.insert_many([{"날짜": "2024-01-01", "아파트 이름": "래미안", "주소": "서울 강남구 역삼동 1",
+                    "부동산 유형": "아파트", "매매가": 100000}])
+    return s
+
+
+def _source():
+    return io.BytesIO((HEADER + "\n".join(ROWS) + "\n").encode("utf-8-sig"))
+
+
+@pytest.mark.parametrize("chunksize", [2, 100])
+def test_dedupe_and_error_rows(store, chunksize):
+    progress = []
+    report = import_records(store, _source(), filename="old.csv", chunksize=chunksize,
+                            progress=lambda r, f: progress.append(r.rows))
+    assert report.summary() == {"rows": 11, "inserted": 2, "duplicates": 3, "invalid": 6, "errors": 7}
+    assert progress[-1] == 11 and len(progress) == -(-11 // chunksize)
+
+    errors = report.errors
+    assert sorted(set(errors["행"])) == [5, 6, 7, 8, 9, 10]
+    assert set(errors[errors["행"] == 9]["항목"]) == {"층수", "교통 편의성"}
+    assert errors[errors["행"] == 5]["오류"].iloc[0] == "숫자가 아닙니다"
+    assert errors[errors["행"] == 6]["항목"].iloc[0] == "날짜"
+
+    df = store.load().sort_index()
+    assert df["아파트 이름"].tolist() == ["래미안", "자이", "sk뷰"]
+    assert df["매매가"].tolist() == [100000, 90000, 60000]
+    assert df["층수"].iloc[1] == 5
+
+
+def test_reimport_inserts_nothing(store):
+    import_records(store, _source(), filename="old.csv")
+    report = import_records(store, _source(), filename="old.csv")
+    assert report.inserted == 0
+    assert report.duplicates == 5
+    assert len(store.load()) == 3
+
+
+def test_error_report_is_capped(store, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_ERROR_ROWS", 2)
+    report = import_records(store, _source(), filename="old.csv", chunksize=3)
+    assert report.error_count == 7
+    assert len(report.errors) == 2
+
+
+def test_excel_source_matches_csv(store, tmp_path):
+    pytest.importorskip("openpyxl")
+    df = pd.read_csv(_source(), dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    path = tmp_path / "old.xlsx"
+    df.to_excel(path, index=False)
+    report = import_records(store, str(path), chunksize=4)
+    assert report.summary() == {"rows": 11, "inserted": 2, "duplicates": 3, "invalid": 6, "errors": 7}
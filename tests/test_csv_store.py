@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import CsvRecordStore, id_column, invalidate, store_columns  # noqa: E402
+
+# ---- CSV 저장소: 저널 재생과 압축 ----
+# 수정/삭제는 저널에 쌓였다가 읽을 때 적용되고, 압축 후에도(새 인스턴스로 다시 열어도) 같은 결과여야 합니다.
+
+
+def _rec(name, price=10000, date="2024-01-01"):
+    return {"날짜": date, "아파트 이름": name, "주소": "주소", "부동산 유형": "아파트", "매매가": price}
+
+
+def _view(store):
+    df = store.load()
+    return {int(rid): (r["아파트 이름"], int(r["매매가"])) for rid, r in df.iterrows()}
+
+
+def _reopen(path):
+    invalidate()  # 프로세스 캐시 없이 파일에서 다시 읽기
+    return CsvRecordStore(str(path))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "records.csv"
+
+
+def test_journal_replay_and_compaction_round_trip(path):
+    store = CsvRecordStore(str(path))
+    ids = store.insert_many([_rec("A", 1), _rec("B", 2), _rec("C", 3)])
+    assert store.update(ids[0], {"매매가": 11})
+    assert store.delete(ids[1])
+    assert not store.update(ids[1], {"매매가": 99})  # 삭제된 id
+    expected = {1: ("A", 11), 3: ("C", 3)}
+    assert _view(store) == expected
+    assert os.path.getsize(str(path) + ".journal") > 0
+    assert _view(_reopen(path)) == expected  # 저널 재생
+
+    assert store.compact()
+    assert _view(store) == expected
+    assert _view(_reopen(path)) == expected
+    # 압축으로 사라진 id도 재사용하지 않음
+    assert store.insert(_rec("D", 4)) == 4
+    assert _view(_reopen(path)) == {**expected, 4: ("D", 4)}
+
+
+def test_background_compaction_over_journal_limit(path):
+    store = CsvRecordStore(str(path), journal_limit=200)
+    ids = store.insert_many([_rec(f"R{i}", i) for i in range(5)])
+    for i, rid in enumerate(ids):
+        store.update(rid, {"매매가": 100 + i})
+    store._compactor.join(10)
+    assert os.path.getsize(str(path) + ".journal") < 200
+    assert _view(_reopen(path)) == {rid: (f"R{i}", 100 + i) for i, rid in enumerate(ids)}
+
+
+def test_partial_journal_line_is_ignored(path):
+    store = CsvRecordStore(str(path))
+    rid = store.insert(_rec("A", 1))
+    with open(str(path) + ".journal", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "upsert", "id": rid, "record": {"매매가": 5}}))  # 개행 전 (쓰는 중)
+    assert _view(_reopen(path)) == {rid: ("A", 1)}
+
+
+def test_file_without_trailing_newline_round_trip(path):
+    header = [id_column] + store_columns
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(header)
+        w.writerow(["1", "2024-01-01", "A", "주소", "", "아파트", "", "", "1"] + [""] * (len(header) - 9))
+        f.write(",".join(["2", "2024-01-02", "B", "주소", "", "아파트", "", "", "2"] + [""] * (len(header) - 9)))
+    store = CsvRecordStore(str(path))
+    assert _view(store) == {1: ("A", 1), 2: ("B", 2)}
+    assert store.insert(_rec("C", 3)) == 3
+    store.update(2, {"매매가": 22})
+    store.compact()
+    assert _view(_reopen(path)) == {1: ("A", 1), 2: ("B", 22), 3: ("C", 3)}
+
+
+def test_append_follows_file_column_order(path):
+    # 같은 열을 다른 순서로 저장한 파일: 새 행이 엉뚱한 열 아래에 들어가면 안 됨
+    cols = list(reversed([id_column] + store_columns))
+    row = {id_column: 1, "날짜": "2024-01-01", "아파트 이름": "A", "주소": "주소", "부동산 유형": "아파트", "매매가": 1}
+    pd.DataFrame([row]).reindex(columns=cols).to_csv(path, index=False, encoding="utf-8-sig")
+    store = CsvRecordStore(str(path))
+    rid = store.insert(_rec("B", 2, date="2024-02-02"))
+    for s in (store, _reopen(path)):
+        got = s.get(rid)
+        assert (got["아파트 이름"], got["매매가"], got["날짜"], got["부동산 유형"]) == ("B", 2, "2024-02-02", "아파트")
+        assert s.get(1)["아파트 이름"] == "A"
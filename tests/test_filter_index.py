@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.datagen import build_store  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+
+# ---- 필터 인덱스 ----
+# 인덱스 조회/정렬 결과가 같은 조건의 단순 pandas 필터/정렬과 같아야 합니다.
+# 합성 데이터에 날짜·매매가가 비었거나 해석할 수 없는 행도 섞어 둡니다.
+
+
+@pytest.fixture(scope="module")
+def frame(tmp_path_factory):
+    # 저장소가 돌려주는 그대로의 프레임 (열 타입 포함)
+    store = build_store("sqlite", str(tmp_path_factory.mktemp("idx") / "records.db"), 1500, seed=7)
+    ids = store.load().index
+    store.update_many([(rid, {"날짜": None}) for rid in ids[::97]] +
+                      [(rid, {"날짜": "날짜 모름"}) for rid in ids[5::89]] +
+                      [(rid, {"매매가": None}) for rid in ids[3::83]] +
+                      [(rid, {"아파트 이름": None}) for rid in ids[::101]])
+    return store.load()
+
+
+def _naive(df, date_from=None, date_to=None, types=None, price_min=None, price_max=None, text=None):
+    m = pd.Series(True, index=df.index)
+    dates = pd.to_datetime(df["날짜"], errors="coerce")
+    if date_from is not None:
+        m &= dates >= pd.Timestamp(date_from)
+    if date_to is not None:
+        m &= dates <= pd.Timestamp(date_to)
+    price = pd.to_numeric(df["매매가"], errors="coerce")
+    if price_min:
+        m &= price >= price_min
+    if price_max:
+        m &= price <= price_max
+    if types:
+        m &= df["부동산 유형"].isin(types)
+    if text:
+        needle = text.casefold()
+        name = df["아파트 이름"].fillna("").astype(str).str.casefold()
+        addr = df["주소"].fillna("").astype(str).str.casefold()
+        m &= name.str.contains(needle, regex=False) | addr.str.contains(needle, regex=False)
+    return np.flatnonzero(m.to_numpy())
+
+
+CASES = [
+    {},
+    {"date_from": "2021-01-01"},
+    {"date_to": "2020-06-30"},
+    {"date_from": "2020-03-01", "date_to": "2020-03-31"},
+    {"price_min": 50000},
+    {"price_min": 30000, "price_max": 60000},
+    {"types": ["오피스텔", "빌라"]},
+    {"types": ["없는 유형"]},
+    {"text": "강남"},
+    {"text": "래미안"},
+    {"text": "서울특별시 송파구"},
+    {"text": "SK"},
+    {"text": "없는이름xyz"},
+    {"types": ["아파트"], "price_max": 100000, "date_from": "2022-01-01", "text": "동"},
+    {"date_from": "2024-01-01", "text": "자이"},
+]
+
+
+@pytest.mark.parametrize("filters", CASES, ids=lambda f: ",".join(f) or "none")
+def test_search_matches_naive_filter(frame, filters):
+    idx = FilterIndex(frame)
+    assert idx.search(**filters).tolist() == _naive(frame, **filters).tolist()
+
+
+@pytest.mark.parametrize("column", ["날짜", "매매가", "층수", "수익률 중간(%)", "아파트 이름"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_order_matches_pandas_sort(frame, column, descending):
+    idx = FilterIndex(frame)
+    pos = idx.search(types=["아파트", "오피스텔"])
+    got = frame[column].iloc[idx.order(pos, column, descending)]
+    sub = frame[column].iloc[pos]
+    if column == "날짜":
+        key = pd.to_datetime(sub, errors="coerce")
+    elif column == "아파트 이름":
+        key = sub.astype(str).where(sub.notna())
+    else:
+        key = pd.to_numeric(sub, errors="coerce")  # 숫자 열은 값 크기 순 (문자열 순이 아님)
+    expected = sub.loc[key.sort_values(ascending=not descending, na_position="last", kind="stable").index]
+    assert sorted(got.index) == sorted(expected.index)
+    assert got.astype(str).tolist() == expected.astype(str).tolist()
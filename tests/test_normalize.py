@@ -0,0 +1,83 @@
+import csv
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from normalize import normalize_frame, normalize_record, parse_area, parse_int, parse_yield  # noqa: E402
+from record_store import CsvRecordStore, csv_columns, derived_columns  # noqa: E402
+
+# ---- 저장 시점 정규화 ----
+# 자유 입력 해석 규칙, 단건/일괄 경로가 같은 결과를 내는지, 이전 형식 파일 보정이 행을 잃지 않는지 확인합니다.
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("84m²", (84.0, 25.41)),
+    ("84㎡", (84.0, 25.41)),
+    ("84A", (84.0, 25.41)),
+    ("34평", (112.4, 34.0)),
+    ("34 평", (112.4, 34.0)),
+    ("1,000m²", (1000.0, 302.5)),
+    ("59.5", (59.5, 18.0)),
+    ("", (None, None)),
+    (None, (None, None)),
+    ("모름", (None, None)),
+])
+def test_parse_area(text, expected):
+    assert parse_area(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("4~5%", (4.0, 5.0, 4.5)),
+    ("4-5%", (4.0, 5.0, 4.5)),
+    ("5~4%", (4.0, 5.0, 4.5)),
+    ("4.5%", (4.5, 4.5, 4.5)),
+    ("약 5%", (5.0, 5.0, 5.0)),
+    ("-1%", (-1.0, -1.0, -1.0)),
+    ("", (None, None, None)),
+    ("높음", (None, None, None)),
+])
+def test_parse_yield(text, expected):
+    assert parse_yield(text) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("35,000", 35000), (35000.0, 35000), ("12.6", 13), ("", None), (None, None), ("abc", None), (True, None),
+])
+def test_parse_int(value, expected):
+    assert parse_int(value) == expected
+
+
+def test_frame_matches_record():
+    rows = [{"관심 평형": a, "예상 수익률": y, "매매가": p}
+            for a, y, p in [("84m²", "4~5%", "35,000"), ("34평", "4.5%", 12000.0), ("", "", ""),
+                            ("84A", "높음", "협의")]]
+    frame = normalize_frame(pd.DataFrame(rows))
+    for i, row in enumerate(rows):
+        one = normalize_record(row)
+        for c in derived_columns + ["매매가"]:
+            a, b = one[c], frame.at[i, c]
+            assert (a is None and pd.isna(b)) or a == b, (i, c, a, b)
+
+
+def test_legacy_backfill_keeps_every_row(tmp_path):
+    # 파생 열이 없고 끝 개행도 없는 이전 형식 파일: 열 때 보정해 다시 쓰더라도 모든 행이 남아야 함
+    path = tmp_path / "records.csv"
+    rows = [["2024-01-0%d" % i, f"단지{i}", "주소", "84m²", "아파트"] + [""] * (len(csv_columns) - 5)
+            for i in (1, 2, 3)]
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(csv_columns)
+        w.writerows(rows[:-1])
+        f.write(",".join(rows[-1]))
+    store = CsvRecordStore(str(path))
+    assert store.load()["아파트 이름"].tolist() == ["단지1", "단지2", "단지3"]
+    assert store.load()["평형(m²)"].tolist() == [84.0] * 3
+    reread = pd.read_csv(path, encoding="utf-8-sig")
+    assert reread["아파트 이름"].tolist() == ["단지1", "단지2", "단지3"]
+    assert list(reread.columns[:1]) == ["id"]
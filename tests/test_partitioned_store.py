@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import PartitionedRecordStore  # noqa: E402
+
+# ---- 작성자·월별 분할 저장소 ----
+# 파티션 배치/가지치기, 파티션 이동, 작성자 이름 인코딩(저장소 밖으로 쓰지 않음)을 확인합니다.
+
+
+def _rec(owner, date, name="단지", price=10000):
+    return {"작성자": owner, "날짜": date, "아파트 이름": name, "주소": "서울특별시 강남구 역삼동 1",
+            "부동산 유형": "아파트", "매매가": price}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PartitionedRecordStore(str(tmp_path / "parts"))
+
+
+def test_records_land_in_owner_month_partitions(store):
+    ids = store.insert_many([_rec("kim", "2024-01-05"), _rec("kim", "2024-02-01"), _rec("lee", "2024-01-20"),
+                             _rec("lee", None)])
+    assert ids == [1, 2, 3, 4]
+    assert store.partitions() == ["kim/2024-01", "kim/2024-02", "lee/2024-01", "lee/unknown"]
+    assert store.owners() == ["kim", "lee"]
+    assert store.count() == 4
+    assert store.get(3)["작성자"] == "lee"
+    assert os.path.exists(os.path.join(store.root, "kim", "2024-02.csv"))
+
+
+def test_partition_pruning(store):
+    store.insert_many([_rec("kim", "2024-01-05", price=1), _rec("kim", "2024-03-01", price=2),
+                       _rec("lee", "2024-01-20", price=3), _rec("lee", None, price=4)])
+    assert store.partitions(date_from="2024-01-01", date_to="2024-01-31") == ["kim/2024-01", "lee/2024-01"]
+    assert store.partitions(owner="kim", date_from="2024-02-01") == ["kim/2024-03"]
+    store._parts.clear()  # 어떤 파티션을 읽는지 보기 위해 열린 파티션을 비움
+    df, total = store.page(0, 10, date_from="2024-01-01", date_to="2024-01-31")
+    assert sorted(df["매매가"].tolist()) == [1, 3] and total == 2
+    assert sorted(store._parts) == ["kim/2024-01", "lee/2024-01"]
+    df, total = store.page(0, 10, owner="lee")
+    assert df["매매가"].tolist() == [3, 4] and total == 2
+
+
+def test_update_moves_between_partitions(store):
+    rid = store.insert(_rec("kim", "2024-01-05"))
+    assert store.update(rid, {"날짜": "2024-05-01", "작성자": "lee"})
+    assert store.get(rid)["작성자"] == "lee"
+    man = store.manifest()["partitions"]
+    assert man["kim/2024-01"]["rows"] == 0 and man["lee/2024-05"]["rows"] == 1
+    assert store.delete(rid) and store.count() == 0
+
+
+@pytest.mark.parametrize("owner", ["a/b", ".hidden", "..x", "김 철수", "%2E"])
+def test_owner_names_stay_inside_root(store, owner):
+    rid = store.insert(_rec(owner, "2024-01-05"))
+    assert store.get(rid)["작성자"] == owner
+    root = os.path.abspath(store.root)
+    for dirpath, _, files in os.walk(os.path.dirname(root)):
+        for f in files:
+            if f.endswith(".csv"):
+                path = os.path.abspath(os.path.join(dirpath, f))
+                assert os.path.commonpath([root, path]) == root
+                assert not os.path.basename(os.path.dirname(path)).startswith(".")
+
+
+@pytest.mark.parametrize("owner", [".", "..", "...", " .. ", "   "])
+def test_dot_only_or_blank_owner_rejected(store, tmp_path, owner):
+    with pytest.raises(ValueError):
+        store.check_owner(owner)
+    if owner.strip():  # 빈 이름은 저장소에서 기본 작성자로 처리
+        with pytest.raises(ValueError):
+            store.insert(_rec(owner, "2024-01-05"))
+        assert store.count() == 0
+    assert not (tmp_path / "2024-01.csv").exists()
+
+
+def test_bad_dates_go_to_unknown_month(store):
+    store.insert(_rec("kim", "../../x"))
+    assert store.partitions() == ["kim/unknown"]
+
+
+def test_api_rejects_bad_owner(store):
+    from record_api import RecordService
+
+    service = RecordService(store)
+    out = service.create([_rec("..", "2024-01-05"), _rec("", "2024-01-05"), _rec("kim", "2024-01-05")])
+    assert [(e["index"], e["field"]) for e in out["errors"]] == [(0, "작성자"), (1, "작성자")]
+    assert [c["index"] for c in out["created"]] == [2]
+    assert store.owners() == ["kim"]
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from property_resolution import PropertyIndex  # noqa: E402
+from record_store import open_store  # noqa: E402
+
+# ---- 매물 요약의 증분 갱신 ----
+# 변경마다 바뀐 매물의 요약만 다시 계산한 결과가, 같은 데이터로 처음부터 만든 요약과 같아야 합니다
+# (매물이 생기고, 합쳐지고, 나뉘고, 사라지는 경우 포함).
+
+
+def _rec(name, addr, date="2024-01-01", price=50000):
+    return {"날짜": date, "아파트 이름": name, "주소": addr, "부동산 유형": "아파트", "매매가": price}
+
+
+def _summary(index):
+    df = index.properties()
+    return sorted(map(tuple, df.astype(str).to_numpy().tolist()))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None)
+
+
+def test_incremental_summary_matches_rebuild(store):
+    index = PropertyIndex(store)
+    index.refresh()
+
+    def check():
+        fresh = PropertyIndex(store)
+        fresh.refresh()
+        assert _summary(index) == _summary(fresh)
+
+    a, b, c = store.insert_many([
+        _rec("래미안퍼스티지아파트", "서울특별시 서초구 반포동 1", "2024-01-01", 100000),
+        _rec("래미안 퍼스티지", "서울 서초구 반포1동 1", "2024-02-01", 110000),
+        _rec("도곡렉슬", "서울특별시 강남구 도곡동 2", "2024-01-05", 90000),
+    ])
+    check()
+    store.update(a, {"매매가": 105000})  # 기록 값만 바뀜
+    check()
+    d = store.insert_many([_rec("도곡 렉슬", "서울 강남구 도곡동 2", "2024-03-01", 95000)])[0]  # 같은 변형에 합류
+    check()
+    e = store.insert_many([_rec("도곡렉슬아파트단지", "서울특별시 강남구 도곡동 2", "2024-03-05", 96000)])[0]
+    check()  # 새 변형이 기존 매물과 합쳐짐
+    store.delete(e)  # 변형이 빠지며 매물이 다시 나뉨
+    check()
+    store.update(b, {"아파트 이름": "반포자이", "주소": "서울특별시 서초구 반포동 20"})  # 다른 매물로 이동
+    check()
+    store.delete(c)
+    check()
+    store.delete(d)  # 매물이 사라짐
+    check()
+    store.insert_many([_rec("반포 자이", "서울 서초구 반포동 20", "2024-04-01", 200000)])
+    check()
+
+
+def test_only_touched_properties_are_recomputed(store, monkeypatch):
+    store.insert_many([_rec(f"단지{i}", f"서울특별시 강남구 역삼동 {i + 1}") for i in range(20)])
+    index = PropertyIndex(store)
+    index.refresh()
+    index.properties()
+    calls = []
+    original = index._summary_row
+    monkeypatch.setattr(index, "_summary_row", lambda cid: calls.append(cid) or original(cid))
+    rid = int(store.load().index[0])
+    store.update(rid, {"매매가": 1})
+    df = index.properties()
+    assert calls == [index.property_of(rid)]
+    assert df.loc[index.property_of(rid), "최근 매매가"] == 1
+    calls.clear()
+    index.properties()
+    assert calls == []
@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_api import RecordService, serve  # noqa: E402
+from record_store import open_store  # noqa: E402
+
+# ---- 헤드리스 기록 API ----
+# 서비스 메서드의 검증 결과와 HTTP 핸들러의 상태 코드(특히 400 경로)를 확인합니다.
+
+
+def _rec(name, date="2024-01-01", price=10000, ptype="아파트", floor=None):
+    return {"날짜": date, "아파트 이름": name, "주소": "서울특별시 강남구 역삼동 1", "부동산 유형": ptype,
+            "매매가": price, "층수": floor}
+
+
+@pytest.fixture
+def service(tmp_path):
+    return RecordService(open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None))
+
+
+@pytest.fixture
+def http(service):
+    server = serve(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def call(method, path, body=None, **params):
+        url = base + path + ("?" + urllib.parse.urlencode(params, doseq=True) if params else "")
+        data = body if body is None or isinstance(body, bytes) else json.dumps(body).encode()
+        req = urllib.request.Request(url, data=data, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=10) as r:
+                text = r.read().decode("utf-8")
+                status = r.status
+        except urllib.error.HTTPError as e:
+            text, status = e.read().decode("utf-8"), e.code
+        if method == "GET" and status == 200 and path == "/records":
+            return status, [json.loads(line) for line in text.splitlines()]
+        return status, json.loads(text)
+
+    yield call
+    server.shutdown()
+    server.server_close()
+
+
+def test_create_reports_row_errors(service):
+    out = service.create([_rec("A"), {"아파트 이름": "B"}, {"모르는 항목": 1}, _rec("C", price="abc"), "문자열"])
+    assert [c["index"] for c in out["created"]] == [0]
+    bad = {e["index"] for e in out["errors"]}
+    assert bad == {1, 2, 3, 4}
+    assert any(e["index"] == 2 and e["field"] == "모르는 항목" for e in out["errors"])
+
+
+def test_update_merges_and_validates(service):
+    rid = service.create([_rec("A")])["created"][0]["id"]
+    out = service.update([{"id": rid, "매매가": 20000}, {"id": 999, "매매가": 1}, {"id": rid, "날짜": "어제"}])
+    assert out["updated"] == [{"index": 0, "id": rid}]
+    assert {(e["index"], e["field"]) for e in out["errors"]} >= {(1, "id"), (2, "날짜")}
+    assert service.store.get(rid)["매매가"] == 20000
+
+
+def test_http_round_trip(http):
+    status, out = http("POST", "/records", [_rec("A", floor=10), _rec("B", floor=2), _rec("C", floor=9)])
+    assert status == 200 and len(out["created"]) == 3
+    status, rows = http("GET", "/records", sort="층수", desc="1")
+    assert status == 200 and [r["층수"] for r in rows] == [10, 9, 2]  # 숫자 순 (문자열 순 아님)
+    status, out = http("PATCH", "/records", [{"id": rows[0]["id"], "매매가": 1}])
+    assert status == 200 and out["updated"]
+    status, out = http("DELETE", "/records", id=[rows[0]["id"], 999])
+    assert status == 200 and out == {"deleted": [rows[0]["id"]], "missing": [999]}
+    status, out = http("DELETE", "/records", {"ids": [rows[1]["id"]]})
+    assert status == 200 and out["deleted"] == [rows[1]["id"]]
+    status, rows = http("GET", "/records")
+    assert [r["아파트 이름"] for r in rows] == ["B"]
+
+
+def test_http_date_filter(http):
+    http("POST", "/records", [_rec("A", date="2024-01-01"), _rec("B", date="2024-02-01")])
+    status, rows = http("GET", "/records", date_from="2024-01-15")
+    assert status == 200 and [r["아파트 이름"] for r in rows] == ["B"]
+    status, rows = http("GET", "/records", date_to="2024-01-15")
+    assert status == 200 and [r["아파트 이름"] for r in rows] == ["A"]
+
+
+@pytest.mark.parametrize("params, field", [
+    ({"date_from": "garbage"}, "date_from"),
+    ({"date_to": "2024-13-01"}, "date_to"),
+    ({"price_min": "싸게"}, "price_min"),
+    ({"limit": "many"}, "limit"),
+    ({"sort": "없는열"}, "없는열"),
+])
+def test_http_get_rejects_bad_params(http, params, field):
+    http("POST", "/records", [_rec("A")])
+    status, out = http("GET", "/records", **params)
+    assert status == 400 and field in out["error"]
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b"5", b"{bad", b'{"ids": "1"}', b'{"ids": [1.5]}', b'{"ids": [true]}',
+                                  b'"ids"'])
+def test_http_delete_rejects_bad_body(http, body):
+    status, out = http("DELETE", "/records", body)
+    assert status == 400 and "error" in out
+
+
+def test_http_bad_json_and_unknown_path(http):
+    status, out = http("POST", "/records", b"{not json")
+    assert status == 400 and "error" in out
+    status, out = http("DELETE", "/records", id="x")
+    assert status == 400
+    status, out = http("GET", "/nothing")
+    assert status == 404
+    status, out = http("GET", "/health")
+    assert status == 200 and out["ok"]
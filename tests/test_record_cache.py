@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import load_records  # noqa: E402
+from record_writer import FileLock  # noqa: E402
+
+# ---- CSV 로더 캐시 ----
+# (mtime, size) 캐시, 꼬리 읽기, 끝 개행이 없는 파일의 마지막 줄 처리를 확인합니다.
+
+
+def _write(path, text: str, mode: str = "w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_last_row_without_trailing_newline(tmp_path):
+    path = tmp_path / "r.csv"
+    _write(path, "x,y\n1,A\n2,B")
+    df = load_records(str(path))
+    assert df["y"].tolist() == ["A", "B"]
+    assert load_records(str(path)) is df  # 바뀌지 않았으면 캐시 그대로
+
+
+def test_tail_append_is_read_incrementally(tmp_path):
+    path = tmp_path / "r.csv"
+    _write(path, "x,y\n1,A\n")
+    assert load_records(str(path))["y"].tolist() == ["A"]
+    _write(path, "2,B\n3,C\n", mode="a")
+    assert load_records(str(path))["y"].tolist() == ["A", "B", "C"]
+
+
+def test_rewrite_is_reread(tmp_path):
+    path = tmp_path / "r.csv"
+    _write(path, "x,y\n1,A\n2,B\n")
+    load_records(str(path))
+    _write(path, "x,y\n9,Z\n")
+    assert load_records(str(path))["y"].tolist() == ["Z"]
+
+
+def test_partial_line_held_back_only_while_writer_holds_lock(tmp_path):
+    path = tmp_path / "r.csv"
+    _write(path, "x,y\n1,A\n2,B")
+    lock = FileLock(str(path) + ".lock")
+    held, release = threading.Event(), threading.Event()
+
+    def writer():
+        with lock:
+            held.set()
+            release.wait(10)
+
+    t = threading.Thread(target=writer)
+    t.start()
+    held.wait(10)
+    try:
+        assert load_records(str(path))["y"].tolist() == ["A"]  # 쓰는 중인 줄은 미룸
+    finally:
+        release.set()
+        t.join(10)
+    # 파일이 그대로여도 미룬 줄은 다음 호출에서 읽음
+    assert load_records(str(path))["y"].tolist() == ["A", "B"]
+    # 잠금을 잡은 스레드 자신은 끝까지 읽음 (자기 쓰기 사이에는 쓰는 중인 줄이 없음)
+    _write(path, "x,y\n1,A\n2,B\n3,C")
+    with lock:
+        assert load_records(str(path))["y"].tolist() == ["A", "B", "C"]
@@ -0,0 +1,85 @@
+import gzip
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import record_export  # noqa: E402
+from bench.datagen import build_store  # noqa: E402
+from record_export import Exporter, available_formats  # noqa: E402
+
+# ---- 필터 결과 내보내기 ----
+# 내보낸 파일의 내용은 형식과 관계없이 화면의 필터·정렬 결과(store.page 전체)와 같아야 합니다.
+# 묶음/시트 경계를 넘도록 묶음 크기와 시트 행 수를 작게 두고, 설치되지 않은 형식은 건너뜁니다.
+
+FORMATS = list(record_export.formats)
+VIEWS = [
+    ({}, None, False),
+    ({"types": ["아파트"], "price_min": 50000}, "매매가", True),
+    ({"date_from": "2021-01-01", "text": "서울"}, "아파트 이름", False),
+    ({"text": "없는이름xyz"}, None, False),
+]
+
+
+@pytest.fixture(scope="module", params=["sqlite", "partitioned"])
+def store(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp(request.param) / "records"
+    return build_store(request.param, str(path), 400, seed=3)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(record_export, "EXPORT_CHUNK", 64)
+    monkeypatch.setattr(record_export, "EXCEL_SHEET_ROWS", 100)
+
+
+def _values(df: pd.DataFrame) -> list:
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def _read(fmt: str, data: bytes) -> pd.DataFrame:
+    if fmt == "csv.gz":
+        return pd.read_csv(io.BytesIO(gzip.decompress(data)), encoding="utf-8-sig")
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    sheets = pd.read_excel(io.BytesIO(data), sheet_name=None)
+    return pd.concat(sheets.values(), ignore_index=True)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize("filters,sort_by,descending", VIEWS)
+def test_export_matches_filtered_view(tmp_path, store, fmt, filters, sort_by, descending):
+    if fmt not in available_formats():
+        pytest.skip(f"{fmt}: 필요한 패키지가 없음")
+    view, total = store.page(0, 10 ** 6, sort_by, descending, **filters)
+    data = Exporter(store, path=str(tmp_path)).read(fmt, sort_by, descending, **filters)
+    if fmt == "csv.gz":
+        # 묶음별로 써도 한 번에 쓴 CSV와 글자 단위로 같음
+        assert gzip.decompress(data).decode("utf-8-sig") == view.to_csv(index=False)
+    if not total:
+        return
+    got = _read(fmt, data)
+    assert list(got.columns) == list(view.columns)
+    assert len(got) == total
+    assert _values(got[["아파트 이름", "주소", "부동산 유형"]]) == _values(view[["아파트 이름", "주소", "부동산 유형"]])
+    assert got["매매가"].tolist() == view["매매가"].tolist()
+
+
+def test_export_follows_new_data(tmp_path, store):
+    exporter = Exporter(store, path=str(tmp_path))
+    before = exporter.read("csv.gz", text="새로 넣은 단지")
+    rid = store.insert_many([{"날짜": "2024-05-01", "아파트 이름": "새로 넣은 단지", "주소": "서울 강남구 역삼동 99",
+                              "부동산 유형": "아파트", "매매가": 12345}])[0]
+    try:
+        after = pd.read_csv(io.BytesIO(gzip.decompress(exporter.read("csv.gz", text="새로 넣은 단지"))),
+                            encoding="utf-8-sig")
+        assert gzip.decompress(before).decode("utf-8-sig").count("\n") == 1  # 헤더만
+        assert after["매매가"].tolist() == [12345]
+    finally:
+        store.delete(rid)
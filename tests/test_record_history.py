@@ -0,0 +1,146 @@
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import record_history  # noqa: E402
+from record_history import RecordHistory  # noqa: E402
+from record_store import open_store  # noqa: E402
+
+# ---- 변경 이력: 시점 조회와 되돌리기 ----
+# as_of는 체크포인트가 있든 없든 그 시점에 실제로 저장돼 있던 데이터와 같아야 하고,
+# 되돌리기는 그 세션의 변경만, 이후 다른 변경이 없을 때만 수행합니다.
+
+
+def _rec(name, price=10000):
+    return {"날짜": "2024-01-01", "아파트 이름": name, "주소": "주소", "부동산 유형": "아파트", "매매가": price}
+
+
+def _view(df):
+    return {int(rid): (r["아파트 이름"], int(r["매매가"])) for rid, r in df.iterrows()}
+
+
+def _mark():
+    # 앞뒤 변경과 시각이 겹치지 않는 시점
+    time.sleep(0.002)
+    t = datetime.datetime.now()
+    time.sleep(0.002)
+    return t
+
+
+@pytest.fixture
+def store(tmp_path):
+    return open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None)
+
+
+@pytest.fixture
+def history(store):
+    h = RecordHistory(store)
+    yield h
+    h.close()
+
+
+def _edit(store, step):
+    ids = list(store.load().index)
+    if step % 3 == 0 or len(ids) < 2:
+        store.insert_many([_rec(f"R{step}", step)])
+    elif step % 3 == 1:
+        store.update(ids[step % len(ids)], {"매매가": step * 100})
+    else:
+        store.delete(ids[0])
+
+
+@pytest.mark.parametrize("checkpoint_min", [3, 10 ** 9])
+def test_as_of_matches_stored_data(monkeypatch, store, history, checkpoint_min):
+    monkeypatch.setattr(record_history, "CHECKPOINT_MIN", checkpoint_min)
+    seen = []
+    for step in range(30):
+        _edit(store, step)
+        seen.append((_mark(), _view(store.load())))
+    n = history._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+    assert (n > 1) == (checkpoint_min == 3)
+    for when, expected in seen:
+        assert _view(history.as_of(when)) == expected
+    assert history.as_of(datetime.date(2000, 1, 1)).empty
+
+
+def test_as_of_cache_follows_new_changes(store, history):
+    store.insert_many([_rec("A", 1)])
+    today = datetime.date.today()
+    first = history.as_of(today)
+    assert history.as_of(today) is first
+    store.insert_many([_rec("B", 2)])
+    assert sorted(n for n, _ in _view(history.as_of(today)).values()) == ["A", "B"]
+
+
+def test_record_as_of(store, history):
+    rid = store.insert_many([_rec("A", 1)])[0]
+    t1 = _mark()
+    store.update(rid, {"매매가": 2})
+    t2 = _mark()
+    store.delete(rid)
+    assert history.record_as_of(rid, t1)["매매가"] == 1
+    assert history.record_as_of(rid, t2)["매매가"] == 2
+    assert history.record_as_of(rid, datetime.datetime.now()) is None
+
+
+def test_undo_insert_update_delete(store, history):
+    with history.acting_as("s1"):
+        rid = store.insert_many([_rec("A", 1)])[0]
+        store.update(rid, {"매매가": 2})
+    assert history.undo(session="s1")["op"] == "update"
+    assert int(store.get(rid)["매매가"]) == 1
+    with history.acting_as("s1"):
+        store.delete(rid)
+    assert history.undo(session="s1")["op"] == "delete"
+    assert store.get(rid)["아파트 이름"] == "A"
+    assert history.undo(session="s1")["op"] == "insert"
+    assert store.get(rid) is None
+    assert history.undo(session="s1") is None
+
+
+def test_undo_refuses_when_record_changed_later(store, history):
+    with history.acting_as("s1"):
+        rid = store.insert_many([_rec("A", 1)])[0]
+    store.update(rid, {"매매가": 5})  # 다른 쓰기 (CLI 등)
+    with pytest.raises(ValueError, match="이후에 다른 변경"):
+        history.undo(session="s1")
+    assert int(store.get(rid)["매매가"]) == 5
+
+
+def test_undo_is_scoped_to_session(store, history):
+    with history.acting_as("s1"):
+        a = store.insert_many([_rec("A", 1)])[0]
+    with history.acting_as("s2"):
+        b = store.insert_many([_rec("B", 2)])[0]
+    assert history.last_change(session="s1")["rid"] == a
+    assert history.undo(session="s1")["rid"] == a
+    assert store.get(b) is not None
+    assert history.last_change(session="s1") is None
+
+
+def test_old_history_file_is_migrated(tmp_path):
+    store = open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None)
+    rid = store.insert_many([_rec("A", 1)])[0]
+    conn = sqlite3.connect(record_history.history_path(store))
+    conn.execute("CREATE TABLE changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, version TEXT, "
+                 "rid INTEGER NOT NULL, op TEXT NOT NULL, delta TEXT, origin TEXT NOT NULL, undoes INTEGER)")
+    conn.execute("INSERT INTO changes (ts, version, rid, op, delta, origin) VALUES (?, ?, ?, 'insert', ?, 'app')",
+                 ("2024-01-01T00:00:00.000000", "null", rid, json.dumps(_rec("A", 1), ensure_ascii=False)))
+    conn.commit()
+    conn.close()
+    history = RecordHistory(store)
+    try:
+        cols = {r[1] for r in history._conn.execute("PRAGMA table_info(changes)")}
+        assert {"session", "undone"} <= cols
+        assert _view(history.as_of(datetime.date(2024, 1, 1))) == {rid: ("A", 1)}
+    finally:
+        history.close()
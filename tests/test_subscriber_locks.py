@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from analytics import RecordAggregates  # noqa: E402
+from autocomplete import Autocomplete  # noqa: E402
+from property_resolution import PropertyIndex  # noqa: E402
+from record_store import open_store  # noqa: E402
+
+# ---- 쓰기 통지와 전체 다시 읽기의 잠금 순서 ----
+# 쓰기 스레드는 저장소 잠금 안에서 구독자 잠금을 잡고(통지), 조회 스레드는 refresh()로 저장소를 읽습니다.
+# 두 순서가 엇갈리면 교착되므로, 동시에 돌려 제한 시간 안에 끝나는지와 최종 상태를 확인합니다.
+
+WRITES = 150
+TIMEOUT = 60
+
+
+def _record(i: int) -> dict:
+    return {"날짜": f"2024-01-{i % 28 + 1:02d}", "아파트 이름": f"테스트 {i % 10}단지",
+            "주소": f"서울특별시 강남구 역삼동 {i % 10 + 1}", "부동산 유형": "아파트", "매매가": 50000 + i}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return open_store("sqlite", str(tmp_path / "records.db"), legacy_csv=None)
+
+
+@pytest.mark.parametrize("make", [RecordAggregates, Autocomplete, PropertyIndex],
+                         ids=["analytics", "autocomplete", "property_resolution"])
+def test_concurrent_write_and_refresh(store, make):
+    sub = make(store)
+    sub.refresh()
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            for i in range(WRITES):
+                rid = store.insert(_record(i))
+                if i % 3 == 0:
+                    store.update(rid, {"매매가": 60000 + i})
+        except Exception as e:  # pragma: no cover - 실패 원인 보고용
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader():
+        try:
+            n = 0
+            while not done.is_set():
+                if n % 4 == 0:
+                    with sub._lock:
+                        sub.version = None  # 전체 다시 읽기 경로도 함께
+                sub.refresh()
+                n += 1
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, daemon=True)] + \
+              [threading.Thread(target=reader, daemon=True) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(TIMEOUT)
+    assert not any(t.is_alive() for t in threads), "교착: 쓰기/다시 읽기가 끝나지 않음"
+    assert not errors
+
+    assert sub.refresh() == store.version()
+    incremental = _state(sub)
+    sub.version = None
+    sub.refresh()
+    assert incremental == _state(sub)  # 증분 반영 결과가 전체 다시 읽기와 같음
+
+
+def _state(sub):
+    if isinstance(sub, RecordAggregates):
+        return sub.price_stats()
+    if isinstance(sub, Autocomplete):
+        return sub.suggest("아파트 이름", "테스트", limit=20)
+    df = sub.properties()
+    return sorted(map(tuple, df[["아파트 이름", "방문 수", "최근 매매가"]].astype(str).to_numpy().tolist()))
+
+
+def test_subscriber_error_is_logged_and_counted(store, caplog):
+    def broken(before, after, events):
+        raise RuntimeError("boom")
+
+    store.subscribe(broken)
+    with caplog.at_level("ERROR", logger="record_store"):
+        rid = store.insert(_record(0))
+    assert store.get(rid) is not None  # 저장은 그대로 성공
+    assert store.notify_errors == 1
+    assert "RuntimeError: boom" in store.last_notify_error
+    assert any(r.exc_info for r in caplog.records)
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from record_store import CsvRecordStore, PartitionedRecordStore  # noqa: E402
+from record_writer import WriteBehindQueue  # noqa: E402
+
+# ---- 쓰기 직렬화 / write-behind 큐 ----
+# 여러 스레드의 쓰기가 잃어버리는 행 없이 직렬화되는지, 실패가 그 세션(tag)에만 알려지는지 확인합니다.
+
+
+def _rec(name, owner=None):
+    rec = {"날짜": "2024-01-01", "아파트 이름": name, "주소": "주소", "부동산 유형": "아파트", "매매가": 1}
+    if owner is not None:
+        rec["작성자"] = owner
+    return rec
+
+
+def test_concurrent_direct_inserts_are_serialized(tmp_path):
+    path = str(tmp_path / "records.csv")
+    stores = [CsvRecordStore(path) for _ in range(4)]  # 인스턴스가 달라도 파일 잠금으로 직렬화
+
+    def work(store, n):
+        for i in range(25):
+            store.insert(_rec(f"{n}-{i}"))
+
+    threads = [threading.Thread(target=work, args=(s, n)) for n, s in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    df = CsvRecordStore(path).load()
+    assert len(df) == 100 and df.index.is_unique
+    assert sorted(df["아파트 이름"]) == sorted(f"{n}-{i}" for n in range(4) for i in range(25))
+
+
+def test_queue_batches_and_updates(tmp_path):
+    store = CsvRecordStore(str(tmp_path / "records.csv"))
+    writer = WriteBehindQueue(store)
+    for i in range(10):
+        writer.submit_insert(_rec(f"R{i}"))
+    writer.submit_update(3, {"매매가": 33})
+    writer.submit_update(999, _rec("new"))  # 없는 id는 신규 추가
+    assert writer.flush(timeout=10)
+    df = store.load()
+    assert len(df) == 11 and df.at[3, "매매가"] == 33
+    stats = writer.stats()
+    assert stats["written"] == 12 and stats["errors"] == 0 and stats["queue_depth"] == 0
+
+
+def test_failures_reported_only_to_their_session(tmp_path):
+    store = PartitionedRecordStore(str(tmp_path / "parts"))
+    writer = WriteBehindQueue(store)
+    writer.submit_insert(_rec("ok", owner="kim"), tag="s1")
+    writer.submit_insert(_rec("bad", owner=".."), tag="s2")  # 작성자 검증에서 실패
+    writer.submit_insert(_rec("ok2", owner="lee"), tag="s1")
+    assert writer.flush(timeout=10, tag="s2") and writer.flush(timeout=10)
+    assert writer.take_failures("s1") == []
+    failures = writer.take_failures("s2")
+    assert len(failures) == 1 and failures[0].startswith("ValueError")
+    assert writer.take_failures("s2") == []  # 한 번 보여 주면 비움
+    assert store.count() == 2
+    assert writer.stats()["errors"] == 1
+
+
+def test_flush_by_tag_ignores_other_sessions(tmp_path):
+    store = CsvRecordStore(str(tmp_path / "records.csv"))
+    writer = WriteBehindQueue(store)
+    gate = threading.Event()
+    with store.lock:  # 쓰기 스레드를 잠금에서 붙잡아 둠
+        writer.submit_insert(_rec("slow"), tag="s1")
+        threading.Timer(0.05, gate.set).start()
+        gate.wait(5)
+        assert writer.flush(timeout=0.01, tag="s2")  # s2는 넣은 쓰기가 없으므로 바로 끝남
+        assert not writer.flush(timeout=0.05, tag="s1")
+    assert writer.flush(timeout=10, tag="s1")
+    assert store.count() == 1